@@ -0,0 +1,73 @@
+"""
+Decode time and decoded array size: full-colour decode vs reduced grayscale decode.
+
+Peak RSS is measured in a fresh subprocess per mode so earlier runs do not
+inflate it.
+
+Usage (from ai_service/):
+    python benchmarks/bench_decode.py [image] [--runs N] [--megapixels 12]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ocr_engines import OCREngine
+from ocr_identitycard import IDCardProcessor
+
+
+def make_upload(image_path: str, megapixels: float) -> bytes:
+    img = cv2.imread(image_path)
+    h, w = img.shape[:2]
+    scale = (megapixels * 1e6 / (h * w)) ** 0.5
+    big = cv2.resize(img, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_CUBIC)
+    ok, encoded = cv2.imencode(".jpg", big, [cv2.IMWRITE_JPEG_QUALITY, 92])
+    return encoded.tobytes()
+
+
+def measure(upload: bytes, reduced: bool, runs: int):
+    processor = IDCardProcessor(engine=OCREngine(), reduced_decode=reduced)
+    processor.decode_image(upload)
+    start = time.perf_counter()
+    for _ in range(runs):
+        img = processor.decode_image(upload)
+    seconds = (time.perf_counter() - start) / runs
+    processor.preprocess_array(img)
+    return {
+        "decode_ms": round(1000 * seconds, 2),
+        "decoded_shape": list(img.shape),
+        "decoded_mb": round(img.nbytes / 1e6, 2),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("image", nargs="?", default="test.png")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--megapixels", type=float, default=12)
+    parser.add_argument("--mode", choices=["full", "reduced"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    upload = make_upload(args.image, args.megapixels)
+    if args.mode:
+        print(json.dumps(measure(upload, args.mode == "reduced", args.runs)))
+        sys.exit(0)
+
+    report = {"image": args.image, "megapixels": args.megapixels,
+              "upload_mb": round(len(upload) / 1e6, 2), "modes": {}}
+    for mode in ("full", "reduced"):
+        out = subprocess.run(
+            [sys.executable, __file__, args.image, "--runs", str(args.runs),
+             "--megapixels", str(args.megapixels), "--mode", mode],
+            capture_output=True, text=True, check=True,
+        )
+        report["modes"][mode] = json.loads(out.stdout)
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,119 @@
+"""
+Document locator check on synthetic phone photos of an ID card.
+
+Each photo is a portrait frame (2400 x 3000 by default) with a clean
+synthetic card (see synthetic_cards.py) pasted in under a perspective
+warp: the card covers a given share of the frame, one end is narrower
+than the other and the card is shortened by the same share (as when the
+phone is tilted), and it is turned a few degrees in the image plane.
+Reported per coverage and skew: detection rate, mean confidence and
+worst corner error in pixels.
+
+The exit status is 1 if any setting detects fewer cards than
+--min-detection or scores them below --min-confidence on average, so a
+locator change fails the check as soon as skewed cards drift towards the
+locator's own cutoff, before they start being dropped.
+
+Usage (from ai_service/):
+    python benchmarks/bench_locator.py [--photos N] [--seed S]
+        [--coverage 0.3 0.6] [--skew 0 0.05 0.08] [--min-detection 0.9]
+        [--min-confidence 0.8]
+"""
+import argparse
+import json
+import os
+import sys
+from typing import Dict, Tuple
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from document_locator import DocumentLocator
+from synthetic_cards import random_identity, render_card
+
+
+def make_photo(rng: np.random.Generator, coverage: float, skew: float,
+               size: Tuple[int, int] = (2400, 3000),
+               rotation: float = 4.0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Photo of a portrait card on a plain background.
+
+    Args:
+        rng: Random generator
+        coverage: Share of the frame covered by the card
+        skew: How much narrower the far end of the card is, relative to its
+              width; the card is foreshortened by the same share
+        size: (width, height) of the photo
+        rotation: In-plane rotation upper bound in degrees, either direction
+
+    Returns:
+        (BGR photo, 4x2 card corners TL, TR, BR, BL in photo coordinates)
+    """
+    photo_w, photo_h = size
+    card = cv2.rotate(render_card(random_identity(rng), rng, 1.5), cv2.ROTATE_90_CLOCKWISE)
+    card_h, card_w = card.shape[:2]
+
+    long_side = np.sqrt(coverage * photo_w * photo_h * DocumentLocator.CARD_ASPECT)
+    short_side = long_side / DocumentLocator.CARD_ASPECT
+    inset = skew * short_side / 2
+    long_side *= 1.0 - skew
+    quad = np.array([[-short_side / 2 + inset, -long_side / 2],
+                     [short_side / 2 - inset, -long_side / 2],
+                     [short_side / 2, long_side / 2],
+                     [-short_side / 2, long_side / 2]], dtype=np.float32)
+    angle = np.deg2rad(rng.uniform(-rotation, rotation))
+    turn = np.array([[np.cos(angle), -np.sin(angle)], [np.sin(angle), np.cos(angle)]], np.float32)
+    quad = quad @ turn.T + np.array([photo_w / 2, photo_h / 2], np.float32)
+
+    source = np.array([[0, 0], [card_w, 0], [card_w, card_h], [0, card_h]], dtype=np.float32)
+    homography = cv2.getPerspectiveTransform(source, quad)
+    photo = np.empty((photo_h, photo_w, 3), np.uint8)
+    photo[:] = (70, 85, 100)
+    photo = cv2.add(photo, rng.integers(0, 24, photo.shape, dtype=np.uint8))
+    warped = cv2.warpPerspective(card, homography, size)
+    mask = cv2.warpPerspective(np.full((card_h, card_w), 255, np.uint8), homography, size)
+    photo[mask > 0] = warped[mask > 0]
+    return photo, quad
+
+
+def measure(locator: DocumentLocator, photos: int, seed: int,
+            coverage: float, skew: float) -> Dict:
+    rng = np.random.default_rng(seed)
+    found, confidences, errors = 0, [], []
+    for _ in range(photos):
+        photo, quad = make_photo(rng, coverage, skew)
+        result = locator.locate(photo)
+        if result is None:
+            continue
+        found += 1
+        confidences.append(result["confidence"])
+        errors.append(float(np.abs(result["quad"] - DocumentLocator.order_corners(quad)).max()))
+    return {
+        "coverage": coverage,
+        "skew": skew,
+        "detection_rate": found / photos,
+        "mean_confidence": round(float(np.mean(confidences)), 3) if confidences else None,
+        "max_corner_error_px": round(max(errors), 1) if errors else None,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--photos", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--coverage", type=float, nargs="+", default=[0.3, 0.6])
+    parser.add_argument("--skew", type=float, nargs="+", default=[0.0, 0.05, 0.08])
+    parser.add_argument("--min-detection", type=float, default=0.9)
+    parser.add_argument("--min-confidence", type=float, default=0.8)
+    args = parser.parse_args()
+
+    locator = DocumentLocator()
+    results = [measure(locator, args.photos, args.seed, coverage, skew)
+               for coverage in args.coverage for skew in args.skew]
+    print(json.dumps({"min_confidence": locator.min_confidence, "results": results}, indent=2))
+    if any(r["detection_rate"] < args.min_detection
+           or (r["mean_confidence"] or 0.0) < args.min_confidence for r in results):
+        sys.exit(1)
@@ -0,0 +1,241 @@
+"""
+End-to-end OCR benchmark on synthetic ID cards (see synthetic_cards.py).
+
+Every configuration (engine x OCR mode x preprocessing mode) runs in a
+fresh subprocess on the same seeded card set, with OpenCV and Tesseract
+limited to one thread. Reported per configuration:
+
+    throughput   cards/s of wall time and cards per CPU-second (per core),
+                 CPU including Tesseract subprocesses
+    latency_ms   p50 / p99 / mean / max per card
+    memory       peak RSS of the benchmark process and its children
+    accuracy     per field exact-match rate and mean character similarity,
+                 share of cards read entirely correctly, failed cards
+
+The report is JSON. With --baseline a previous report is compared and the
+exit status is 1 if a configuration got slower or less accurate than the
+tolerances allow.
+
+Usage (from ai_service/):
+    python benchmarks/bench_ocr_suite.py [--cards N] [--seed S] [--engine auto pytesseract]
+        [--ocr-mode per_field single_pass] [--preprocess-mode full fast]
+        [--validate-mrz] [--output report.json] [--baseline old.json]
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from dataclasses import asdict
+from difflib import SequenceMatcher
+from itertools import product
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ocr_engines import OCREngine, create_engine
+from ocr_identitycard import IDCardProcessor
+from synthetic_cards import Distortions, SyntheticCard, field_names, generate
+
+REPORT_VERSION = 1
+
+
+def config_key(config: Dict) -> str:
+    return "/".join(str(config[name]) for name in ("engine", "ocr_mode", "preprocess_mode"))
+
+
+def score_card(result: Optional[Dict], truth: Dict[str, str]) -> Dict[str, float]:
+    """Per field similarity (0-1) of the result to the truth; 1.0 is an exact match."""
+    scores = {}
+    for name in field_names():
+        expected = " ".join(truth[name].split())
+        actual = " ".join(str((result or {}).get(name, "")).split())
+        scores[name] = 1.0 if actual == expected else SequenceMatcher(None, actual, expected).ratio()
+    return scores
+
+
+def cpu_seconds() -> float:
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+def run_config(config: Dict, cards: List[SyntheticCard],
+               engine: Optional[OCREngine] = None) -> Dict:
+    """
+    Process every card with one configuration in this process.
+
+    The first card is processed once more beforehand so engine start-up is
+    not part of the latencies.
+    """
+    processor = IDCardProcessor(
+        engine=engine or create_engine(config["engine"]),
+        ocr_mode=config["ocr_mode"],
+        preprocess_mode=config["preprocess_mode"],
+        validate_mrz=config["validate_mrz"],
+        binarization=config["binarization"],
+        template_match=config["template_match"],
+    )
+    try:
+        processor.process_id_card_from_bytes(cards[0].image)
+    except ValueError:
+        pass
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    latencies, errors = [], {}
+    scores = {name: [] for name in field_names()}
+    exact_cards = 0
+    cpu_start, wall_start = cpu_seconds(), time.perf_counter()
+    for card in cards:
+        start = time.perf_counter()
+        try:
+            result = processor.process_id_card_from_bytes(card.image)
+        except ValueError as e:
+            # Unreadable card or an MRZ that failed its check digits
+            result = None
+            errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+        latencies.append(time.perf_counter() - start)
+
+        card_scores = score_card(result, card.truth)
+        for name, score in card_scores.items():
+            scores[name].append(score)
+        exact_cards += all(score == 1.0 for score in card_scores.values())
+    wall = time.perf_counter() - wall_start
+    cpu = cpu_seconds() - cpu_start
+
+    latencies_ms = 1000 * np.array(latencies)
+    kb = 1024 if platform.system() != "Darwin" else 1024 * 1024
+    return {
+        **config,
+        "cards": len(cards),
+        "throughput": {
+            "cards_per_s": round(len(cards) / wall, 3),
+            "cards_per_cpu_s": round(len(cards) / cpu, 3) if cpu > 0 else None,
+        },
+        "latency_ms": {
+            "p50": round(float(np.percentile(latencies_ms, 50)), 2),
+            "p99": round(float(np.percentile(latencies_ms, 99)), 2),
+            "mean": round(float(latencies_ms.mean()), 2),
+            "max": round(float(latencies_ms.max()), 2),
+        },
+        "memory": {
+            "baseline_rss_mb": round(baseline_rss / kb, 1),
+            "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / kb, 1),
+            "peak_child_rss_mb": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / kb, 1),
+        },
+        "accuracy": {
+            "fields": {name: {"exact": round(sum(s == 1.0 for s in values) / len(values), 4),
+                              "similarity": round(float(np.mean(values)), 4)}
+                       for name, values in scores.items()},
+            "field_exact": round(float(np.mean([s == 1.0 for v in scores.values() for s in v])), 4),
+            "card_exact": round(exact_cards / len(cards), 4),
+            "errors": errors,
+        },
+    }
+
+
+def run_in_subprocess(config: Dict, args: argparse.Namespace) -> Dict:
+    """Run one configuration in a fresh interpreter so peak memory is its own."""
+    command = [sys.executable, os.path.abspath(__file__), "--config", json.dumps(config),
+               "--cards", str(args.cards), "--seed", str(args.seed), "--scale", str(args.scale)]
+    for name, value in asdict(distortions_from_args(args)).items():
+        command += ["--" + name.replace("_", "-"), str(value)]
+    env = dict(os.environ, OMP_THREAD_LIMIT="1")
+    completed = subprocess.run(command, capture_output=True, text=True, env=env)
+    if completed.returncode != 0:
+        return {**config, "error": completed.stderr.strip().splitlines()[-1:] or ["failed"]}
+    return json.loads(completed.stdout)
+
+
+def compare(report: Dict, baseline: Dict, latency_tolerance: float,
+            accuracy_tolerance: float) -> List[str]:
+    """Regressions of report against baseline, as human readable lines."""
+    previous = {config_key(entry): entry for entry in baseline.get("results", []) if "error" not in entry}
+    regressions = []
+    for entry in report["results"]:
+        key = config_key(entry)
+        if "error" in entry or key not in previous:
+            continue
+        old = previous[key]
+        p50, old_p50 = entry["latency_ms"]["p50"], old["latency_ms"]["p50"]
+        if p50 > old_p50 * (1 + latency_tolerance):
+            regressions.append(f"{key}: p50 latency {old_p50} -> {p50} ms")
+        accuracy, old_accuracy = entry["accuracy"]["field_exact"], old["accuracy"]["field_exact"]
+        if accuracy < old_accuracy - accuracy_tolerance:
+            regressions.append(f"{key}: field accuracy {old_accuracy} -> {accuracy}")
+    return regressions
+
+
+def distortions_from_args(args: argparse.Namespace) -> Distortions:
+    return Distortions(blur=args.blur, rotation=args.rotation, shadow=args.shadow,
+                       noise=args.noise, jpeg_quality=args.jpeg_quality)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cards", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--scale", type=float, default=1.5, help="card width / TARGET_WIDTH")
+    parser.add_argument("--engine", nargs="+", default=["auto"])
+    parser.add_argument("--ocr-mode", nargs="+", default=[IDCardProcessor.OCR_MODE_PER_FIELD,
+                                                          IDCardProcessor.OCR_MODE_SINGLE_PASS])
+    parser.add_argument("--preprocess-mode", nargs="+", default=[IDCardProcessor.PREPROCESS_FULL,
+                                                                 IDCardProcessor.PREPROCESS_FAST])
+    parser.add_argument("--validate-mrz", action="store_true")
+    parser.add_argument("--binarization", default=IDCardProcessor.BINARIZE_SINGLE)
+    parser.add_argument("--template-match", action="store_true")
+    defaults = Distortions()
+    parser.add_argument("--blur", type=float, default=defaults.blur)
+    parser.add_argument("--rotation", type=float, default=defaults.rotation)
+    parser.add_argument("--shadow", type=float, default=defaults.shadow)
+    parser.add_argument("--noise", type=float, default=defaults.noise)
+    parser.add_argument("--jpeg-quality", type=int, default=defaults.jpeg_quality)
+    parser.add_argument("--output", help="write the report here instead of stdout")
+    parser.add_argument("--baseline", help="previous report to check for regressions")
+    parser.add_argument("--latency-tolerance", type=float, default=0.2)
+    parser.add_argument("--accuracy-tolerance", type=float, default=0.02)
+    parser.add_argument("--config", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.config:
+        cv2.setNumThreads(1)
+        cards = list(generate(args.cards, args.seed, distortions_from_args(args), args.scale))
+        print(json.dumps(run_config(json.loads(args.config), cards)))
+        sys.exit(0)
+
+    report = {
+        "version": REPORT_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "host": {"python": platform.python_version(), "opencv": cv2.__version__,
+                 "machine": platform.machine(), "cpus": os.cpu_count()},
+        "cards": args.cards,
+        "seed": args.seed,
+        "scale": args.scale,
+        "distortions": asdict(distortions_from_args(args)),
+        "results": [],
+    }
+    for engine, ocr_mode, preprocess_mode in product(args.engine, args.ocr_mode, args.preprocess_mode):
+        config = {"engine": engine, "ocr_mode": ocr_mode, "preprocess_mode": preprocess_mode,
+                  "validate_mrz": args.validate_mrz, "binarization": args.binarization,
+                  "template_match": args.template_match}
+        report["results"].append(run_in_subprocess(config, args))
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.latency_tolerance, args.accuracy_tolerance)
+        report["regressions"] = regressions
+        status = 1 if regressions else 0
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    sys.exit(status)
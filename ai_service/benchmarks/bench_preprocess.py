@@ -0,0 +1,76 @@
+"""
+Preprocessing time per megapixel for the full and fast preprocessing modes.
+
+The input image is upscaled to several resolutions to emulate phone photos.
+Agreement is the share of output pixels where both modes produce the same
+binary value.
+
+Usage (from ai_service/):
+    python benchmarks/bench_preprocess.py [image] [--runs N] [--megapixels 2 6 12]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ocr_engines import OCREngine
+from ocr_identitycard import IDCardProcessor
+
+
+def resize_to_megapixels(img: np.ndarray, megapixels: float) -> np.ndarray:
+    h, w = img.shape[:2]
+    scale = (megapixels * 1e6 / (h * w)) ** 0.5
+    return cv2.resize(img, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_CUBIC)
+
+
+def time_preprocess(processor: IDCardProcessor, img: np.ndarray, runs: int):
+    processor.preprocess_array(img)
+    start = time.perf_counter()
+    for _ in range(runs):
+        out = processor.preprocess_array(img)
+    return (time.perf_counter() - start) / runs, out
+
+
+def run(image_path: str, runs: int, megapixels):
+    # Preprocessing does not touch the engine; the base class avoids loading one
+    engine = OCREngine()
+    processors = {
+        mode: IDCardProcessor(engine=engine, preprocess_mode=mode)
+        for mode in (IDCardProcessor.PREPROCESS_FULL, IDCardProcessor.PREPROCESS_FAST)
+    }
+    base = processors[IDCardProcessor.PREPROCESS_FULL].load_image(image_path)
+
+    report = {"image": image_path, "runs": runs, "resolutions": []}
+    for mp in megapixels:
+        img = resize_to_megapixels(base, mp)
+        actual_mp = img.shape[0] * img.shape[1] / 1e6
+        entry = {"megapixels": round(actual_mp, 2), "modes": {}}
+        outputs = {}
+        for mode, processor in processors.items():
+            seconds, outputs[mode] = time_preprocess(processor, img, runs)
+            entry["modes"][mode] = {
+                "ms": round(1000 * seconds, 2),
+                "ms_per_megapixel": round(1000 * seconds / actual_mp, 2),
+            }
+        full = outputs[IDCardProcessor.PREPROCESS_FULL] > 127
+        fast = outputs[IDCardProcessor.PREPROCESS_FAST] > 127
+        entry["agreement"] = round(float(np.mean(full == fast)), 4)
+        entry["speedup"] = round(entry["modes"]["full"]["ms"] / entry["modes"]["fast"]["ms"], 1)
+        report["resolutions"].append(entry)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("image", nargs="?", default="test.png")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--megapixels", type=float, nargs="+", default=[2, 6, 12])
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.image, args.runs, args.megapixels), indent=2))
@@ -0,0 +1,75 @@
+"""
+Compare recognizer calls and latency per card for the OCR modes.
+
+Usage (from ai_service/):
+    python benchmarks/bench_recognizer_calls.py [image] [--runs N] [--engine auto|tesserocr|pytesseract]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ocr_engines import OCREngine, create_engine
+from ocr_identitycard import IDCardProcessor
+
+
+class CountingEngine(OCREngine):
+    """Wraps an engine and counts how often the recognizer is invoked."""
+
+    def __init__(self, inner: OCREngine):
+        super().__init__(inner.lang)
+        self.inner = inner
+        self.name = inner.name
+        self.calls = 0
+
+    def recognize(self, image, config):
+        self.calls += 1
+        return self.inner.recognize(image, config)
+
+    def recognize_words(self, image, config):
+        self.calls += 1
+        return self.inner.recognize_words(image, config)
+
+    def recognize_with_confidence(self, image, config):
+        self.calls += 1
+        return self.inner.recognize_with_confidence(image, config)
+
+
+def run(image_path: str, runs: int, backend: str):
+    engine = CountingEngine(create_engine(backend))
+    engine.inner.warm_up()
+
+    report = {"image": image_path, "engine": engine.name, "runs": runs, "modes": {}}
+    modes = [(mode, template) for mode in (IDCardProcessor.OCR_MODE_PER_FIELD,
+                                           IDCardProcessor.OCR_MODE_SINGLE_PASS)
+             for template in (False, True)]
+    for mode, template in modes:
+        processor = IDCardProcessor(engine=engine, ocr_mode=mode, template_match=template)
+        img = processor.load_image(image_path)
+        processed = processor.preprocess_array(img)
+
+        engine.calls = 0
+        start = time.perf_counter()
+        for _ in range(runs):
+            fields = processor.extract_fields(processed)
+        elapsed = time.perf_counter() - start
+
+        report["modes"][mode + ("+template" if template else "")] = {
+            "recognizer_calls_per_card": engine.calls / runs,
+            "ms_per_card": 1000 * elapsed / runs,
+            "fields": dict(fields),
+        }
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("image", nargs="?", default="test.png")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--engine", default=None)
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.image, args.runs, args.engine), ensure_ascii=False, indent=2))
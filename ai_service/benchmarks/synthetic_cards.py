@@ -0,0 +1,283 @@
+"""
+Synthetic Romanian ID cards for benchmarks.
+
+Cards are rendered so the fixed crop of IDCardProcessor lands on the
+DEFAULT_CROP_BOXES layout: names, series and CNP are random but
+consistent (valid CNP control digit, MRZ with valid check digits), and
+every card comes with its ground truth in the convert_to_json format.
+Blur, rotation, shadows, sensor noise and JPEG compression are applied
+per card with a seeded generator, so a seed always yields the same set.
+
+Text is drawn with OpenCV's Hershey font, which has no diacritics, so
+names and places are ASCII. Place of birth and address only use
+characters their Tesseract whitelists allow.
+
+Usage (from ai_service/), to look at a few cards:
+    python benchmarks/synthetic_cards.py [--cards N] [--seed S] [--out DIR]
+"""
+import argparse
+import json
+import os
+import sys
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterator, List, Tuple
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mrz import build_line2, optional_from_cnp
+from ocr_identitycard import IDCardProcessor
+
+SURNAMES = ["POPESCU", "IONESCU", "POPA", "RADU", "DUMITRU", "STAN", "STOICA", "GHEORGHE",
+            "MATEI", "CIOBANU", "ROTARU", "MUNTEANU", "CONSTANTIN", "BARBU", "NISTOR",
+            "FLOREA", "TUDOR", "DOBRE", "ILIE", "OPREA", "LUNGU", "VOICU", "MOLDOVAN"]
+MALE_NAMES = ["ANDREI", "MIHAI", "ALEXANDRU", "STEFAN", "IOAN", "GABRIEL", "DANIEL",
+              "ADRIAN", "CRISTIAN", "VLAD", "BOGDAN", "RAZVAN", "MARIUS", "TUDOR"]
+FEMALE_NAMES = ["MARIA", "ELENA", "IOANA", "ANDREEA", "ALEXANDRA", "CRISTINA", "MIHAELA",
+                "DIANA", "ANA", "GABRIELA", "ROXANA", "LAURA", "IRINA", "OANA"]
+# (county code in the CNP, county abbreviation, towns)
+COUNTIES = [(22, "IS", ["Iasi", "Pascani", "Harlau"]),
+            (12, "CJ", ["Cluj", "Turda", "Dej"]),
+            (35, "TM", ["Timisoara", "Lugoj"]),
+            (4, "BC", ["Bacau", "Onesti", "Moinesti"]),
+            (33, "SV", ["Suceava", "Falticeni", "Radauti"]),
+            (13, "CT", ["Constanta", "Mangalia", "Medgidia"]),
+            (5, "BH", ["Oradea", "Salonta"]),
+            (32, "SB", ["Sibiu", "Medias"])]
+SERIES = ["MX", "MZ", "XV", "XT", "KX", "CJ", "TM", "TZ", "XC", "SV", "KT", "XH", "SB", "OB"]
+STREETS = ["Lalelor", "Florilor", "Mihai Eminescu", "Stefan cel Mare", "Pacurari",
+           "Independentei", "Unirii", "Garii", "Primaverii", "Trandafirilor"]
+
+CNP_WEIGHTS = "279146358279"
+
+# Canonical card: TARGET_WIDTH wide, tall enough that the processor's crop
+# region is exactly TARGET_HEIGHT rows
+CROP_REGION = IDCardProcessor.DEFAULT_CROP_REGION
+CARD_WIDTH = IDCardProcessor.TARGET_WIDTH
+CARD_HEIGHT = int(round(IDCardProcessor.TARGET_HEIGHT / (CROP_REGION["y2"] - CROP_REGION["y1"])))
+CROP_TOP = CROP_REGION["y1"] * CARD_HEIGHT
+
+# MRZ lines (TD2): 36 fixed-pitch characters across the MRZ box
+MRZ_LENGTH = 36
+MRZ_LEFT, MRZ_RIGHT = IDCardProcessor.MRZ_LINE2_BOX[0], IDCardProcessor.MRZ_LINE2_BOX[2]
+MRZ_BASELINES = (235, 293)
+MRZ_CHAR_HEIGHT = 30
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+
+@dataclass
+class Distortions:
+    """Upper bounds of the per-card distortions (each card draws uniformly below them)."""
+
+    blur: float = 1.2          # Gaussian sigma in canonical pixels
+    rotation: float = 1.5      # degrees, either direction
+    shadow: float = 0.45       # darkest share removed by the illumination gradient
+    noise: float = 4.0         # sensor noise sigma (gray levels)
+    jpeg_quality: int = 60     # lowest JPEG quality (up to 95)
+
+
+@dataclass
+class SyntheticCard:
+    image: bytes                  # JPEG upload
+    truth: Dict[str, str]         # expected convert_to_json output
+    params: Dict[str, float]      # distortions applied to this card
+
+
+def cnp_control_digit(first12: str) -> str:
+    total = sum(int(d) * int(w) for d, w in zip(first12, CNP_WEIGHTS))
+    control = total % 11
+    return "1" if control == 10 else str(control)
+
+
+def random_identity(rng: np.random.Generator) -> Dict[str, str]:
+    """Random but internally consistent identity, plus the card's text lines."""
+    male = rng.random() < 0.5
+    surname = str(rng.choice(SURNAMES))
+    given = list(rng.choice(MALE_NAMES if male else FEMALE_NAMES,
+                            size=int(rng.integers(1, 3)), replace=False))
+
+    year = int(rng.integers(1950, 2006))
+    month, day = int(rng.integers(1, 13)), int(rng.integers(1, 29))
+    county_code, county, towns = COUNTIES[int(rng.integers(len(COUNTIES)))]
+    if year < 2000:
+        sex_digit = "1" if male else "2"
+    else:
+        sex_digit = "5" if male else "6"
+    birth = f"{year % 100:02d}{month:02d}{day:02d}"
+    first12 = f"{sex_digit}{birth}{county_code:02d}{int(rng.integers(1, 1000)):03d}"
+    cnp = first12 + cnp_control_digit(first12)
+
+    expiry = f"{int(rng.integers(2026, 2036)) % 100:02d}{month:02d}{day:02d}"
+    series = str(rng.choice(SERIES))
+    number = f"{int(rng.integers(0, 1_000_000)):06d}"
+
+    line1 = ("IDROU" + surname + "<<" + "<".join(given) + "<" * MRZ_LENGTH)[:MRZ_LENGTH]
+    line2 = build_line2(series + number, "ROU", birth, "M" if male else "F",
+                        expiry, optional_from_cnp(cnp))
+
+    town = str(rng.choice(towns))
+    kind = "Mun" if town == towns[0] else "Or"
+    return {
+        "first_name": "-".join(given),
+        "last_name": surname,
+        "serie": series,
+        "nr": number,
+        "cnp": cnp,
+        "expiration_date": expiry,
+        "place_of_birth": f"Jud.{county} {kind}.{town}",
+        "address": f"{kind}.{town} Str.{rng.choice(STREETS)}",
+        "mrz_line1": line1,
+        "mrz_line2": line2,
+    }
+
+
+def fit_text(text: str, box: Tuple[int, int, int, int], scale: float) -> Tuple[float, int]:
+    """Font scale and thickness for text about 60% of the box height, shrunk to fit its width."""
+    x1, y1, x2, y2 = box
+    (_, cap_height), _ = cv2.getTextSize("H", FONT, 1.0, 2)
+    font_scale = 0.6 * (y2 - y1) * scale / cap_height
+    (width, _), _ = cv2.getTextSize(text, FONT, font_scale, 2)
+    font_scale *= min(1.0, 0.95 * (x2 - x1) * scale / width)
+    return font_scale, max(1, int(round(1.6 * font_scale)))
+
+
+def draw_field(card: np.ndarray, text: str, box: Tuple[int, int, int, int], scale: float):
+    x1, y1, x2, y2 = box
+    font_scale, thickness = fit_text(text, box, scale)
+    (_, cap_height), _ = cv2.getTextSize("H", FONT, font_scale, thickness)
+    top = CROP_TOP + y1
+    baseline = int(round((top + (y2 - y1) * 0.5) * scale + cap_height / 2))
+    cv2.putText(card, text, (int(round(x1 * scale)) + 4, baseline), FONT, font_scale,
+                (25, 25, 30), thickness, cv2.LINE_AA)
+
+
+def draw_mrz_line(card: np.ndarray, text: str, baseline: int, scale: float):
+    """Fixed pitch: every character is centered in its 1/36 of the MRZ width."""
+    (_, cap_height), _ = cv2.getTextSize("H", FONT, 1.0, 2)
+    font_scale = MRZ_CHAR_HEIGHT * scale / cap_height
+    thickness = max(1, int(round(1.8 * font_scale)))
+    pitch = (MRZ_RIGHT - MRZ_LEFT) / MRZ_LENGTH
+    y = int(round((CROP_TOP + baseline) * scale))
+    for i, ch in enumerate(text):
+        (width, _), _ = cv2.getTextSize(ch, FONT, font_scale, thickness)
+        x = int(round((MRZ_LEFT + (i + 0.5) * pitch) * scale - width / 2))
+        cv2.putText(card, ch, (x, y), FONT, font_scale, (20, 20, 20), thickness, cv2.LINE_AA)
+
+
+def render_card(identity: Dict[str, str], rng: np.random.Generator, scale: float) -> np.ndarray:
+    """Clean landscape card (BGR) at scale times the canonical size."""
+    size = (int(round(CARD_WIDTH * scale)), int(round(CARD_HEIGHT * scale)))
+    tint = np.array([228, 232, 236], np.float32) + rng.uniform(-8, 8, 3)
+    card = np.empty((size[1], size[0], 3), np.float32)
+    card[:] = tint
+
+    # Faint security print: wavy lines across the whole card
+    ys, xs = np.mgrid[0:size[1], 0:size[0]].astype(np.float32) / scale
+    phase = rng.uniform(0, 2 * np.pi)
+    waves = np.sin(ys / 9.0 + 6 * np.sin(xs / 70.0 + phase))
+    card -= (14 * (waves > 0.92))[..., None]
+    card = np.clip(card, 0, 255).astype(np.uint8)
+
+    def px(*values):
+        return tuple(int(round(v * scale)) for v in values)
+
+    cv2.putText(card, "ROMANIA", px(330, 70), FONT, 1.3 * scale, (90, 60, 40), max(1, int(2 * scale)), cv2.LINE_AA)
+    cv2.putText(card, "CARTE DE IDENTITATE", px(330, 115), FONT, 0.9 * scale, (90, 60, 40), max(1, int(2 * scale)), cv2.LINE_AA)
+    cv2.rectangle(card, px(40, 140), px(260, 430), (150, 150, 155), -1)
+    cv2.ellipse(card, px(150, 260), px(60, 75), 0, 0, 360, (110, 105, 105), -1)
+    for label, y in (("Nume/Nom/Last name", 170), ("Prenume/Prenom/First name", 245)):
+        cv2.putText(card, label, px(330, y), FONT, 0.45 * scale, (120, 100, 90), 1, cv2.LINE_AA)
+    cv2.putText(card, identity["last_name"], px(330, 205), FONT, 0.8 * scale, (30, 30, 30), max(1, int(2 * scale)), cv2.LINE_AA)
+    cv2.putText(card, identity["first_name"], px(330, 280), FONT, 0.8 * scale, (30, 30, 30), max(1, int(2 * scale)), cv2.LINE_AA)
+
+    boxes = IDCardProcessor.DEFAULT_CROP_BOXES
+    draw_field(card, identity["place_of_birth"], boxes["place_of_birth"], scale)
+    draw_field(card, identity["address"], boxes["address"], scale)
+    draw_mrz_line(card, identity["mrz_line1"], MRZ_BASELINES[0], scale)
+    draw_mrz_line(card, identity["mrz_line2"], MRZ_BASELINES[1], scale)
+    return card
+
+
+def distort(card: np.ndarray, rng: np.random.Generator, limits: Distortions,
+            scale: float) -> Tuple[bytes, Dict[str, float]]:
+    """Apply random distortions below limits; returns the portrait JPEG and what was applied."""
+    params = {
+        "rotation": float(rng.uniform(-limits.rotation, limits.rotation)),
+        "blur": float(rng.uniform(0, limits.blur)),
+        "shadow": float(rng.uniform(0, limits.shadow)),
+        "noise": float(rng.uniform(0, limits.noise)),
+        "jpeg_quality": int(rng.integers(limits.jpeg_quality, 96)),
+    }
+    h, w = card.shape[:2]
+
+    if params["rotation"]:
+        matrix = cv2.getRotationMatrix2D((w / 2, h / 2), params["rotation"], 1.0)
+        card = cv2.warpAffine(card, matrix, (w, h), flags=cv2.INTER_LINEAR,
+                              borderMode=cv2.BORDER_REPLICATE)
+
+    # Shadow: illumination falling off linearly in a random direction
+    angle = rng.uniform(0, 2 * np.pi)
+    ys, xs = np.mgrid[0:h, 0:w].astype(np.float32)
+    ramp = (np.cos(angle) * xs / w + np.sin(angle) * ys / h)
+    ramp = (ramp - ramp.min()) / max(float(np.ptp(ramp)), 1e-6)
+    light = 1.0 - params["shadow"] * ramp
+    out = card.astype(np.float32) * light[..., None]
+
+    if params["blur"] > 0.05:
+        out = cv2.GaussianBlur(out, (0, 0), params["blur"] * scale)
+    if params["noise"] > 0:
+        out += rng.normal(0, params["noise"], out.shape).astype(np.float32)
+    out = np.clip(out, 0, 255).astype(np.uint8)
+
+    # Phone photos of the card are portrait; the processor rotates them back
+    out = cv2.rotate(out, cv2.ROTATE_90_CLOCKWISE)
+    ok, encoded = cv2.imencode(".jpg", out, [cv2.IMWRITE_JPEG_QUALITY, params["jpeg_quality"]])
+    if not ok:
+        raise RuntimeError("JPEG encoding failed")
+    return encoded.tobytes(), params
+
+
+def generate(count: int, seed: int = 0, limits: Distortions = Distortions(),
+             scale: float = 1.5) -> Iterator[SyntheticCard]:
+    """
+    Yield count synthetic cards; the same seed always yields the same cards.
+
+    Args:
+        count: Number of cards
+        seed: Random seed
+        limits: Distortion upper bounds
+        scale: Card width relative to TARGET_WIDTH (1.5 = 1500 px wide)
+    """
+    rng = np.random.default_rng(seed)
+    for _ in range(count):
+        identity = random_identity(rng)
+        image, params = distort(render_card(identity, rng, scale), rng, limits, scale)
+        truth = {key: value for key, value in identity.items() if not key.startswith("mrz_")}
+        yield SyntheticCard(image=image, truth=truth, params=params)
+
+
+def field_names() -> List[str]:
+    return ["first_name", "last_name", "serie", "nr", "cnp", "expiration_date",
+            "place_of_birth", "address"]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cards", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="synthetic_cards")
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    index = []
+    for i, card in enumerate(generate(args.cards, args.seed)):
+        path = os.path.join(args.out, f"card_{i:03d}.jpg")
+        with open(path, "wb") as f:
+            f.write(card.image)
+        index.append({"image": path, "truth": card.truth, "params": card.params})
+    with open(os.path.join(args.out, "truth.json"), "w", encoding="utf-8") as f:
+        json.dump({"seed": args.seed, "distortions": asdict(Distortions()), "cards": index}, f, indent=2)
+    print(f"[✔] {len(index)} cards written to {args.out}")
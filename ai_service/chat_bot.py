@@ -1,45 +1,289 @@
 import asyncio
+import sys
+import threading
+from collections import Counter
 from dotenv import load_dotenv
 import os
 import google.generativeai as genai
 from concurrent.futures import ThreadPoolExecutor
+from chat_keys import NearDuplicateIndex, PromptNormalizer
+from chat_store import ChatResponseStore
+from ttl_cache import NO_EXPIRY, TTLCache
+
+GENERATION_CONFIG = {
+    "candidate_count": 1,
+    "temperature": 1.6,
+    "top_p": 0.3,
+}
 
 class ChatBot:
-    def __init__(self, max_workers=2, max_prompt_len=500):
+    def __init__(self, max_workers=2, max_prompt_len=500,
+                 cache_entries=None, cache_mb=None, cache_ttl=None):
         load_dotenv()
         self.api_ai = os.getenv("API_AI")
         genai.configure(api_key=self.api_ai)
         self.model = genai.GenerativeModel("gemini-2.5-flash")
         self.executor = ThreadPoolExecutor(max_workers=max_workers)
         self.max_prompt_len = max_prompt_len
-        self.cache = {}  # simplu cache, pe prompt
+        # cache LRU pe prompt, marginit ca numar de intrari si ca memorie, cu expirare;
+        # TTLCache are lock propriu, deci e sigur si din thread-urile executorului.
+        # Intrarile sunt (promptul original, raspuns), pe cheia normalizata
+        self.cache = TTLCache(
+            max_entries=cache_entries or int(os.getenv("CHAT_CACHE_MAX_ENTRIES", "1024")),
+            ttl=cache_ttl or float(os.getenv("CHAT_CACHE_TTL", "86400")),
+            max_bytes=(cache_mb or int(os.getenv("CHAT_CACHE_MAX_MB", "16"))) * 1024 * 1024,
+            sizeof=lambda key, entry: sys.getsizeof(key) + sum(map(sys.getsizeof, entry)),
+        )
+        # optional: cache persistent (SQLite), comun tuturor workerilor uvicorn
+        # de pe masina si pastrat intre reporniri
+        self.store = ChatResponseStore.from_env(ttl=self.cache.ttl)
+        # raspunsurile incomplete (taiate sau blocate) expira mai repede
+        self.partial_ttl = float(os.getenv("CHAT_CACHE_PARTIAL_TTL", "300"))
+        # cheia ignora majusculele, diacriticele, punctuatia si spatiile
+        self.normalizer = PromptNormalizer()
+        # optional: potrivire aproximativa (MinHash/LSH) peste pragul dat
+        threshold = float(os.getenv("CHAT_CACHE_NEAR_DUPLICATE", "0"))
+        self.near_duplicates = NearDuplicateIndex(
+            threshold=threshold,
+            max_entries=self.cache.max_entries,
+        ) if threshold > 0 else None
+        self.lookups = 0
+        self.rule_hits = {rule: 0 for rule in self.normalizer.rules() + ["near_duplicate"]}
+        # single-flight: cererile identice simultane asteapta acelasi apel catre LLM
+        self.in_flight = {}  # cheie normalizata -> Task cu textul raspunsului
+        self.waiting = Counter()  # cheie -> cereri care asteapta un apel deja pornit
+        self.upstream_calls = 0
+        self.coalesced = 0
 
-    async def get_response(self, text):
-        if len(text) > self.max_prompt_len:
-            text = text[:self.max_prompt_len]
+    @staticmethod
+    def is_complete(response):
+        try:
+            return response.candidates[0].finish_reason.name == "STOP"
+        except (AttributeError, IndexError):
+            return True
 
-        if text in self.cache:
-            print("Returnez din cache!")
-            return self.cache[text]
+    def start(self):
+        if self.store is not None:
+            self.store.start()
 
-        generation_config = {
-            "candidate_count": 1,
-            "temperature": 1.6,
-            "top_p": 0.3,
+    async def close(self):
+        if self.store is not None:
+            await self.store.close()
+        self.executor.shutdown(wait=False)
+
+    async def cached_response(self, text):
+        """
+        Raspunsul din cache pentru text (sau None), numarand regula care a potrivit.
+        Ordinea: memorie, cache-ul persistent (citit in thread-urile lui), potrivire aproximativa.
+        """
+        self.lookups += 1
+        key = self.normalizer.key(text)
+        entry = self.cache.get(key)
+        if entry is None and self.store is not None:
+            try:
+                stored = await self.store.get(key)
+            except Exception as e:
+                # cache-ul persistent e doar o optimizare; o eroare inseamna miss
+                print(f"Error in cached_response: {e}")
+                stored = None
+            if stored is not None:
+                original, response, ttl = stored
+                entry = (original, response)
+                # in memorie doar cat mai are de trait in store (None = nu expira)
+                self.cache.set(key, entry, ttl=NO_EXPIRY if ttl is None else ttl)
+                if self.near_duplicates is not None:
+                    self.near_duplicates.add(key)
+            else:
+                # un apel identic se poate termina cat timp asteptam store-ul
+                entry = self.cache.peek(key)
+        if entry is not None:
+            rule = self.normalizer.matched_rule(text, entry[0])
+            if rule is not None:
+                self.rule_hits[rule] += 1
+            return entry[1]
+        if self.near_duplicates is None:
+            return None
+        match = self.near_duplicates.query(key)
+        if match is None:
+            return None
+        # lookup-ul a fost deja numarat ca miss mai sus; peek nu il mai numara o data
+        entry = self.cache.peek(match[0])
+        if entry is None:
+            # intrarea a fost evacuata sau a expirat intre timp
+            self.near_duplicates.remove(match[0])
+            return None
+        self.rule_hits["near_duplicate"] += 1
+        return entry[1]
+
+    def store_response(self, text, response):
+        key = self.normalizer.key(text)
+        ttl = None if self.is_complete(response) else self.partial_ttl
+        self.cache.set(key, (text, response.text), ttl=ttl)
+        if self.near_duplicates is not None:
+            self.near_duplicates.add(key)
+        if self.store is not None:
+            self.store.put(key, text, response.text, ttl=ttl)
+
+    def cache_stats(self):
+        rules = {rule: {"hits": hits, "hit_rate": hits / self.lookups if self.lookups else 0.0}
+                 for rule, hits in self.rule_hits.items()}
+        hits = sum(self.rule_hits.values())
+        return {
+            "lookups": self.lookups,
+            "hits": hits,
+            "hit_rate": hits / self.lookups if self.lookups else 0.0,
+            "rules": rules,
+            "cache": self.cache.stats(),
+            "persistent": self.store.stats() if self.store is not None else None,
+            "near_duplicates": self.near_duplicates.stats() if self.near_duplicates else None,
+            "single_flight": {
+                "in_flight": len(self.in_flight),
+                "upstream_calls": self.upstream_calls,
+                "coalesced": self.coalesced,
+            },
         }
 
+    def start_flight(self, key, coro):
+        self.upstream_calls += 1
+        flight = asyncio.ensure_future(coro)
+        self.in_flight[key] = flight
+
+        def done(f):
+            if self.in_flight.get(key) is f:
+                del self.in_flight[key]
+            if not f.cancelled():
+                # eroarea a fost transmisa celor care asteptau; nu o mai raporta
+                f.exception()
+
+        flight.add_done_callback(done)
+        return flight
+
+    async def join_flight(self, key, flight):
+        # rezultatul (sau eroarea) cererii identice deja pornite
+        print("Astept raspunsul deja cerut!")
+        self.coalesced += 1
+        self.waiting[key] += 1
+        try:
+            return await asyncio.shield(flight)
+        finally:
+            self.waiting[key] -= 1
+            if not self.waiting[key]:
+                del self.waiting[key]
+
+    async def warm_up(self):
+        # deschide conexiunea (si sesiunea TLS) catre API inainte de primul mesaj
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(
+            self.executor,
+            lambda: self.model.count_tokens("salut")
+        )
+
+    async def generate(self, text):
         try:
             loop = asyncio.get_event_loop()
             response = await loop.run_in_executor(
                 self.executor,
                 lambda: self.model.generate_content(
                     text,
-                    generation_config=generation_config
+                    generation_config=GENERATION_CONFIG
                 )
             )
-            self.cache[text] = response.text
+            self.store_response(text, response)
             print(response.text)
             return response.text
         except Exception as e:
             print(f"Error in get_response: {e}")
             raise e
+
+    async def get_response(self, text):
+        if len(text) > self.max_prompt_len:
+            text = text[:self.max_prompt_len]
+
+        key = self.normalizer.key(text)
+        flight = self.in_flight.get(key)
+        if flight is None:
+            cached = await self.cached_response(text)
+            if cached is not None:
+                print("Returnez din cache!")
+                return cached
+            # cached_response asteapta store-ul; intre timp o cerere identica poate porni apelul
+            flight = self.in_flight.get(key)
+        if flight is not None:
+            return await self.join_flight(key, flight)
+        # shield: daca cererea care a pornit apelul renunta, ceilalti primesc totusi raspunsul
+        return await asyncio.shield(self.start_flight(key, self.generate(text)))
+
+    async def stream_response(self, text):
+        """
+        Ca get_response, dar produce textul pe bucati, pe masura ce vine de la LLM.
+        Stream-ul este consumat intr-un thread din executor; raspunsul complet
+        ajunge in cache doar daca stream-ul a fost citit pana la capat.
+        Cererile identice simultane primesc raspunsul intreg, la final.
+        """
+        if len(text) > self.max_prompt_len:
+            text = text[:self.max_prompt_len]
+
+        key = self.normalizer.key(text)
+        flight = self.in_flight.get(key)
+        if flight is None:
+            cached = await self.cached_response(text)
+            if cached is not None:
+                print("Returnez din cache!")
+                yield cached
+                return
+            # ca in get_response: apelul poate fi pornit cat timp asteptam store-ul
+            flight = self.in_flight.get(key)
+        if flight is not None:
+            yield await self.join_flight(key, flight)
+            return
+
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        stop = threading.Event()
+
+        def consume():
+            try:
+                response = self.model.generate_content(
+                    text,
+                    generation_config=GENERATION_CONFIG,
+                    stream=True
+                )
+                for chunk in response:
+                    if stop.is_set():
+                        # clientul a renuntat; raspunsul partial nu se pune in cache
+                        return None
+                    try:
+                        piece = chunk.text
+                    except ValueError:
+                        # bucata fara text (de ex. doar motivul opririi)
+                        continue
+                    if piece:
+                        loop.call_soon_threadsafe(queue.put_nowait, piece)
+                return response
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, None)
+
+        async def finish():
+            response = await loop.run_in_executor(self.executor, consume)
+            if response is None:
+                raise ConnectionAbortedError("stream abandoned")
+            self.store_response(text, response)
+            return response.text
+
+        flight = self.start_flight(key, finish())
+        try:
+            while True:
+                piece = await queue.get()
+                if piece is None:
+                    break
+                yield piece
+            await asyncio.shield(flight)
+        except Exception as e:
+            print(f"Error in stream_response: {e}")
+            raise e
+        finally:
+            # stream-ul continua doar daca alte cereri il asteapta
+            if not flight.done() and not self.waiting[key]:
+                stop.set()
+                if self.in_flight.get(key) is flight:
+                    del self.in_flight[key]
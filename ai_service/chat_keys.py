@@ -0,0 +1,183 @@
+import threading
+import unicodedata
+import zlib
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+def fold_case(text: str) -> str:
+    return unicodedata.normalize("NFKC", text).casefold()
+
+
+def fold_diacritics(text: str) -> str:
+    # ă â î ș ț (and the cedilla forms ş ţ) decompose into a base letter
+    # and combining marks, which are dropped
+    decomposed = unicodedata.normalize("NFD", text)
+    return unicodedata.normalize(
+        "NFC", "".join(ch for ch in decomposed if unicodedata.category(ch) != "Mn"))
+
+
+def fold_punctuation(text: str) -> str:
+    spaced = "".join(" " if unicodedata.category(ch).startswith("P") else ch for ch in text)
+    return " ".join(spaced.split())
+
+
+class PromptNormalizer:
+    """
+    Cache keys for chat prompts that ignore casing, diacritics, punctuation
+    and spacing.
+
+    The folding steps run in order; each one is a rule. For a hit,
+    matched_rule() names the first step after which the new prompt and the
+    prompt that filled the entry agree, so the hit rate of every rule can
+    be measured.
+    """
+
+    EXACT = "exact"
+    STEPS = (
+        ("case", fold_case),
+        ("diacritics", fold_diacritics),
+        ("punctuation", fold_punctuation),
+    )
+
+    @classmethod
+    def rules(cls) -> List[str]:
+        return [cls.EXACT] + [name for name, _ in cls.STEPS]
+
+    def forms(self, text: str) -> List[str]:
+        """The prompt as it is after each step, starting with the raw text."""
+        forms = [text]
+        for _, step in self.STEPS:
+            forms.append(step(forms[-1]))
+        return forms
+
+    def key(self, text: str) -> str:
+        return self.forms(text)[-1]
+
+    def matched_rule(self, text: str, original: str) -> Optional[str]:
+        """First rule under which text and original are equal (None if no rule)."""
+        for rule, a, b in zip(self.rules(), self.forms(text), self.forms(original)):
+            if a == b:
+                return rule
+        return None
+
+
+class NearDuplicateIndex:
+    """
+    MinHash signatures of character n-grams with LSH banding, to find a
+    cached key that is nearly the same as a new one.
+
+    Two keys share a bucket if any band of their signatures is equal;
+    candidates are accepted when the share of equal signature positions
+    (an estimate of the Jaccard similarity of their n-gram sets) reaches
+    threshold. Keys are kept LRU up to max_entries and should be removed
+    (or are dropped lazily by the caller) once their cache entry is gone.
+    """
+
+    # Mersenne prime for the universal hash family; products stay in int64
+    PRIME = (1 << 31) - 1
+
+    def __init__(self,
+                 threshold: float = 0.8,
+                 num_perm: int = 64,
+                 bands: int = 16,
+                 ngram: int = 3,
+                 max_entries: int = 4096,
+                 seed: int = 1):
+        """
+        Args:
+            threshold: Lowest estimated Jaccard similarity accepted as a match
+            num_perm: Hash functions per signature
+            bands: LSH bands (num_perm must be a multiple)
+            ngram: Characters per shingle
+            max_entries: Keys indexed at most (least recently added dropped)
+            seed: Seed of the hash functions
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.ngram = ngram
+        self.max_entries = max_entries
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, self.PRIME, num_perm, dtype=np.int64)
+        self._b = rng.integers(0, self.PRIME, num_perm, dtype=np.int64)
+        self._signatures: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._buckets: List[Dict[bytes, set]] = [{} for _ in range(bands)]
+        self._lock = threading.Lock()
+        self.queries = 0
+        self.matches = 0
+
+    def shingles(self, key: str) -> List[str]:
+        padded = f" {key} "
+        if len(padded) <= self.ngram:
+            return [padded]
+        return [padded[i:i + self.ngram] for i in range(len(padded) - self.ngram + 1)]
+
+    def signature(self, key: str) -> np.ndarray:
+        hashes = np.array([zlib.crc32(s.encode("utf-8")) for s in set(self.shingles(key))],
+                          dtype=np.int64) % self.PRIME
+        return ((self._a[:, None] * hashes[None, :] + self._b[:, None]) % self.PRIME).min(axis=1)
+
+    def _bands(self, signature: np.ndarray) -> List[bytes]:
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def add(self, key: str):
+        signature = self.signature(key)
+        with self._lock:
+            self._remove(key)
+            self._signatures[key] = signature
+            for bucket, band in zip(self._buckets, self._bands(signature)):
+                bucket.setdefault(band, set()).add(key)
+            while len(self._signatures) > self.max_entries:
+                self._remove(next(iter(self._signatures)))
+
+    def remove(self, key: str):
+        with self._lock:
+            self._remove(key)
+
+    def _remove(self, key: str):
+        signature = self._signatures.pop(key, None)
+        if signature is None:
+            return
+        for bucket, band in zip(self._buckets, self._bands(signature)):
+            keys = bucket.get(band)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del bucket[band]
+
+    def query(self, key: str) -> Optional[Tuple[str, float]]:
+        """The most similar indexed key and its estimated similarity, if above threshold."""
+        signature = self.signature(key)
+        with self._lock:
+            self.queries += 1
+            candidates = set()
+            for bucket, band in zip(self._buckets, self._bands(signature)):
+                candidates |= bucket.get(band, set())
+            candidates.discard(key)
+            best, best_similarity = None, self.threshold
+            for candidate in candidates:
+                similarity = float(np.mean(self._signatures[candidate] == signature))
+                if similarity >= best_similarity:
+                    best, best_similarity = candidate, similarity
+            if best is None:
+                return None
+            self.matches += 1
+            return best, best_similarity
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "entries": len(self._signatures),
+                "threshold": self.threshold,
+                "queries": self.queries,
+                "matches": self.matches,
+            }
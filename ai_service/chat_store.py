@@ -0,0 +1,239 @@
+import asyncio
+import hashlib
+import os
+import random
+import sqlite3
+import threading
+import time
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+
+class ChatResponseStore:
+    """
+    Persistent chat response cache in a SQLite file, shared by every
+    uvicorn worker on the host and kept across restarts.
+
+    The database runs in WAL mode, so readers in all workers proceed while
+    one of them writes. Rows are compact: the key is a 16-byte digest of
+    the normalized prompt, the value the original prompt and the answer in
+    one UTF-8 blob, zlib-compressed when that makes it smaller. Expired rows
+    are never returned and are deleted by compact(), which start() runs
+    periodically (with jitter, so the workers do not all compact at once).
+
+    All SQLite work runs on the store's own threads, each with its own
+    connection; get() is a coroutine and put() returns at once, so the
+    event loop never waits on the disk.
+    """
+
+    RAW = b"\x00"
+    ZLIB = b"\x01"
+    # Shorter values rarely shrink
+    COMPRESS_MIN = 256
+
+    def __init__(self,
+                 path: str,
+                 ttl: Optional[float] = 86400,
+                 max_entries: int = 100_000,
+                 compact_interval: float = 300,
+                 threads: int = 2):
+        """
+        Args:
+            path: SQLite file shared by the workers
+            ttl: Default seconds an entry stays valid (None = no expiry)
+            max_entries: Rows kept at most; compact() drops the ones
+                         closest to expiry beyond that
+            compact_interval: Seconds between background compactions
+            threads: Threads (and connections) doing the SQLite work
+        """
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.compact_interval = compact_interval
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="chat-store")
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.write_errors = 0
+        self.read_errors = 0
+        self.compacted = 0
+        with self._connection() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS chat_cache ("
+                "key BLOB PRIMARY KEY, value BLOB NOT NULL, expires_at INTEGER"
+                ") WITHOUT ROWID"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS chat_cache_expiry ON chat_cache (expires_at)")
+
+    @classmethod
+    def from_env(cls, ttl: Optional[float]) -> Optional["ChatResponseStore"]:
+        """
+        Build a store from CHAT_CACHE_PATH (unset: no persistent cache),
+        CHAT_CACHE_DISK_MAX_ENTRIES and CHAT_CACHE_COMPACT_INTERVAL.
+        """
+        path = os.getenv("CHAT_CACHE_PATH")
+        if not path:
+            return None
+        return cls(
+            path,
+            ttl=ttl,
+            max_entries=int(os.getenv("CHAT_CACHE_DISK_MAX_ENTRIES", "100000")),
+            compact_interval=float(os.getenv("CHAT_CACHE_COMPACT_INTERVAL", "300")),
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=5, isolation_level=None,
+                                 check_same_thread=False)
+            # Only takes effect on a new file (before WAL and the first table);
+            # lets compact() give free pages back
+            db.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            db.execute("PRAGMA journal_mode = WAL")
+            # Durable enough for a cache; a crash loses at most the last writes
+            db.execute("PRAGMA synchronous = NORMAL")
+            self._local.db = db
+            with self._connections_lock:
+                self._connections.append(db)
+        return db
+
+    @staticmethod
+    def make_key(key: str) -> bytes:
+        return hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+
+    @classmethod
+    def encode(cls, original: str, response: str) -> bytes:
+        raw = original.encode("utf-8") + b"\x00" + response.encode("utf-8")
+        if len(raw) >= cls.COMPRESS_MIN:
+            packed = zlib.compress(raw, 6)
+            if len(packed) < len(raw):
+                return cls.ZLIB + packed
+        return cls.RAW + raw
+
+    @classmethod
+    def decode(cls, value: bytes) -> Tuple[str, str]:
+        raw = zlib.decompress(value[1:]) if value[:1] == cls.ZLIB else value[1:]
+        original, _, response = raw.partition(b"\x00")
+        return original.decode("utf-8"), response.decode("utf-8")
+
+    def _get(self, key: str) -> Optional[Tuple[str, str, Optional[float]]]:
+        try:
+            row = self._connection().execute(
+                "SELECT value, expires_at FROM chat_cache WHERE key = ?", (self.make_key(key),)
+            ).fetchone()
+        except sqlite3.Error as e:
+            # Locked or busy under contention between workers: treat as a miss
+            with self._stats_lock:
+                self.read_errors += 1
+                self.misses += 1
+            print(f"Warning: chat cache read failed: {e}")
+            return None
+        hit = row is not None and (row[1] is None or row[1] > time.time())
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if not hit:
+            return None
+        try:
+            original, response = self.decode(row[0])
+        except (zlib.error, UnicodeDecodeError) as e:
+            # A damaged row is a miss, not a failed request
+            with self._stats_lock:
+                self.read_errors += 1
+            print(f"Warning: chat cache entry unreadable: {e}")
+            return None
+        return original, response, None if row[1] is None else row[1] - time.time()
+
+    async def get(self, key: str) -> Optional[Tuple[str, str, Optional[float]]]:
+        """(original prompt, response, seconds left or None) for a normalized key, or None."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self._get, key)
+
+    def _put(self, key: str, original: str, response: str, ttl: Optional[float]):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = int(time.time() + ttl) if ttl is not None else None
+        try:
+            self._connection().execute(
+                "INSERT OR REPLACE INTO chat_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (self.make_key(key), self.encode(original, response), expires_at),
+            )
+            with self._stats_lock:
+                self.writes += 1
+        except sqlite3.Error as e:
+            # A busy or full disk only costs a future hit
+            with self._stats_lock:
+                self.write_errors += 1
+            print(f"Warning: chat cache write failed: {e}")
+
+    def put(self, key: str, original: str, response: str, ttl: Optional[float] = None) -> Future:
+        """Store an entry in the background, for ttl seconds if given (else the store's ttl)."""
+        return self.executor.submit(self._put, key, original, response, ttl)
+
+    def compact(self) -> int:
+        """Delete expired rows and rows beyond max_entries, then return free pages; returns rows deleted."""
+        db = self._connection()
+        deleted = db.execute(
+            "DELETE FROM chat_cache WHERE expires_at IS NOT NULL AND expires_at <= ?",
+            (int(time.time()),),
+        ).rowcount
+        excess = db.execute("SELECT COUNT(*) FROM chat_cache").fetchone()[0] - self.max_entries
+        if excess > 0:
+            # Closest to expiry first; rows that never expire go last
+            deleted += db.execute(
+                "DELETE FROM chat_cache WHERE key IN ("
+                "SELECT key FROM chat_cache ORDER BY expires_at IS NULL, expires_at LIMIT ?)",
+                (excess,)
+            ).rowcount
+        if deleted:
+            db.execute("PRAGMA incremental_vacuum")
+            db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        with self._stats_lock:
+            self.compacted += deleted
+        return deleted
+
+    async def _compact_forever(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.compact_interval * random.uniform(0.5, 1.5))
+            try:
+                await loop.run_in_executor(self.executor, self.compact)
+            except sqlite3.Error as e:
+                print(f"Warning: chat cache compaction failed: {e}")
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._compact_forever())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        # Pending writes finish before the connections close
+        self.executor.shutdown(wait=True)
+        with self._connections_lock:
+            for db in self._connections:
+                db.close()
+            self._connections.clear()
+
+    def stats(self) -> Dict:
+        with self._stats_lock:
+            lookups = self.hits + self.misses
+            return {
+                "path": self.path,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "writes": self.writes,
+                "write_errors": self.write_errors,
+                "read_errors": self.read_errors,
+                "compacted": self.compacted,
+            }
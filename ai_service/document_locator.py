@@ -0,0 +1,193 @@
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+class DocumentLocator:
+    """
+    Finds an ID card in a photo and maps it to a canonical, upright layout.
+
+    Detection runs on a small edge map: the largest convex quadrilateral
+    with a plausible card shape wins. Its confidence combines how parallel
+    its opposite sides are and how close its rectified aspect ratio (mean
+    of opposite side lengths) is to an ID-1 card, so a card photographed
+    at an angle still scores high; how much of the frame it covers only
+    nudges the score.
+    """
+
+    # ID-1 card (85.6 x 54 mm)
+    CARD_ASPECT = 85.6 / 54.0
+    # Angle between opposite sides at which a quadrilateral stops looking
+    # like a card; a few degrees of perspective cost almost nothing
+    MAX_SIDE_ANGLE = np.deg2rad(45.0)
+
+    def __init__(self,
+                 detect_width: int = 400,
+                 min_area_ratio: float = 0.2,
+                 min_confidence: float = 0.6):
+        """
+        Args:
+            detect_width: Width the photo is downsampled to for detection
+            min_area_ratio: Smallest share of the frame a card may cover
+            min_confidence: Detections below this are discarded
+        """
+        self.detect_width = detect_width
+        self.min_area_ratio = min_area_ratio
+        self.min_confidence = min_confidence
+
+    @staticmethod
+    def order_corners(pts: np.ndarray) -> np.ndarray:
+        """Order four points as top-left, top-right, bottom-right, bottom-left."""
+        pts = pts.reshape(4, 2).astype(np.float32)
+        s = pts.sum(axis=1)
+        d = np.diff(pts, axis=1).ravel()
+        return np.array([pts[np.argmin(s)], pts[np.argmin(d)],
+                         pts[np.argmax(s)], pts[np.argmax(d)]], dtype=np.float32)
+
+    @staticmethod
+    def side_angle(a: np.ndarray, b: np.ndarray) -> float:
+        """Angle in radians between two sides, ignoring their direction."""
+        cos = abs(float(np.dot(a, b))) / max(float(np.linalg.norm(a) * np.linalg.norm(b)), 1e-9)
+        return float(np.arccos(min(1.0, cos)))
+
+    def shape_score(self, quad: np.ndarray) -> float:
+        """
+        How card-like a quadrilateral (TL, TR, BR, BL) is, from 0 to 1.
+
+        Perspective keeps opposite sides nearly parallel and leaves the mean
+        of opposite side lengths close to the card's, so both are measured
+        on the quad itself rather than on its bounding rectangle.
+        """
+        tl, tr, br, bl = quad
+        top, bottom, left, right = tr - tl, br - bl, bl - tl, br - tr
+        skew = max(self.side_angle(top, bottom), self.side_angle(left, right))
+        parallelism = max(0.0, 1.0 - (skew / self.MAX_SIDE_ANGLE) ** 2)
+
+        width = (np.linalg.norm(top) + np.linalg.norm(bottom)) / 2
+        height = (np.linalg.norm(left) + np.linalg.norm(right)) / 2
+        if min(width, height) == 0:
+            return 0.0
+        aspect = max(width, height) / min(width, height)
+        aspect_score = max(0.0, 1.0 - abs(aspect - self.CARD_ASPECT) / self.CARD_ASPECT)
+        return float(parallelism * aspect_score)
+
+    def locate(self, img: np.ndarray) -> Optional[Dict]:
+        """
+        Detect the card outline.
+
+        Args:
+            img: BGR or grayscale photo
+
+        Returns:
+            {"quad": 4x2 corners (TL, TR, BR, BL) in img coordinates,
+             "confidence": 0..1}, or None if no plausible card was found
+        """
+        gray = img if img.ndim == 2 else cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        h, w = gray.shape
+        scale = min(1.0, self.detect_width / w)
+        small = cv2.resize(gray, (max(1, int(w * scale)), max(1, int(h * scale))),
+                           interpolation=cv2.INTER_AREA)
+
+        blurred = cv2.GaussianBlur(small, (5, 5), 0)
+        edges = cv2.Canny(blurred, 50, 150)
+        edges = cv2.dilate(edges, np.ones((3, 3), np.uint8))
+
+        contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        frame_area = float(small.shape[0] * small.shape[1])
+
+        best = None
+        for contour in sorted(contours, key=cv2.contourArea, reverse=True)[:5]:
+            area = cv2.contourArea(contour)
+            area_ratio = area / frame_area
+            if area_ratio < self.min_area_ratio:
+                break
+
+            approx = cv2.approxPolyDP(contour, 0.02 * cv2.arcLength(contour, True), True)
+            if len(approx) != 4 or not cv2.isContourConvex(approx):
+                continue
+
+            quad = self.order_corners(approx)
+            # Only breaks near-ties in favour of the larger outline; a card
+            # filling a third of the frame is still a well-framed card
+            coverage = min(1.0, area_ratio / 0.5)
+
+            confidence = self.shape_score(quad) * (0.9 + 0.1 * coverage)
+            if best is None or confidence > best["confidence"]:
+                best = {"quad": quad / scale, "confidence": float(confidence)}
+
+        if best is None or best["confidence"] < self.min_confidence:
+            return None
+        return best
+
+    def card_corners(self, quad: np.ndarray) -> np.ndarray:
+        """
+        Reorder detected corners so the card comes out in the same layout as
+        the fixed crop: a portrait card is rotated 90 degrees counterclockwise.
+        """
+        tl, tr, br, bl = quad
+        width = np.linalg.norm(tr - tl) + np.linalg.norm(br - bl)
+        height = np.linalg.norm(bl - tl) + np.linalg.norm(br - tr)
+        if height > width:
+            return np.array([tr, br, bl, tl], dtype=np.float32)
+        return quad.astype(np.float32)
+
+    @staticmethod
+    def is_upside_down(card: np.ndarray) -> bool:
+        """
+        Orientation check on a small grayscale, rectified card.
+
+        Dark text is isolated with a black-hat filter and smeared horizontally;
+        the two MRZ lines then form rows covering almost the full card width.
+        If more such rows sit in the top 30% than in the bottom 30%, the card
+        is upside down.
+        """
+        kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (9, 5))
+        blackhat = cv2.morphologyEx(card, cv2.MORPH_BLACKHAT, kernel)
+        _, text = cv2.threshold(blackhat, 0, 1, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        text = cv2.morphologyEx(text, cv2.MORPH_CLOSE,
+                                cv2.getStructuringElement(cv2.MORPH_RECT, (15, 1)))
+        long_rows = text.mean(axis=1) > 0.6
+        band = max(1, int(card.shape[0] * 0.3))
+        return np.count_nonzero(long_rows[:band]) > np.count_nonzero(long_rows[-band:])
+
+    def upright_corners(self, img: np.ndarray, quad: np.ndarray,
+                        preview_width: int = 320) -> np.ndarray:
+        """
+        Corners from locate() in card order, turned 180 degrees if the
+        orientation check says the card is upside down.
+        """
+        corners = self.card_corners(quad)
+        gray = img if img.ndim == 2 else cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        preview_size = (preview_width, int(round(preview_width / self.CARD_ASPECT)))
+        preview = self.rectify(gray, corners, preview_size)
+        if self.is_upside_down(preview):
+            corners = np.roll(corners, 2, axis=0)
+        return corners
+
+    def rectify(self, img: np.ndarray, corners: np.ndarray, card_size: Tuple[int, int],
+                region: Optional[Tuple[float, float, float, float]] = None) -> np.ndarray:
+        """
+        Warp the card (or a fractional region of it) to an upright image.
+
+        Args:
+            img: Source photo
+            corners: Card corners (TL, TR, BR, BL), e.g. from upright_corners()
+            card_size: (width, height) of the whole canonical card
+            region: Optional (x1, y1, x2, y2) fractions of the card to keep;
+                    the output is then only that region
+
+        Returns:
+            Warped image
+        """
+        card_w, card_h = card_size
+        x1, y1, x2, y2 = region or (0.0, 0.0, 1.0, 1.0)
+
+        target = np.array([[0, 0], [card_w, 0], [card_w, card_h], [0, card_h]], dtype=np.float32)
+        homography = cv2.getPerspectiveTransform(corners, target)
+
+        # Shift so the requested region starts at the origin, and warp only it
+        shift = np.array([[1, 0, -x1 * card_w], [0, 1, -y1 * card_h], [0, 0, 1]])
+        out_size = (int(round((x2 - x1) * card_w)), int(round((y2 - y1) * card_h)))
+        return cv2.warpPerspective(img, shift @ homography, out_size,
+                                   flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
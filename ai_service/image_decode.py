@@ -0,0 +1,134 @@
+import struct
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+# JPEG start-of-frame markers (baseline, progressive, lossless, arithmetic)
+_JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7,
+                     0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+# Decode reductions OpenCV supports natively (JPEG uses DCT scaling)
+_REDUCED_FLAGS = {
+    True: {1: cv2.IMREAD_GRAYSCALE,
+           2: cv2.IMREAD_REDUCED_GRAYSCALE_2,
+           4: cv2.IMREAD_REDUCED_GRAYSCALE_4,
+           8: cv2.IMREAD_REDUCED_GRAYSCALE_8},
+    False: {1: cv2.IMREAD_COLOR,
+            2: cv2.IMREAD_REDUCED_COLOR_2,
+            4: cv2.IMREAD_REDUCED_COLOR_4,
+            8: cv2.IMREAD_REDUCED_COLOR_8},
+}
+
+
+def image_size(data) -> Optional[Tuple[int, int]]:
+    """
+    Read (width, height) from a JPEG or PNG header without decoding pixels.
+
+    Args:
+        data: Encoded image buffer
+
+    Returns:
+        (width, height), or None if the format is not recognised
+    """
+    buf = memoryview(data).cast("B")
+    if len(buf) >= 24 and bytes(buf[:8]) == b"\x89PNG\r\n\x1a\n":
+        width, height = struct.unpack(">II", buf[16:24])
+        return width, height
+
+    if len(buf) < 4 or buf[0] != 0xFF or buf[1] != 0xD8:
+        return None
+
+    i = 2
+    while i + 9 < len(buf):
+        if buf[i] != 0xFF:
+            return None
+        marker = buf[i + 1]
+        if marker == 0xFF:
+            # Fill byte
+            i += 1
+            continue
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+            i += 2
+            continue
+        length = struct.unpack(">H", buf[i + 2:i + 4])[0]
+        if marker in _JPEG_SOF_MARKERS:
+            height, width = struct.unpack(">HH", buf[i + 5:i + 9])
+            return width, height
+        i += 2 + length
+    return None
+
+
+def choose_reduction(width: int, height: int,
+                     min_width: Optional[int] = None, min_height: Optional[int] = None,
+                     max_pixels: Optional[int] = None) -> int:
+    """
+    Pick the largest decode reduction (1, 2, 4 or 8) that keeps the image
+    at least min_width x min_height, in either orientation (the stored size
+    may be rotated by EXIF orientation on decode). Without a minimum size
+    the image is decoded at full size.
+
+    If the result would still exceed max_pixels, a larger reduction is used.
+
+    Returns:
+        Reduction factor
+
+    Raises:
+        ValueError: If even the largest reduction exceeds max_pixels
+    """
+    factor = 1
+    if min_width is not None and min_height is not None:
+        needed = max(min_width, min_height)
+        for candidate in (2, 4, 8):
+            if min(width, height) // candidate >= needed:
+                factor = candidate
+
+    if max_pixels is not None:
+        while (width // factor) * (height // factor) > max_pixels:
+            if factor == 8:
+                raise ValueError(f"Image too large: {width}x{height} exceeds the "
+                                 f"{max_pixels} pixel budget")
+            factor *= 2
+    return factor
+
+
+def decode_reduced(data, min_width: Optional[int] = None, min_height: Optional[int] = None,
+                   max_pixels: Optional[int] = None,
+                   grayscale: bool = True) -> np.ndarray:
+    """
+    Decode an image at the smallest native reduction that still covers the
+    requested size, optionally straight to grayscale.
+
+    Args:
+        data: Encoded image buffer (bytes, memoryview or 1-D uint8 array)
+        min_width: Minimum decoded width needed downstream (None = full size)
+        min_height: Minimum decoded height needed downstream (None = full size)
+        max_pixels: Reject images whose decoded size would exceed this
+        grayscale: Decode to a single channel
+
+    Returns:
+        Decoded image
+
+    Raises:
+        ValueError: If the data is not a valid image or is over budget
+    """
+    if isinstance(data, np.ndarray):
+        nparr = data.reshape(-1).view(np.uint8)
+    else:
+        nparr = np.frombuffer(data, np.uint8)
+    if nparr.size == 0:
+        raise ValueError("Empty image data")
+
+    size = image_size(nparr)
+    factor = 1
+    if size is not None:
+        factor = choose_reduction(size[0], size[1], min_width, min_height, max_pixels)
+
+    img = cv2.imdecode(nparr, _REDUCED_FLAGS[grayscale][factor])
+    if img is None:
+        raise ValueError("Invalid image data")
+
+    if max_pixels is not None and img.shape[0] * img.shape[1] > max_pixels:
+        raise ValueError(f"Image too large: {img.shape[1]}x{img.shape[0]} exceeds the "
+                         f"{max_pixels} pixel budget")
+    return img
@@ -0,0 +1,137 @@
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from image_decode import decode_reduced, image_size
+
+
+class ImageQualityError(ValueError):
+    """Raised when a photo fails the quality gate before OCR."""
+
+    def __init__(self, report: Dict):
+        self.report = report
+        super().__init__("Image rejected: " + ", ".join(report["reasons"]))
+
+    def __reduce__(self):
+        # Keep the report when the error crosses a process boundary
+        return type(self), (self.report,)
+
+
+class QualityGate:
+    """
+    Cheap checks that reject photos OCR cannot read.
+
+    Every check runs on a copy whose short side is downsampled to
+    analysis_width, so thresholds do not depend on the photo resolution:
+        too_small    the photo has fewer pixels than the crop needs
+        blurry       variance of the Laplacian (sharpness) is too low
+        overexposed  too many pixels are blown out (glare, flash)
+        no_document  too few edges or too little contrast for a card with text
+    """
+
+    TOO_SMALL = "too_small"
+    BLURRY = "blurry"
+    OVEREXPOSED = "overexposed"
+    NO_DOCUMENT = "no_document"
+
+    # Pixels at or above this gray level count as blown out
+    OVEREXPOSED_LEVEL = 250
+
+    def __init__(self,
+                 analysis_width: int = 480,
+                 min_size: Tuple[int, int] = (480, 600),
+                 min_sharpness: float = 60.0,
+                 max_overexposed: float = 0.25,
+                 min_edge_density: float = 0.005,
+                 min_contrast: float = 20.0):
+        """
+        Args:
+            analysis_width: Short side of the image the checks run on
+            min_size: Smallest (short side, long side) of the photo in pixels
+            min_sharpness: Lowest variance of the Laplacian at analysis_width
+            max_overexposed: Highest share of blown-out pixels
+            min_edge_density: Lowest share of edge pixels (Canny)
+            min_contrast: Lowest standard deviation of the gray levels
+        """
+        self.analysis_width = analysis_width
+        self.min_size = min_size
+        self.min_sharpness = min_sharpness
+        self.max_overexposed = max_overexposed
+        self.min_edge_density = min_edge_density
+        self.min_contrast = min_contrast
+
+    def analysis_image(self, img: np.ndarray) -> np.ndarray:
+        gray = img if img.ndim == 2 else cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        h, w = gray.shape
+        # Portrait and landscape photos are analysed at the same scale
+        scale = min(1.0, self.analysis_width / min(h, w))
+        if scale < 1.0:
+            gray = cv2.resize(gray, (max(1, int(w * scale)), max(1, int(h * scale))),
+                              interpolation=cv2.INTER_AREA)
+        return gray
+
+    def check(self, img: np.ndarray, original_size: Optional[Tuple[int, int]] = None) -> Dict:
+        """
+        Run every check on a decoded image.
+
+        Args:
+            img: Decoded BGR or grayscale image (may be a reduced decode)
+            original_size: (width, height) of the full photo, when img is a
+                           preview or a reduced decode; defaults to img's size
+
+        Returns:
+            {"ok": bool, "reasons": [reason codes], "metrics": {...}}
+        """
+        width, height = original_size or (img.shape[1], img.shape[0])
+        gray = self.analysis_image(img)
+
+        sharpness = float(cv2.Laplacian(gray, cv2.CV_32F).var())
+        overexposed = float(np.count_nonzero(gray >= self.OVEREXPOSED_LEVEL)) / gray.size
+        edges = cv2.Canny(gray, 50, 150)
+        edge_density = float(np.count_nonzero(edges)) / edges.size
+        contrast = float(gray.std())
+
+        reasons = []
+        if min(width, height) < self.min_size[0] or max(width, height) < self.min_size[1]:
+            reasons.append(self.TOO_SMALL)
+        if edge_density < self.min_edge_density or contrast < self.min_contrast:
+            reasons.append(self.NO_DOCUMENT)
+        elif sharpness < self.min_sharpness:
+            # A blank frame has no sharpness either; report it only once
+            reasons.append(self.BLURRY)
+        if overexposed > self.max_overexposed:
+            reasons.append(self.OVEREXPOSED)
+
+        return {
+            "ok": not reasons,
+            "reasons": reasons,
+            "metrics": {
+                "width": width,
+                "height": height,
+                "sharpness": round(sharpness, 1),
+                "overexposed": round(overexposed, 4),
+                "edge_density": round(edge_density, 4),
+                "contrast": round(contrast, 1),
+            },
+        }
+
+    def check_bytes(self, data, original_size: Optional[Tuple[int, int]] = None) -> Dict:
+        """
+        Check an encoded image, decoding it at the smallest reduction that
+        still covers analysis_width. Meant for previews: decoding a full
+        12 MP JPEG costs more than the checks themselves.
+
+        Raises:
+            ValueError: If the data is not a valid image
+        """
+        size = original_size or image_size(data)
+        img = decode_reduced(data, self.analysis_width, self.analysis_width, grayscale=True)
+        return self.check(img, size or (img.shape[1], img.shape[0]))
+
+    def require(self, img: np.ndarray) -> Dict:
+        """Like check(), but raise ImageQualityError if any check fails."""
+        report = self.check(img)
+        if not report["ok"]:
+            raise ImageQualityError(report)
+        return report
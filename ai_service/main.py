@@ -1,8 +1,14 @@
-from fastapi import FastAPI, UploadFile, File
+from fastapi import FastAPI, UploadFile, File, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Any
+from typing import Any, AsyncIterator, Optional
+from contextlib import contextmanager
+import asyncio
+import json
+import os
+import time
 
 app = FastAPI(
     title="AI microservice",
@@ -24,20 +30,303 @@ class MessageRequest(BaseModel):
 
 from chat_bot import ChatBot
 from ocr_identitycard import IDCardProcessor
+from image_quality import ImageQualityError
+from ocr_pool import OCRWorkerPool, OCRPoolBusy, OCRPoolUnavailable
+from ocr_cache import OCRResultCache
+from ocr_jobs import OCRJobQueue, OCRQueueFull
+from ocr_timing import NULL_TIMER, OCRInstrumentation, PrometheusSink, RingBufferSink
 chatbot = ChatBot()
-ocr = IDCardProcessor()
+ocr_pool = OCRWorkerPool.from_env()
+# Decodes, checks and keys uploads here; it never OCRs, so it never loads an engine
+ocr = IDCardProcessor(**ocr_pool.processor_kwargs)
+ocr_cache = OCRResultCache.from_env()
+ocr_timing = OCRInstrumentation.from_env()
+OCR_MAX_BATCH = int(os.getenv("OCR_MAX_BATCH", "64"))
+OCR_MAX_UPLOAD_BYTES = int(os.getenv("OCR_MAX_UPLOAD_BYTES", str(20 * 1024 * 1024)))
+UPLOAD_CHUNK = 1024 * 1024
+OCR_JOB_MAX_WAIT = float(os.getenv("OCR_JOB_MAX_WAIT", "30"))
+WARM_UP = os.getenv("WARM_UP", "1") != "0"
+warm_up_state = {"ready": not WARM_UP, "seconds": None, "workers": None, "errors": {}}
+warm_up_task: Optional[asyncio.Task] = None
+
+if ocr_timing is not None and ocr_timing.sink(PrometheusSink) is not None:
+    from prometheus_client import make_asgi_app
+    app.mount("/metrics", make_asgi_app())
+
+@app.on_event("startup")
+async def startup():
+    global warm_up_task
+    ocr_pool.start()
+    ocr_jobs.start()
+    chatbot.start()
+    if WARM_UP:
+        warm_up_task = asyncio.create_task(warm_up())
+
+async def warm_up_step(name, coro):
+    try:
+        return await coro
+    except Exception as e:
+        warm_up_state["errors"][name] = f"{type(e).__name__}: {e}"
+        print(f"Warning: {name} warm-up failed: {e}")
+
+async def warm_up():
+    """
+    Start and warm every OCR worker, prime OpenCV in this process (quality
+    precheck) and open the LLM connection, all at once. /health reports
+    ready afterwards; a failed step is reported but does not block readiness.
+    """
+    start = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    workers, _, _ = await asyncio.gather(
+        warm_up_step("ocr_workers", ocr_pool.warm_up()),
+        warm_up_step("opencv", loop.run_in_executor(None, ocr.quality_gate.check, ocr.synthetic_card())),
+        warm_up_step("chat", chatbot.warm_up()),
+    )
+    warm_up_state["workers"] = workers
+    warm_up_state["seconds"] = round(time.perf_counter() - start, 3)
+    warm_up_state["ready"] = True
+
+@app.on_event("shutdown")
+async def shutdown():
+    if warm_up_task is not None:
+        warm_up_task.cancel()
+    await ocr_jobs.shutdown()
+    await chatbot.close()
+    ocr_pool.shutdown()
+    ocr_cache.close()
+
+@contextmanager
+def ocr_pool_errors():
+    try:
+        yield
+    except OCRPoolBusy as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "1"})
+    except OCRPoolUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+
+def record_timings(timer, result):
+    """Merge the worker's timings into timer and record them; never cached or returned."""
+    timings = result.pop("timings", None) if isinstance(result, dict) else None
+    if ocr_timing is None:
+        return
+    if timings:
+        timer.merge(timings)
+    ocr_timing.record(timer.as_dict())
+
 @app.get("/health")
 async def health():
+    if not warm_up_state["ready"]:
+        raise HTTPException(status_code=503, detail="warming up", headers={"Retry-After": "2"})
     return "salut"
 
+@app.get("/health/warm_up")
+async def health_warm_up():
+    return warm_up_state
+
 @app.post("/chat")
 async def chat(request: MessageRequest):
     print(request.content)
     response = await chatbot.get_response(request.content) 
     return response
 
+@app.post("/chat/stream")
+async def chat_stream(request: MessageRequest, http_request: Request):
+    """
+    The answer as it is generated: NDJSON lines, or Server-Sent Events when
+    the client accepts text/event-stream. Events are {"type": "chunk",
+    "text": ...} followed by {"type": "done"} or {"type": "error", "detail": ...}.
+    """
+    sse = "text/event-stream" in http_request.headers.get("accept", "")
+
+    def encode(event):
+        data = json.dumps(event, ensure_ascii=False)
+        return f"data: {data}\n\n" if sse else data + "\n"
+
+    async def stream():
+        try:
+            async for piece in chatbot.stream_response(request.content):
+                yield encode({"type": "chunk", "text": piece})
+            yield encode({"type": "done"})
+        except Exception as e:
+            yield encode({"type": "error", "detail": f"{type(e).__name__}: {e}"})
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream" if sse else "application/x-ndjson",
+        # Proxies must pass every chunk on instead of buffering the answer
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/chat/cache/stats")
+async def chat_cache_stats():
+    return chatbot.cache_stats()
+
+async def read_upload(chunks: AsyncIterator[bytes], declared: Optional[int]) -> bytearray:
+    """Collect an upload into one buffer, rejecting it as soon as it exceeds OCR_MAX_UPLOAD_BYTES."""
+    too_large = HTTPException(status_code=413, detail=f"image larger than {OCR_MAX_UPLOAD_BYTES} bytes")
+    if declared is not None and declared > OCR_MAX_UPLOAD_BYTES:
+        raise too_large
+    buffer = bytearray()
+    async for chunk in chunks:
+        if len(buffer) + len(chunk) > OCR_MAX_UPLOAD_BYTES:
+            raise too_large
+        buffer += chunk
+    if not buffer:
+        raise HTTPException(status_code=400, detail="empty upload")
+    return buffer
+
+async def upload_chunks(upload: UploadFile) -> AsyncIterator[bytes]:
+    while True:
+        chunk = await upload.read(UPLOAD_CHUNK)
+        if not chunk:
+            return
+        yield chunk
+
+def content_length(request: Request) -> Optional[int]:
+    try:
+        return int(request.headers["content-length"])
+    except (KeyError, ValueError):
+        return None
+
+async def read_image_body(request: Request) -> bytearray:
+    if request.headers.get("content-type", "").startswith("multipart/form-data"):
+        async with request.form() as form:
+            upload = form.get("file")
+            if upload is None or isinstance(upload, str):
+                raise HTTPException(status_code=422, detail='multipart upload needs a "file" field')
+            return await read_upload(upload_chunks(upload), upload.size)
+    return await read_upload(request.stream(), content_length(request))
+
+async def ocr_cache_call(fn, *args):
+    """Run an OCR cache call; with the SQLite store it reads or commits, so in a thread."""
+    if not ocr_cache.persistent:
+        return fn(*args)
+    return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+async def run_ocr(image_data, timer, wait: bool = False) -> dict:
+    """Serve an encoded image from the cache or the worker pool (wait: queue for a pool slot instead of 429)."""
+    with timer.stage("cache"):
+        key = ocr_cache.make_key(image_data, ocr.config_version())
+        result = await ocr_cache_call(ocr_cache.get, key)
+    if result is None:
+        with ocr_pool_errors():
+            try:
+                result = await ocr_pool.process_bytes(image_data, wait=wait)
+            except ImageQualityError as e:
+                raise HTTPException(status_code=422, detail=e.report)
+            except ValueError as e:
+                # Unreadable image or an MRZ that failed its check digits
+                raise HTTPException(status_code=422, detail=str(e))
+        record_timings(timer, result)
+        await ocr_cache_call(ocr_cache.put, key, result)
+    return {"result": str(result)}
+
+async def run_ocr_job(image_data) -> str:
+    """Job handler: like run_ocr, but waits its turn for a pool slot instead of failing with 429."""
+    timer = ocr_timing.timer() if ocr_timing is not None else NULL_TIMER
+    return (await run_ocr(image_data, timer, wait=True))["result"]
+
+ocr_jobs = OCRJobQueue.from_env(run_ocr_job, consumers=ocr_pool.workers)
+
 @app.post("/ocr")
 async def ocr_endpoint(request: MessageRequest):
-    print("ceva")
-    result = ocr.process_id_card_from_base64(request.content)
-    return {"result": str(result)}
\ No newline at end of file
+    timer = ocr_timing.timer() if ocr_timing is not None else NULL_TIMER
+    try:
+        with timer.stage("base64_decode"):
+            image_data = ocr.decode_base64(request.content)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return await run_ocr(image_data, timer)
+
+@app.post("/ocr/upload")
+async def ocr_upload_endpoint(request: Request):
+    """
+    Binary upload: the raw image as the body (image/*, application/octet-stream)
+    or a multipart form with a "file" field. The body is streamed into a single
+    buffer, so memory per request stays close to the image size.
+    """
+    timer = ocr_timing.timer() if ocr_timing is not None else NULL_TIMER
+    with timer.stage("upload"):
+        image_data = await read_image_body(request)
+    return await run_ocr(image_data, timer)
+
+@app.post("/ocr/jobs", status_code=202)
+async def ocr_job_submit(request: Request):
+    """Queue an image (raw body or multipart "file") and return its job ID at once."""
+    image_data = await read_image_body(request)
+    try:
+        job = ocr_jobs.submit(image_data)
+    except OCRQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "1"})
+    return {"job_id": job.id, "status": job.status, "queue_depth": ocr_jobs.queue.qsize()}
+
+@app.get("/ocr/jobs/stats")
+async def ocr_job_stats():
+    return ocr_jobs.stats()
+
+@app.get("/ocr/jobs/{job_id}")
+async def ocr_job_status(job_id: str, wait: float = 0):
+    """Job status; with wait > 0 the request is held until the job finishes (long polling)."""
+    job = await ocr_jobs.wait(job_id, min(max(wait, 0), OCR_JOB_MAX_WAIT))
+    if job is None:
+        raise HTTPException(status_code=404, detail="unknown or expired job")
+    return job.to_dict()
+
+@app.post("/ocr/precheck")
+async def ocr_precheck_endpoint(request: Request, width: Optional[int] = None, height: Optional[int] = None):
+    """
+    Quality gate only: the camera screen sends a small preview (raw body or
+    multipart "file") and, optionally, the full photo's width and height so
+    the resolution check applies to the photo that would be uploaded.
+    """
+    image_data = await read_image_body(request)
+    original_size = (width, height) if width and height else None
+    try:
+        return await asyncio.get_running_loop().run_in_executor(
+            None, ocr.quality_gate.check_bytes, image_data, original_size)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/ocr/cache/stats")
+async def ocr_cache_stats():
+    return ocr_cache.stats()
+
+@app.get("/ocr/pool/stats")
+async def ocr_pool_stats():
+    stats = {"workers": ocr_pool.workers, "in_flight": ocr_pool.in_flight,
+             "max_in_flight": ocr_pool.max_in_flight}
+    if ocr_pool.shared_memory is not None:
+        stats["shared_memory"] = ocr_pool.shared_memory.stats()
+    return stats
+
+@app.get("/ocr/timings")
+async def ocr_timings(recent: int = 20):
+    if ocr_timing is None:
+        return {"enabled": False}
+    report = {"enabled": True, "histograms": ocr_timing.snapshot()}
+    ring = ocr_timing.sink(RingBufferSink)
+    if ring is not None:
+        report["recent"] = ring.recent(recent)
+    return report
+
+@app.post("/ocr/batch")
+async def ocr_batch_endpoint(request: MessageRequest):
+    images = request.content
+    if not isinstance(images, list) or not images:
+        raise HTTPException(status_code=422, detail="content must be a non-empty list of base64 images")
+    if len(images) > OCR_MAX_BATCH:
+        raise HTTPException(status_code=413, detail=f"at most {OCR_MAX_BATCH} images per batch")
+
+    with ocr_pool_errors():
+        batch = ocr_pool.process_base64_batch(images)
+
+    async def stream():
+        async for index, result, error in batch:
+            if error is None:
+                record_timings(ocr_timing.timer() if ocr_timing is not None else NULL_TIMER, result)
+                line = {"index": index, "result": result}
+            else:
+                line = {"index": index, "error": f"{type(error).__name__}: {error}"}
+            yield json.dumps(line, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
\ No newline at end of file
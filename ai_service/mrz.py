@@ -0,0 +1,226 @@
+from itertools import product
+from typing import Dict, List, Optional, Tuple
+
+
+class MRZValidationError(ValueError):
+    """Raised when the machine-readable zone fails its check digits."""
+
+    def __init__(self, report: Dict):
+        self.report = report
+        failed = [name for name, field in report.get("fields", {}).items() if not field["valid"]]
+        reason = report.get("error") or "check digits failed for " + ", ".join(failed)
+        super().__init__(f"MRZ validation failed: {reason}")
+
+
+class MRZParser:
+    """
+    Parser for the two-line (TD2, 36 characters) MRZ of Romanian ID cards.
+
+    Line 1: ID + ROU + SURNAME<<GIVEN<NAMES
+    Line 2: document number (series + number), check, nationality, birth
+            date, check, sex, expiry date, check, optional data (first CNP
+            digit + last six CNP digits), composite check.
+
+    Check digits are validated per ICAO 9303. Common OCR confusions
+    (0/O, 1/I, 8/B, ...) are corrected by character class first, and for
+    alphanumeric fields a small set of substitutions is tried before the
+    field is reported invalid.
+    """
+
+    LINE_LENGTH = 36
+    WEIGHTS = (7, 3, 1)
+
+    # Letter read where a digit is expected, and the other way round
+    TO_DIGIT = {"O": "0", "Q": "0", "D": "0", "I": "1", "L": "1", "B": "8",
+                "S": "5", "Z": "2", "G": "6"}
+    TO_LETTER = {v: k for k, v in (("O", "0"), ("I", "1"), ("B", "8"),
+                                    ("S", "5"), ("Z", "2"), ("G", "6"))}
+
+    # Upper bound on substitution combinations tried per field
+    MAX_CANDIDATES = 64
+
+    # Line 2 layout: name -> (start, end) slices
+    DOCUMENT_NUMBER = (0, 9)
+    DOCUMENT_CHECK = 9
+    NATIONALITY = (10, 13)
+    BIRTH_DATE = (13, 19)
+    BIRTH_CHECK = 19
+    SEX = 20
+    EXPIRY_DATE = (21, 27)
+    EXPIRY_CHECK = 27
+    OPTIONAL = (28, 35)
+    COMPOSITE_CHECK = 35
+
+    @staticmethod
+    def char_value(ch: str) -> int:
+        if ch.isdigit():
+            return int(ch)
+        if "A" <= ch <= "Z":
+            return ord(ch) - ord("A") + 10
+        return 0  # '<' filler
+
+    @classmethod
+    def check_digit(cls, data: str) -> str:
+        total = sum(cls.char_value(ch) * cls.WEIGHTS[i % 3] for i, ch in enumerate(data))
+        return str(total % 10)
+
+    @staticmethod
+    def normalize_line(text: str) -> str:
+        """Uppercase, drop whitespace and map lookalikes of the '<' filler."""
+        text = "".join(text.split()).upper()
+        for lookalike in ("«", "‹", "(", "{", "["):
+            text = text.replace(lookalike, "<")
+        return text
+
+    @classmethod
+    def as_digits(cls, text: str) -> Tuple[str, int]:
+        out = "".join(cls.TO_DIGIT.get(ch, ch) for ch in text)
+        return out, sum(a != b for a, b in zip(text, out))
+
+    @classmethod
+    def as_letters(cls, text: str) -> Tuple[str, int]:
+        out = "".join(cls.TO_LETTER.get(ch, ch) for ch in text)
+        return out, sum(a != b for a, b in zip(text, out))
+
+    @classmethod
+    def candidates(cls, text: str) -> List[str]:
+        """Variants of an alphanumeric field with confusable characters swapped."""
+        options = []
+        for ch in text:
+            alternatives = [ch]
+            if ch in cls.TO_DIGIT:
+                alternatives.append(cls.TO_DIGIT[ch])
+            if ch in cls.TO_LETTER:
+                alternatives.append(cls.TO_LETTER[ch])
+            options.append(alternatives)
+
+        variants = []
+        for combo in product(*options):
+            variants.append("".join(combo))
+            if len(variants) >= cls.MAX_CANDIDATES:
+                break
+        return variants
+
+    def _check_numeric(self, value: str, check: str) -> Dict:
+        value, fixed = self.as_digits(value)
+        check, fixed_check = self.as_digits(check)
+        return {"value": value, "valid": self.check_digit(value) == check,
+                "corrections": fixed + fixed_check}
+
+    def _check_document_number(self, value: str, check: str) -> Dict:
+        # Romanian series are two letters followed by six digits
+        series, fixed_series = self.as_letters(value[:2])
+        number, fixed_number = self.as_digits(value[2:8])
+        check, fixed_check = self.as_digits(check)
+        normalized = series + number + value[8:]
+        corrections = fixed_series + fixed_number + fixed_check
+
+        if self.check_digit(normalized) == check:
+            return {"value": normalized, "valid": True, "corrections": corrections}
+
+        for candidate in self.candidates(value):
+            if not (candidate[:2].isalpha() and candidate[2:8].isdigit()):
+                continue
+            if self.check_digit(candidate) == check:
+                changed = sum(a != b for a, b in zip(value, candidate))
+                return {"value": candidate, "valid": True, "corrections": changed + fixed_check}
+        return {"value": normalized, "valid": False, "corrections": corrections}
+
+    def parse_names(self, line1: str) -> Dict[str, str]:
+        """Split line 1 into last and first name (given names joined with '-')."""
+        names = self.normalize_line(line1)[5:]
+        surname, _, given = names.partition("<<")
+        surname = surname.replace("<", " ").strip()
+        given = "-".join(part for part in given.split("<") if part)
+        return {"last_name": surname, "first_name": given}
+
+    def parse(self, line1: str, line2: str) -> Dict:
+        """
+        Parse and validate both MRZ lines.
+
+        Args:
+            line1: OCR text of the first MRZ line (names)
+            line2: OCR text of the second MRZ line
+
+        Returns:
+            Report dict:
+                valid: True if every check digit passed
+                fields: {name: {"value", "valid", "corrections"}} for
+                        document_number, birth_date, expiry_date, composite
+                data: card fields in the convert_to_json format
+                corrections: total number of corrected characters
+                error: present when the line could not be parsed at all
+        """
+        line2 = self.normalize_line(line2)
+        report = {"valid": False, "fields": {}, "data": {}, "corrections": 0,
+                  "line1": self.normalize_line(line1), "line2": line2}
+
+        if len(line2) < self.LINE_LENGTH:
+            report["error"] = f"line 2 has {len(line2)} of {self.LINE_LENGTH} characters"
+            return report
+        line2 = line2[:self.LINE_LENGTH]
+
+        document = self._check_document_number(
+            line2[slice(*self.DOCUMENT_NUMBER)], line2[self.DOCUMENT_CHECK])
+        birth = self._check_numeric(line2[slice(*self.BIRTH_DATE)], line2[self.BIRTH_CHECK])
+        expiry = self._check_numeric(line2[slice(*self.EXPIRY_DATE)], line2[self.EXPIRY_CHECK])
+        optional, fixed_optional = self.as_digits(line2[slice(*self.OPTIONAL)])
+        composite_check, fixed_composite = self.as_digits(line2[self.COMPOSITE_CHECK])
+        sex, _ = self.as_letters(line2[self.SEX])
+        nationality, _ = self.as_letters(line2[slice(*self.NATIONALITY)])
+
+        composite_data = (document["value"] + self.as_digits(line2[self.DOCUMENT_CHECK])[0] +
+                          birth["value"] + self.as_digits(line2[self.BIRTH_CHECK])[0] +
+                          expiry["value"] + self.as_digits(line2[self.EXPIRY_CHECK])[0] +
+                          optional)
+        composite = {"value": composite_check,
+                     "valid": self.check_digit(composite_data) == composite_check,
+                     "corrections": fixed_optional + fixed_composite}
+
+        report["fields"] = {
+            "document_number": document,
+            "birth_date": birth,
+            "expiry_date": expiry,
+            "composite": composite,
+        }
+        report["valid"] = all(field["valid"] for field in report["fields"].values())
+        report["corrections"] = sum(field["corrections"] for field in report["fields"].values())
+
+        number = document["value"].replace("<", "")
+        report["data"] = {
+            **self.parse_names(line1),
+            "serie": number[:2],
+            "nr": number[2:],
+            "cnp": optional[:1] + birth["value"] + optional[1:],
+            "expiration_date": expiry["value"],
+            "birth_date": birth["value"],
+            "sex": sex,
+            "nationality": nationality,
+        }
+        return report
+
+    def validate(self, line1: str, line2: str) -> Dict:
+        """Like parse(), but raise MRZValidationError if any check fails."""
+        report = self.parse(line1, line2)
+        if not report["valid"]:
+            raise MRZValidationError(report)
+        return report
+
+
+def build_line2(document_number: str, nationality: str, birth_date: str, sex: str,
+                expiry_date: str, optional: str) -> str:
+    """Compose a valid line 2 (used for tests, benchmarks and synthetic cards)."""
+    document_number = (document_number + "<" * 9)[:9]
+    optional = (optional + "<" * 7)[:7]
+    doc = document_number + MRZParser.check_digit(document_number)
+    birth = birth_date + MRZParser.check_digit(birth_date)
+    expiry = expiry_date + MRZParser.check_digit(expiry_date)
+    composite = MRZParser.check_digit(doc + birth + expiry + optional)
+    return doc + nationality + birth + sex + expiry + optional + composite
+
+
+def optional_from_cnp(cnp: str) -> Optional[str]:
+    """Romanian optional data: first CNP digit followed by its last six digits."""
+    if len(cnp) != 13:
+        return None
+    return cnp[0] + cnp[7:]
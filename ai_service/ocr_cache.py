@@ -0,0 +1,136 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+from ttl_cache import TTLCache
+
+
+class OCRResultCache:
+    """
+    Content-addressed cache for IDCardProcessor results.
+
+    Keys are a digest of the image content plus the processor's config
+    version, so changing crop boxes or Tesseract configs invalidates old
+    entries. Results live in a bounded in-memory LRU and, optionally, in a
+    SQLite file so hits survive restarts.
+    """
+
+    # Expired rows are purged from the disk store every N writes
+    PURGE_EVERY = 100
+
+    def __init__(self,
+                 max_entries: int = 256,
+                 ttl: Optional[float] = 3600,
+                 path: Optional[str] = None):
+        """
+        Args:
+            max_entries: Maximum number of results kept in memory
+            ttl: Seconds a result stays valid (None = no expiry)
+            path: Optional SQLite file used as persistent backing store
+        """
+        self.memory = TTLCache(max_entries=max_entries, ttl=ttl)
+        self.ttl = ttl
+        self.path = path
+        self.disk_hits = 0
+        self._writes = 0
+        self._db = None
+        self._db_lock = threading.Lock()
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS ocr_results ("
+                "key TEXT PRIMARY KEY, result TEXT NOT NULL, expires_at REAL)"
+            )
+            self._db.commit()
+            self._purge_expired()
+
+    @classmethod
+    def from_env(cls) -> "OCRResultCache":
+        """Build a cache from OCR_CACHE_SIZE, OCR_CACHE_TTL and OCR_CACHE_PATH."""
+        ttl = float(os.getenv("OCR_CACHE_TTL", "3600"))
+        return cls(
+            max_entries=int(os.getenv("OCR_CACHE_SIZE", "256")),
+            ttl=ttl if ttl > 0 else None,
+            path=os.getenv("OCR_CACHE_PATH") or None,
+        )
+
+    @property
+    def persistent(self) -> bool:
+        return self._db is not None
+
+    @staticmethod
+    def make_key(image, config_version: str) -> str:
+        """
+        Digest of the image content and the processor config version.
+
+        Args:
+            image: Decoded array (pixels and shape are hashed) or an
+                   encoded image buffer (bytes/memoryview)
+            config_version: IDCardProcessor.config_version()
+        """
+        digest = hashlib.blake2b(config_version.encode(), digest_size=20)
+        if isinstance(image, np.ndarray):
+            digest.update(str(image.shape).encode())
+            digest.update(np.ascontiguousarray(image).data)
+        else:
+            digest.update(image)
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, str]]:
+        result = self.memory.get(key)
+        if result is not None or self._db is None:
+            return result
+
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT result, expires_at FROM ocr_results WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or (row[1] is not None and row[1] <= time.time()):
+            return None
+
+        result = json.loads(row[0])
+        self.disk_hits += 1
+        self.memory.set(key, result)
+        return result
+
+    def put(self, key: str, result: Dict[str, str]):
+        self.memory.set(key, result)
+        if self._db is None:
+            return
+
+        expires_at = time.time() + self.ttl if self.ttl is not None else None
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO ocr_results (key, result, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(result, ensure_ascii=False), expires_at),
+            )
+            self._db.commit()
+            self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            self._purge_expired()
+
+    def _purge_expired(self):
+        with self._db_lock:
+            self._db.execute(
+                "DELETE FROM ocr_results WHERE expires_at IS NOT NULL AND expires_at <= ?",
+                (time.time(),),
+            )
+            self._db.commit()
+
+    def stats(self) -> Dict:
+        stats = self.memory.stats()
+        stats["disk_hits"] = self.disk_hits
+        stats["persistent"] = self.persistent
+        return stats
+
+    def close(self):
+        if self._db is not None:
+            with self._db_lock:
+                self._db.close()
+            self._db = None
@@ -0,0 +1,292 @@
+import os
+import shlex
+import threading
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple, Type
+
+import numpy as np
+import pytesseract
+
+try:
+    import tesserocr
+except ImportError:  # optional, falls back to pytesseract
+    tesserocr = None
+
+pytesseract.pytesseract.tesseract_cmd = os.getenv(
+    "TESSERACT_CMD", r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+)
+
+DEFAULT_LANG = "ron"
+
+
+@lru_cache(maxsize=64)
+def parse_tess_config(config: str) -> Tuple[int, Tuple[Tuple[str, str], ...]]:
+    """
+    Parse a pytesseract style config string into a PSM and a set of variables.
+
+    Args:
+        config: Config string, e.g. "--psm 7 -c tessedit_char_whitelist=0123 --oem 3"
+
+    Returns:
+        Tuple (psm, ((variable, value), ...))
+    """
+    tokens = shlex.split(config, posix=False)
+    psm = 3
+    variables: Dict[str, str] = {}
+    last_var = None
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token == "--psm" and i + 1 < len(tokens):
+            psm = int(tokens[i + 1])
+            last_var = None
+            i += 2
+            continue
+        if token == "--oem" and i + 1 < len(tokens):
+            # OEM can only be chosen when the API handle is created
+            last_var = None
+            i += 2
+            continue
+        if token == "-c" and i + 1 < len(tokens):
+            key, _, value = tokens[i + 1].partition("=")
+            variables[key] = value
+            last_var = key
+            i += 2
+            continue
+        if last_var is not None and not token.startswith("-"):
+            # "whitelist= abc" - the space was meant to be part of the value
+            variables[last_var] += " " + token
+        i += 1
+    return psm, tuple(variables.items())
+
+
+def mean_confidence(words: List[Dict]) -> float:
+    """Mean confidence of recognized words, ignoring tesseract's -1 entries."""
+    confs = [w["conf"] for w in words if w["conf"] >= 0]
+    return sum(confs) / len(confs) if confs else 0.0
+
+
+class OCREngine:
+    """
+    Base class for the OCR backends used by IDCardProcessor.
+    """
+
+    name = "base"
+
+    # Mean word confidence (0-100) of a clean read; IDCardProcessor stops
+    # retrying a field at this level when no min_confidence is set
+    good_confidence = 80.0
+
+    def __init__(self, lang: str = DEFAULT_LANG):
+        self.lang = lang
+
+    def recognize(self, image: np.ndarray, config: str) -> str:
+        """
+        Run recognition on a single (grayscale) image region.
+
+        Args:
+            image: Image region to recognize
+            config: pytesseract style config string (PSM, variables)
+
+        Returns:
+            Raw recognized text
+        """
+        raise NotImplementedError
+
+    def recognize_words(self, image: np.ndarray, config: str) -> List[Dict]:
+        """
+        Run recognition once and return every word with its bounding box.
+
+        Args:
+            image: Image to recognize
+            config: pytesseract style config string (PSM, variables)
+
+        Returns:
+            List of dicts with keys text, left, top, width, height, conf
+        """
+        raise NotImplementedError
+
+    def recognize_with_confidence(self, image: np.ndarray, config: str) -> Tuple[str, float]:
+        """
+        Run recognition and return the text with its mean word confidence.
+
+        Args:
+            image: Image region to recognize
+            config: pytesseract style config string (PSM, variables)
+
+        Returns:
+            Tuple (text, confidence 0..100; 0 when nothing was recognized)
+        """
+        words = self.recognize_words(image, config)
+        return " ".join(w["text"].strip() for w in words), mean_confidence(words)
+
+    def warm_up(self):
+        """Load models up front so the first real request does not pay for it."""
+        self.recognize(np.full((32, 32), 255, dtype=np.uint8), "--psm 7")
+
+    def close(self):
+        """Release any resources held by the engine."""
+
+
+class PytesseractEngine(OCREngine):
+    """
+    Fallback engine: spawns the tesseract executable once per call.
+    """
+
+    name = "pytesseract"
+
+    def recognize(self, image: np.ndarray, config: str) -> str:
+        return pytesseract.image_to_string(image, config=config, lang=self.lang)
+
+    def recognize_words(self, image: np.ndarray, config: str) -> List[Dict]:
+        data = pytesseract.image_to_data(image, config=config, lang=self.lang,
+                                         output_type=pytesseract.Output.DICT)
+        words = []
+        for i, text in enumerate(data["text"]):
+            if not text.strip():
+                continue
+            words.append({
+                "text": text,
+                "left": data["left"][i],
+                "top": data["top"][i],
+                "width": data["width"][i],
+                "height": data["height"][i],
+                "conf": float(data["conf"][i]),
+            })
+        return words
+
+
+class TesserocrEngine(OCREngine):
+    """
+    In-process engine keeping one warm tesseract API handle per instance.
+
+    The traineddata is loaded once; PSM and variables such as
+    tessedit_char_whitelist are set on every call.
+    """
+
+    name = "tesserocr"
+
+    def __init__(self, lang: str = DEFAULT_LANG, path: Optional[str] = None):
+        super().__init__(lang)
+        if tesserocr is None:
+            raise RuntimeError("tesserocr is not installed")
+        kwargs = {"lang": lang}
+        if path:
+            kwargs["path"] = path
+        self._api = tesserocr.PyTessBaseAPI(**kwargs)
+        self._lock = threading.Lock()
+        self._set_variables = set()
+
+    def _configure(self, config: str):
+        psm, variables = parse_tess_config(config)
+        self._api.SetPageSegMode(psm)
+
+        # Variables persist on the handle, reset the ones this call does not use
+        current = set()
+        for key, value in variables:
+            self._api.SetVariable(key, value)
+            current.add(key)
+        for key in self._set_variables - current:
+            self._api.SetVariable(key, "")
+        self._set_variables = current
+
+    def _set_image(self, image: np.ndarray):
+        image = np.ascontiguousarray(image)
+        if image.ndim == 3:
+            height, width, channels = image.shape
+        else:
+            height, width = image.shape
+            channels = 1
+        self._api.SetImageBytes(image.tobytes(), width, height, channels, width * channels)
+
+    def recognize(self, image: np.ndarray, config: str) -> str:
+        with self._lock:
+            self._configure(config)
+            self._set_image(image)
+            return self._api.GetUTF8Text()
+
+    def recognize_with_confidence(self, image: np.ndarray, config: str) -> Tuple[str, float]:
+        with self._lock:
+            self._configure(config)
+            self._set_image(image)
+            text = self._api.GetUTF8Text()
+            confidence = float(self._api.MeanTextConf()) if text.strip() else 0.0
+        return text, max(confidence, 0.0)
+
+    def recognize_words(self, image: np.ndarray, config: str) -> List[Dict]:
+        level = tesserocr.RIL.WORD
+        words = []
+        with self._lock:
+            self._configure(config)
+            self._set_image(image)
+            self._api.Recognize()
+            iterator = self._api.GetIterator()
+            if iterator is None:
+                return words
+            for word in tesserocr.iterate_level(iterator, level):
+                text = word.GetUTF8Text(level)
+                box = word.BoundingBox(level)
+                if not text or not text.strip() or box is None:
+                    continue
+                x1, y1, x2, y2 = box
+                words.append({
+                    "text": text,
+                    "left": x1,
+                    "top": y1,
+                    "width": x2 - x1,
+                    "height": y2 - y1,
+                    "conf": float(word.Confidence(level)),
+                })
+        return words
+
+    def close(self):
+        with self._lock:
+            self._api.End()
+
+
+ENGINES = {
+    PytesseractEngine.name: PytesseractEngine,
+    TesserocrEngine.name: TesserocrEngine,
+}
+
+
+def create_engine(backend: Optional[str] = None, lang: str = DEFAULT_LANG) -> OCREngine:
+    """
+    Create an OCR engine.
+
+    Args:
+        backend: "tesserocr", "pytesseract" or "auto" (default, or OCR_ENGINE env var).
+                 "auto" prefers the in-process engine and falls back to pytesseract.
+        lang: Tesseract language
+
+    Returns:
+        OCREngine instance
+    """
+    backend = backend or os.getenv("OCR_ENGINE", "auto")
+    if backend == "auto":
+        if tesserocr is not None:
+            try:
+                return TesserocrEngine(lang=lang)
+            except Exception as e:
+                print(f"Warning: tesserocr unavailable, using pytesseract: {e}")
+        return PytesseractEngine(lang=lang)
+
+    if backend not in ENGINES:
+        raise ValueError(f"Unknown OCR engine: {backend}")
+    return ENGINES[backend](lang=lang)
+
+
+def engine_class(backend: Optional[str] = None) -> Type[OCREngine]:
+    """
+    The engine class create_engine() builds for backend, without loading it.
+
+    "auto" resolves to tesserocr whenever the module is installed;
+    create_engine() only falls back to pytesseract if the API handle then
+    fails to load.
+    """
+    backend = backend or os.getenv("OCR_ENGINE", "auto")
+    if backend == "auto":
+        return TesserocrEngine if tesserocr is not None else PytesseractEngine
+    if backend not in ENGINES:
+        raise ValueError(f"Unknown OCR engine: {backend}")
+    return ENGINES[backend]
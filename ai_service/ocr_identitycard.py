@@ -1,12 +1,22 @@
 import cv2
 import numpy as np
-import pytesseract
-pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
-from typing import Dict, List, Tuple, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Tuple, Optional
 import json
 import base64
+import hashlib
 import tempfile
 import os
+import re
+import time
+
+from document_locator import DocumentLocator
+from image_decode import decode_reduced
+from image_quality import QualityGate
+from mrz import MRZParser, MRZValidationError, build_line2
+from ocr_engines import (DEFAULT_LANG, OCREngine, create_engine, engine_class,
+                         mean_confidence, parse_tess_config)
+from ocr_timing import OCRInstrumentation, TimerSlot, instrumented
+from template_ocr import MRZ_CHARSET, TemplateRecognizer
 
 
 class IDCardProcessor:
@@ -25,13 +35,24 @@ class IDCardProcessor:
         'x2': 1, 'y2': 0.94
     }
     
+    # Crop region of a located card, as fractions of the card itself (ID-1,
+    # 85.6 x 54 mm). The rows are those of the default region, whose photos
+    # show the full card height; the band is 90% of the card length, centred,
+    # so the card keeps its ID-1 proportions when the band becomes exactly
+    # TARGET_WIDTH x TARGET_HEIGHT
+    DEFAULT_CARD_CROP_REGION = {
+        'x1': 0.05, 'y1': 0.477,
+        'x2': 0.95, 'y2': 0.94
+    }
+    
     # Default Tesseract configurations for each field
     DEFAULT_TESS_CONFIG = {
         "place_of_birth": r'--psm 13 -c tessedit_char_whitelist= abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZăâîșțĂÂÎȘȚ.',
         "address": r'--psm 13 -c tessedit_char_whitelist= abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZăâîșțĂÂÎȘȚ.',
         "nume_full": r'--psm 7 -c tessedit_char_whitelist=AĂÂBCDEFGHIÎJKLMNOPQRSȘTȚUVWXYZ< --oem 3',
         "serie_nr": r'--psm 7 -c tessedit_char_whitelist=0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ< --oem 3',
-        "cnp": r'--psm 7 -c tessedit_char_whitelist=0123456789MF --oem 3'
+        "cnp": r'--psm 7 -c tessedit_char_whitelist=0123456789MF --oem 3',
+        "mrz_line2": r'--psm 7 -c tessedit_char_whitelist=0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ< --oem 3'
     }
     
     # Default crop boxes for each field (x1, y1, x2, y2)
@@ -43,10 +64,72 @@ class IDCardProcessor:
         "cnp": (395, 250, 980, 300),
     }
     
+    # With MRZ validation the whole second MRZ line is read instead of the
+    # serie_nr and cnp boxes, so every check digit is available
+    MRZ_LINE1_FIELD = "nume_full"
+    MRZ_LINE2_FIELD = "mrz_line2"
+    MRZ_LINE2_BOX = (50, 240, 990, 300)
+    MRZ_REPLACED_FIELDS = ("serie_nr", "cnp")
+    
+    # OCR modes: one recognizer call per field, or one call per card
+    OCR_MODE_PER_FIELD = "per_field"
+    OCR_MODE_SINGLE_PASS = "single_pass"
+    
+    # Preprocessing modes: filter the full-resolution crop, or resize to the
+    # target size first and run the filters there with scaled kernels
+    PREPROCESS_FULL = "full"
+    PREPROCESS_FAST = "fast"
+    
+    # Uploads decoding to more pixels than this are rejected (decode budget)
+    DEFAULT_MAX_PIXELS = 40_000_000
+    
+    # Median blur kernel used to estimate the background illumination
+    SHADOW_KSIZE = 61
+    
+    # Single-pass mode: ROIs are stacked into one composite image
+    COMPOSITE_PADDING = 20
+    SINGLE_PASS_CONFIG = r'--psm 6 --oem 3'
+    
+    # Threshold applied to the illumination-normalized image
+    BINARY_THRESHOLD = 80
+    
+    # Weak-field retries: alternate thresholds first, then an alternate PSM
+    RETRY_THRESHOLDS = (100, 60, 120)
+    RETRY_PSM = {7: 13, 13: 7, 6: 7}
+    DEFAULT_RETRY_BUDGET = 1.0
+    
+    # Binarization modes: one fixed threshold, or a stack of hypotheses
+    # (fixed thresholds, Otsu, Sauvola) computed from the same normalized image
+    BINARIZE_SINGLE = "single"
+    BINARIZE_MULTI = "multi"
+    MULTI_THRESHOLDS = (BINARY_THRESHOLD,) + RETRY_THRESHOLDS
+    SAUVOLA_WINDOW = 25
+    SAUVOLA_K = 0.2
+    
+    # MRZ-font fields that template matching may read without the engine
+    TEMPLATE_FIELDS = ("serie_nr", "cnp", "mrz_line2")
+    
     def __init__(self, 
                  crop_boxes: Optional[Dict] = None,
                  tess_config: Optional[Dict] = None,
-                 crop_region: Optional[Dict] = None):
+                 crop_region: Optional[Dict] = None,
+                 card_crop_region: Optional[Dict] = None,
+                 engine: Optional[OCREngine] = None,
+                 ocr_mode: str = OCR_MODE_PER_FIELD,
+                 preprocess_mode: str = PREPROCESS_FULL,
+                 reduced_decode: Optional[bool] = None,
+                 max_pixels: Optional[int] = DEFAULT_MAX_PIXELS,
+                 detect_document: bool = False,
+                 locator: Optional[DocumentLocator] = None,
+                 validate_mrz: bool = False,
+                 min_confidence: Optional[float] = None,
+                 retry_budget: float = DEFAULT_RETRY_BUDGET,
+                 binarization: str = BINARIZE_SINGLE,
+                 template_match: bool = False,
+                 template_recognizer: Optional[TemplateRecognizer] = None,
+                 instrumentation: Optional[OCRInstrumentation] = None,
+                 quality_check: bool = False,
+                 quality_gate: Optional[QualityGate] = None):
         """
         Initialize the ID Card Processor.
         
@@ -54,10 +137,136 @@ class IDCardProcessor:
             crop_boxes: Dictionary of field crop boxes (x1, y1, x2, y2)
             tess_config: Dictionary of Tesseract configurations for each field
             crop_region: Dictionary defining the crop region (x1, y1, x2, y2)
+            card_crop_region: Crop region relative to the located card, used
+                              instead of crop_region when detect_document
+                              finds one
+            engine: OCR engine to use. If None, a warm in-process engine is
+                    created when available (see ocr_engines.create_engine)
+                    on first use, so a processor that only decodes or keys
+                    images never loads one
+            ocr_mode: OCR_MODE_PER_FIELD (one engine call per field) or
+                      OCR_MODE_SINGLE_PASS (one engine call per card)
+            preprocess_mode: PREPROCESS_FULL (filter at full resolution) or
+                             PREPROCESS_FAST (downsample first)
+            reduced_decode: Decode uploads to grayscale at the smallest JPEG
+                            DCT scale that still covers the target size.
+                            None enables it with PREPROCESS_FAST only: its
+                            kernels are scaled to the crop, whereas
+                            PREPROCESS_FULL's are sized for full-resolution
+                            photos
+            max_pixels: Decoded pixel budget; larger uploads are rejected
+            detect_document: Locate the card and rectify it with a homography
+                             instead of relying on the fixed crop region. The
+                             fixed crop is used when detection is not confident
+            locator: DocumentLocator to use when detect_document is enabled
+            validate_mrz: Decode the MRZ with check digit validation. Cards
+                          whose MRZ does not validate raise MRZValidationError
+            min_confidence: Fields recognized with a lower mean confidence
+                            (0-100) are re-read with alternate thresholds and
+                            PSMs. None disables the retries
+            retry_budget: Seconds per card that retries may spend in total
+            binarization: BINARIZE_SINGLE (one fixed threshold) or
+                          BINARIZE_MULTI (each field is read from the best of
+                          several binarizations, see binarize_stack)
+            template_match: Read TEMPLATE_FIELDS by glyph template matching
+                            first; the engine is used when the match is
+                            ambiguous or the MRZ line 2 it forms fails its
+                            check digits
+            template_recognizer: TemplateRecognizer to use with template_match
+            instrumentation: Time every stage and field; results then carry
+                             a "timings" entry. None disables timing
+            quality_check: Reject blurry, overexposed, tiny or empty photos
+                           with ImageQualityError before any OCR work
+            quality_gate: QualityGate to use when quality_check is enabled
         """
+        if ocr_mode not in (self.OCR_MODE_PER_FIELD, self.OCR_MODE_SINGLE_PASS):
+            raise ValueError(f"Unknown OCR mode: {ocr_mode}")
+        if preprocess_mode not in (self.PREPROCESS_FULL, self.PREPROCESS_FAST):
+            raise ValueError(f"Unknown preprocess mode: {preprocess_mode}")
+        if binarization not in (self.BINARIZE_SINGLE, self.BINARIZE_MULTI):
+            raise ValueError(f"Unknown binarization: {binarization}")
+
         self.crop_boxes = crop_boxes or self.DEFAULT_CROP_BOXES.copy()
         self.tess_config = tess_config or self.DEFAULT_TESS_CONFIG.copy()
         self.crop_region = crop_region or self.DEFAULT_CROP_REGION.copy()
+        self.card_crop_region = card_crop_region or self.DEFAULT_CARD_CROP_REGION.copy()
+        self._engine = engine
+        self.ocr_mode = ocr_mode
+        self.preprocess_mode = preprocess_mode
+        if reduced_decode is None:
+            reduced_decode = preprocess_mode == self.PREPROCESS_FAST
+        self.reduced_decode = reduced_decode
+        self.max_pixels = max_pixels
+        self.detect_document = detect_document
+        self.locator = locator or DocumentLocator()
+        self.validate_mrz = validate_mrz
+        self.mrz_parser = MRZParser()
+        self.min_confidence = min_confidence
+        self.retry_budget = retry_budget
+        self.binarization = binarization
+        self.template_match = template_match
+        self.template_recognizer = template_recognizer or (TemplateRecognizer() if template_match else None)
+        if template_match:
+            missing = self.template_recognizer.missing(MRZ_CHARSET)
+            if len(missing) == len(MRZ_CHARSET):
+                print("Warning: no glyph bank, template matching reads nothing "
+                      "(build one with python template_ocr.py FONT)")
+            elif missing:
+                print(f"Warning: glyph bank lacks {missing!r}; fields that may contain "
+                      f"them are read by the engine")
+        self.instrumentation = instrumentation
+        self._timing = TimerSlot()
+        self.quality_check = quality_check
+        self.quality_gate = quality_gate or QualityGate()
+    
+    @property
+    def engine(self) -> OCREngine:
+        if self._engine is None:
+            self._engine = create_engine()
+        return self._engine
+
+    @property
+    def timer(self):
+        """Timer of the card being processed on this thread (a no-op when disabled)."""
+        return self._timing.timer
+    
+    def config_version(self) -> str:
+        """
+        Short digest of every setting that influences the OCR result.
+        
+        Used to invalidate cached results when the configuration changes.
+        
+        Returns:
+            Hex digest string
+        """
+        # Without a loaded engine, key on the one create_engine() would build
+        engine = self._engine if self._engine is not None else engine_class()
+        config = {
+            "crop_boxes": self.crop_boxes,
+            "tess_config": self.tess_config,
+            "crop_region": self.crop_region,
+            "ocr_mode": self.ocr_mode,
+            "preprocess_mode": self.preprocess_mode,
+            "reduced_decode": self.reduced_decode,
+            "max_pixels": self.max_pixels,
+            "detect_document": self.detect_document,
+            "card_crop_region": self.card_crop_region if self.detect_document else None,
+            "locator": vars(self.locator) if self.detect_document else None,
+            "validate_mrz": self.validate_mrz,
+            "min_confidence": self.min_confidence,
+            "retry_budget": self.retry_budget,
+            "binarization": self.binarization,
+            "quality_check": self.quality_check,
+            "quality_gate": vars(self.quality_gate) if self.quality_check else None,
+            "template_bank": self.template_recognizer.version() if self.template_match else None,
+            "engine": engine.name,
+            "lang": self._engine.lang if self._engine is not None else DEFAULT_LANG,
+            "good_confidence": engine.good_confidence,
+            "target": (self.TARGET_WIDTH, self.TARGET_HEIGHT),
+        }
+        # default=repr: custom gates or locators may hold non-JSON settings
+        encoded = json.dumps(config, sort_keys=True, ensure_ascii=False, default=repr).encode()
+        return hashlib.blake2b(encoded, digest_size=8).hexdigest()
     
     def load_image(self, image_path: str) -> np.ndarray:
         """
@@ -77,6 +286,65 @@ class IDCardProcessor:
             raise FileNotFoundError(f"Image not found: {image_path}")
         return img
     
+    def min_decode_size(self) -> Tuple[int, int]:
+        """
+        Smallest (width, height) of the original photo for which the crop
+        region still covers TARGET_WIDTH x TARGET_HEIGHT after rotation.
+        """
+        region_w = self.crop_region['x2'] - self.crop_region['x1']
+        region_h = self.crop_region['y2'] - self.crop_region['y1']
+        # crop_image rotates 90 degrees: the photo height becomes the crop width
+        return (int(np.ceil(self.TARGET_HEIGHT / region_h)),
+                int(np.ceil(self.TARGET_WIDTH / region_w)))
+    
+    def decode_image(self, image_data) -> np.ndarray:
+        """
+        Decode an encoded image (JPG, PNG, ...) held in memory.
+        
+        With reduced_decode enabled the image is decoded straight to
+        grayscale at the smallest reduction (1/2, 1/4, 1/8) that is still
+        large enough for the target size, so a 12 MP photo never becomes a
+        36 MB BGR array.
+        
+        Args:
+            image_data: Encoded image as bytes, bytearray, memoryview or a
+                        1-D uint8 numpy array
+            
+        Returns:
+            Decoded image as numpy array (grayscale if reduced_decode)
+            
+        Raises:
+            ValueError: If the buffer does not contain a valid image or
+                        exceeds max_pixels
+        """
+        if self.reduced_decode:
+            min_width, min_height = self.min_decode_size()
+            return decode_reduced(image_data, min_width, min_height,
+                                  max_pixels=self.max_pixels, grayscale=True)
+        return decode_reduced(image_data, max_pixels=self.max_pixels, grayscale=False)
+    
+    def decode_base64(self, base64_string: str) -> bytes:
+        """
+        Decode a base64 string (optionally a data URL) to raw image bytes.
+        
+        Args:
+            base64_string: Base64 encoded image string
+            
+        Returns:
+            Raw encoded image bytes
+            
+        Raises:
+            ValueError: If base64 string is invalid
+        """
+        try:
+            # Remove data URL prefix if present (e.g., "data:image/jpeg;base64,")
+            comma = base64_string.find(',', 0, 128)
+            if comma != -1:
+                base64_string = base64_string[comma + 1:]
+            return base64.b64decode(base64_string)
+        except Exception as e:
+            raise ValueError(f"Error decoding base64 string: {e}")
+    
     def base64_to_image(self, base64_string: str, output_path: Optional[str] = None) -> str:
         """
         Convert a base64 string to a JPG image file.
@@ -92,21 +360,10 @@ class IDCardProcessor:
             ValueError: If base64 string is invalid
         """
         try:
-            # Remove data URL prefix if present (e.g., "data:image/jpeg;base64,")
-            if ',' in base64_string:
-                base64_string = base64_string.split(',')[1]
-            
-            # Decode base64 string
-            image_data = base64.b64decode(base64_string)
-            
-            # Convert to numpy array
-            nparr = np.frombuffer(image_data, np.uint8)
-            
-            # Decode image
-            img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-            
-            if img is None:
-                raise ValueError("Invalid image data in base64 string")
+            # Full size and colour: the file is the caller's copy of the upload,
+            # not an OCR input, so reduced_decode does not apply
+            img = decode_reduced(self.decode_base64(base64_string),
+                                 max_pixels=self.max_pixels, grayscale=False)
             
             # Generate output path if not provided
             if output_path is None:
@@ -149,13 +406,15 @@ class IDCardProcessor:
         except Exception as e:
             raise ValueError(f"Error converting image to base64: {e}")
     
+    @instrumented
     def process_id_card_from_base64(self, base64_string: str, cleanup_temp: bool = True) -> Dict[str, str]:
         """
-        Process an ID card from a base64 string.
+        Process an ID card from a base64 string, entirely in memory.
         
         Args:
             base64_string: Base64 encoded image string
-            cleanup_temp: Whether to delete the temporary image file after processing
+            cleanup_temp: Kept for backwards compatibility; no temporary
+                          file is written anymore
             
         Returns:
             Dictionary with all processed field values
@@ -163,59 +422,413 @@ class IDCardProcessor:
         Raises:
             ValueError: If base64 string is invalid
         """
-        temp_image_path = None
-        try:
-            # Convert base64 to temporary image file
-            temp_image_path = self.base64_to_image(base64_string)
+        with self.timer.stage("base64_decode"):
+            image_data = self.decode_base64(base64_string)
+        return self.process_id_card_from_bytes(image_data)
+    
+    @instrumented
+    def process_id_card_from_bytes(self, image_data) -> Dict[str, str]:
+        """
+        Process an ID card from an encoded image buffer without touching disk.
+        
+        Args:
+            image_data: Encoded image as bytes, bytearray or memoryview
+            
+        Returns:
+            Dictionary with all processed field values
+            
+        Raises:
+            ValueError: If the buffer does not contain a valid image
+        """
+        with self.timer.stage("decode"):
+            img = self.decode_image(image_data)
+        return self.process_id_card_from_array(img)
+    
+    @instrumented
+    def process_id_card_from_array(self, img: np.ndarray) -> Dict[str, str]:
+        """
+        Process an already decoded ID card image.
+        
+        Args:
+            img: Decoded BGR image
+            
+        Returns:
+            Dictionary with all processed field values
+        """
+        return self.analyze_array(img)["data"]
+    
+    @instrumented
+    def analyze_array(self, img: np.ndarray) -> Dict[str, Any]:
+        """
+        Run the full pipeline and return the result together with diagnostics.
+        
+        Args:
+            img: Decoded BGR (or grayscale) image
+            
+        Returns:
+            Dictionary with:
+                data: processed field values (as returned by process_id_card)
+                fields: per field {"text", "confidence", "attempts"} and,
+                        when fields may be re-read, the winning "binarization"
+                mrz: MRZ validation report (only with validate_mrz)
+                quality: quality gate report (only with quality_check)
+            
+                timings: per stage and field timings (only with instrumentation,
+                         when analyze_array is the outermost call)
+            
+        Raises:
+            ImageQualityError: If quality_check is enabled and the photo
+                               fails the quality gate
+            MRZValidationError: If validate_mrz is enabled and the MRZ check
+                                digits fail even after re-reading the lines
+        """
+        quality = None
+        if self.quality_check:
+            with self.timer.stage("quality"):
+                quality = self.quality_gate.require(img)
+        
+        multi = self.binarization == self.BINARIZE_MULTI
+        retries = multi or self.min_confidence is not None
+        processed_image, enhanced = self.preprocess_variants(img, keep_enhanced=retries)
+        stack = None
+        if multi:
+            with self.timer.stage("binarize_stack"):
+                stack = self.binarize_stack(enhanced)
+            processed_image = stack[0]
+        with self.timer.stage("extract"):
+            fields = self.extract_field_results(processed_image)
+        report = {"fields": fields}
+        if quality is not None:
+            report["quality"] = quality
+        if retries:
+            for field in fields.values():
+                field["binarization"] = f"t{self.BINARY_THRESHOLD}"
+        
+        mrz = None
+        if self.validate_mrz:
+            with self.timer.stage("mrz"):
+                mrz = self.check_mrz(processed_image, fields)
+        
+        if retries:
+            # A valid MRZ is final; its lines are never re-read
+            skip = ()
+            if mrz is not None and mrz["valid"]:
+                skip = (self.MRZ_LINE1_FIELD, self.MRZ_LINE2_FIELD)
+            with self.timer.stage("retry"):
+                retried = self.retry_weak_fields(enhanced, fields, skip, stack)
+            if mrz is not None and not mrz["valid"] and \
+                    {self.MRZ_LINE1_FIELD, self.MRZ_LINE2_FIELD} & set(retried):
+                passes = mrz["passes"] + 1
+                mrz = self.parse_mrz(fields)
+                mrz["passes"] = passes
+        
+        if mrz is not None:
+            report["mrz"] = mrz
+            if not mrz["valid"]:
+                raise MRZValidationError(mrz)
+        
+        extracted_fields = [(name, field["text"]) for name, field in fields.items()]
+        with self.timer.stage("convert"):
+            report["data"] = self.convert_to_json(extracted_fields, mrz)
+        return report
+    
+    def parse_mrz(self, fields: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """Parse the MRZ lines from per-field results."""
+        line1 = fields.get(self.MRZ_LINE1_FIELD, {}).get("text", "")
+        line2 = fields.get(self.MRZ_LINE2_FIELD, {}).get("text", "")
+        return self.mrz_parser.parse(line1, line2)
+    
+    def check_mrz(self, processed_image: np.ndarray,
+                  fields: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Validate the MRZ lines; a valid MRZ is accepted without further passes.
+        
+        In single-pass mode an invalid MRZ gets one dedicated per-line
+        recognition before it is reported invalid.
+        
+        Args:
+            processed_image: Preprocessed image
+            fields: Per-field results (updated in place on a re-read)
+            
+        Returns:
+            MRZ report from MRZParser.parse, with the number of passes used
+        """
+        mrz = self.parse_mrz(fields)
+        mrz["passes"] = 1
+        if mrz["valid"] or self.ocr_mode != self.OCR_MODE_SINGLE_PASS:
+            return mrz
+        
+        for field_name in (self.MRZ_LINE1_FIELD, self.MRZ_LINE2_FIELD):
+            attempts = fields[field_name]["attempts"] if field_name in fields else 0
+            fields[field_name] = self.extract_field_result(processed_image, field_name,
+                                                          use_template=False)
+            fields[field_name]["attempts"] += attempts
+        mrz = self.parse_mrz(fields)
+        mrz["passes"] = 2
+        return mrz
+    
+    @classmethod
+    def alternate_psm(cls, config: str) -> Optional[str]:
+        """The config with its page segmentation mode swapped, if one is defined."""
+        match = re.search(r"--psm\s+(\d+)", config)
+        psm = int(match.group(1)) if match else 7
+        alternate = cls.RETRY_PSM.get(psm)
+        if alternate is None:
+            return None
+        if match is None:
+            return f"--psm {alternate} {config}".strip()
+        return config[:match.start()] + f"--psm {alternate}" + config[match.end():]
+    
+    def retry_variants(self, field_name: str, roi: np.ndarray,
+                       stack_rois: Optional[np.ndarray] = None) -> Iterator[Tuple[str, np.ndarray, str]]:
+        """
+        Candidate (binarization, image, config) triples for re-reading a field.
+        
+        Alternate binarizations come first: the remaining layers of the
+        binarize_stack output when available, otherwise the ROI thresholded
+        at RETRY_THRESHOLDS (lazily, one at a time). The alternate PSM on the
+        primary binarization is tried last.
+        
+        Args:
+            field_name: Field to re-read
+            roi: The field's ROI of the illumination-normalized image
+            stack_rois: The field's ROI of every binarize_stack layer
+        """
+        config = self.tess_config.get(field_name, "--psm 7")
+        if stack_rois is not None:
+            names = self.binarization_names()
+            for index in range(1, len(stack_rois)):
+                yield names[index], stack_rois[index], config
+            primary = stack_rois[0]
+        else:
+            for threshold in self.RETRY_THRESHOLDS:
+                _, binary = cv2.threshold(roi, threshold, 255, cv2.THRESH_BINARY)
+                yield f"t{threshold}", binary, config
+            _, primary = cv2.threshold(roi, self.BINARY_THRESHOLD, 255, cv2.THRESH_BINARY)
+        
+        alternate = self.alternate_psm(config)
+        if alternate is not None:
+            yield f"t{self.BINARY_THRESHOLD}", primary, alternate
+    
+    def retry_weak_fields(self, enhanced: np.ndarray, fields: Dict[str, Dict[str, Any]],
+                          skip: Iterable[str] = (),
+                          stack: Optional[np.ndarray] = None) -> List[str]:
+        """
+        Re-read fields whose confidence is below min_confidence.
+        
+        Weakest fields go first. Each retry reads only the field's ROI of an
+        alternate binarization (see retry_variants), so the shadow removal is
+        not repeated. A variant replaces the current text only if it is more
+        confident, and a field stops as soon as it reaches min_confidence.
+        Without min_confidence (multi binarization only) the cutoff is the
+        engine's good_confidence, so fields that read cleanly the first time
+        are not retried. No retry starts once retry_budget seconds have passed.
+        
+        Args:
+            enhanced: Illumination-normalized grayscale image at target size
+            fields: Per-field results (updated in place)
+            skip: Field names that must not be retried
+            stack: Optional binarize_stack output to draw candidates from
             
-            # Process the temporary image
-            result = self.process_id_card(temp_image_path)
+        Returns:
+            Names of the fields that were retried
+        """
+        deadline = time.perf_counter() + self.retry_budget
+        target = self.min_confidence if self.min_confidence is not None else self.engine.good_confidence
+        boxes = self.field_boxes()
+        weak = sorted((name for name, field in fields.items()
+                       if name not in skip and field["confidence"] < target),
+                      key=lambda name: fields[name]["confidence"])
+        
+        retried = []
+        for field_name in weak:
+            field = fields[field_name]
+            x1, y1, x2, y2 = boxes[field_name]
+            stack_rois = stack[:, y1:y2, x1:x2] if stack is not None else None
+            variants = self.retry_variants(field_name, enhanced[y1:y2, x1:x2], stack_rois)
+            for binarization, binary, config in variants:
+                if time.perf_counter() >= deadline:
+                    return retried
+                with self.timer.field(field_name):
+                    text, confidence = self.engine.recognize_with_confidence(binary, config)
+                field["attempts"] += 1
+                if field_name not in retried:
+                    retried.append(field_name)
+                if confidence > field["confidence"]:
+                    field["text"] = self.clean_text(text)
+                    field["confidence"] = confidence
+                    field["binarization"] = binarization
+                if field["confidence"] >= target:
+                    break
+        return retried
+    
+    def process_many(self, images: Iterable[Any]) -> Iterator[Dict[str, Any]]:
+        """
+        Process several ID cards, yielding one result per input as it finishes.
+        
+        A failing card does not stop the batch; its error is reported instead.
+        
+        Args:
+            images: Iterable of decoded arrays, encoded image buffers
+                    (bytes/memoryview), base64 strings or file paths
             
-            return result
+        Yields:
+            {"index": i, "result": {...}} or {"index": i, "error": "..."}
+        """
+        for index, image in enumerate(images):
+            try:
+                yield {"index": index, "result": self.process_any(image)}
+            except Exception as e:
+                yield {"index": index, "error": f"{type(e).__name__}: {e}"}
+    
+    def process_any(self, image: Any) -> Dict[str, str]:
+        """
+        Dispatch to the matching process_id_card_* entry point by input type.
+        
+        Args:
+            image: Decoded array, encoded buffer, base64 string or file path
             
-        finally:
-            # Clean up temporary file if requested
-            if cleanup_temp and temp_image_path and os.path.exists(temp_image_path):
-                try:
-                    os.remove(temp_image_path)
-                except Exception as e:
-                    print(f"Warning: Could not delete temporary file {temp_image_path}: {e}")
+        Returns:
+            Dictionary with all processed field values
+        """
+        if isinstance(image, np.ndarray) and image.ndim >= 2:
+            return self.process_id_card_from_array(image)
+        if isinstance(image, (bytes, bytearray, memoryview, np.ndarray)):
+            return self.process_id_card_from_bytes(image)
+        if isinstance(image, str):
+            if len(image) < 4096 and os.path.isfile(image):
+                return self.process_id_card(image)
+            return self.process_id_card_from_base64(image)
+        raise ValueError(f"Unsupported image input: {type(image).__name__}")
+    
+    def synthetic_card(self) -> np.ndarray:
+        """
+        Plain portrait card photo with both MRZ lines where this processor
+        crops them, so every pipeline stage has something to work on.
+        
+        Returns:
+            BGR image
+        """
+        region_h = self.crop_region['y2'] - self.crop_region['y1']
+        height = int(round(self.TARGET_HEIGHT / region_h))
+        top = self.crop_region['y1'] * height
+        card = np.full((height, self.TARGET_WIDTH, 3), 232, np.uint8)
+        lines = ("IDROUPOPESCU<<ANA".ljust(36, "<"),
+                 build_line2("XX123456", "ROU", "900101", "F", "300101", "2123456"))
+        for text, bottom in zip(lines, (self.DEFAULT_CROP_BOXES["nume_full"][3],
+                                        self.MRZ_LINE2_BOX[3])):
+            cv2.putText(card, text, (60, int(top + bottom - 15)), cv2.FONT_HERSHEY_SIMPLEX,
+                        1.0, (20, 20, 20), 2, cv2.LINE_AA)
+        # Photos arrive in portrait; crop_image turns the region back
+        return cv2.rotate(card, cv2.ROTATE_90_CLOCKWISE)
+    
+    def warm_up(self) -> float:
+        """
+        Load the OCR engine and run a synthetic card through the whole
+        pipeline, so the first real scan does not pay for traineddata
+        loading or OpenCV's thread pool and kernel start-up.
+        
+        Returns:
+            Seconds taken
+        """
+        start = time.perf_counter()
+        self.engine.warm_up()
+        try:
+            self.process_id_card_from_array(self.synthetic_card())
+        except ValueError:
+            # The card is not a real identity; every stage still ran
+            pass
+        return time.perf_counter() - start
     
     def crop_image(self, img: np.ndarray) -> np.ndarray:
         """
         Crop the image to the specified region and rotate 90 degrees counterclockwise.
         
+        The region is cut from the unrotated image first, so only the crop is
+        rotated instead of the whole photo.
+        
         Args:
             img: Input image
             
         Returns:
             Cropped and rotated image
         """
-        img_rotated = cv2.rotate(img, cv2.ROTATE_90_COUNTERCLOCKWISE)
-        h, w = img_rotated.shape[:2]
+        # Size of the image after a 90 degree rotation
+        h, w = img.shape[1], img.shape[0]
         
         x1 = int(self.crop_region['x1'] * w)
         y1 = int(self.crop_region['y1'] * h)
         x2 = int(self.crop_region['x2'] * w)
         y2 = int(self.crop_region['y2'] * h)
         
-        return img_rotated[y1:y2, x1:x2]
+        # Rotated (y, x) corresponds to original (x, width - 1 - y)
+        region = img[x1:x2, img.shape[1] - y2:img.shape[1] - y1]
+        return cv2.rotate(region, cv2.ROTATE_90_COUNTERCLOCKWISE)
+    
+    def rectify_crop(self, img: np.ndarray) -> Tuple[Optional[np.ndarray], float]:
+        """
+        Locate the card, fix its orientation and warp the card crop region
+        straight to TARGET_WIDTH x TARGET_HEIGHT.
+        
+        Args:
+            img: Decoded BGR or grayscale photo
+            
+        Returns:
+            Tuple (grayscale crop or None if no confident detection,
+                   source-to-target scale factor of the warp)
+        """
+        detection = self.locator.locate(img)
+        if detection is None:
+            return None, 1.0
+        
+        gray = self.to_grayscale(img)
+        corners = self.locator.upright_corners(gray, detection["quad"])
+        
+        # Canonical card size whose crop region is exactly the target size
+        # (ID-1 proportions with the default card crop region)
+        region = (self.card_crop_region['x1'], self.card_crop_region['y1'],
+                  self.card_crop_region['x2'], self.card_crop_region['y2'])
+        card_size = (self.TARGET_WIDTH / (region[2] - region[0]),
+                     self.TARGET_HEIGHT / (region[3] - region[1]))
+        crop = self.locator.rectify(gray, corners, card_size, region)
+        
+        card_width = np.linalg.norm(corners[1] - corners[0])
+        return crop, card_size[0] / max(card_width, 1.0)
     
     def remove_shadows_and_binarize(self, img_bgr: np.ndarray, 
-                                   ksize: int = 61, 
-                                   threshold: int = 80) -> np.ndarray:
+                                   ksize: int = SHADOW_KSIZE, 
+                                   threshold: int = BINARY_THRESHOLD) -> np.ndarray:
         """
         Remove shadows and binarize the image for better OCR results.
         
         Args:
-            img_bgr: Input BGR image
+            img_bgr: Input BGR (or already grayscale) image
             ksize: Kernel size for median blur (should be odd)
             threshold: Binary threshold value
             
         Returns:
             Binarized grayscale image
         """
-        gray = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2GRAY)
+        enhanced = self.normalize_illumination(img_bgr, ksize)
+        
+        # Binarize
+        _, binary = cv2.threshold(enhanced, threshold, 255, cv2.THRESH_BINARY)
+        
+        return binary
+    
+    def normalize_illumination(self, img_bgr: np.ndarray,
+                               ksize: int = SHADOW_KSIZE) -> np.ndarray:
+        """
+        Flatten the background illumination and boost local contrast.
+        
+        Args:
+            img_bgr: Input BGR (or already grayscale) image
+            ksize: Kernel size for median blur (should be odd)
+            
+        Returns:
+            Enhanced grayscale image, ready to be thresholded
+        """
+        gray = self.to_grayscale(img_bgr)
         
         # Estimate illumination (background)
         bg = cv2.medianBlur(gray, ksize)
@@ -225,12 +838,135 @@ class IDCardProcessor:
         
         # Optional: local contrast to enhance text
         clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-        enhanced = clahe.apply(norm)
+        return clahe.apply(norm)
+    
+    @classmethod
+    def binarization_names(cls) -> List[str]:
+        """Names of the binarize_stack layers, in order."""
+        return [f"t{threshold}" for threshold in cls.MULTI_THRESHOLDS] + ["otsu", "sauvola"]
+    
+    def binarize_stack(self, enhanced: np.ndarray) -> np.ndarray:
+        """
+        Binarize the normalized image several ways at once.
         
-        # Binarize
-        _, binary = cv2.threshold(enhanced, threshold, 255, cv2.THRESH_BINARY)
+        Layers follow binarization_names(): every MULTI_THRESHOLDS value
+        (one broadcast comparison), Otsu, and a Sauvola local threshold
+        whose window mean and deviation come from two box filters. The
+        first layer matches remove_shadows_and_binarize.
         
-        return binary
+        Args:
+            enhanced: Illumination-normalized grayscale image
+            
+        Returns:
+            uint8 array of shape (layers, height, width) with values 0/255
+        """
+        thresholds = np.array(self.MULTI_THRESHOLDS, dtype=np.uint8)
+        stack = np.empty((len(thresholds) + 2,) + enhanced.shape, dtype=np.uint8)
+        np.greater(enhanced, thresholds[:, None, None], out=stack[:len(thresholds)].view(bool))
+        
+        _, stack[len(thresholds)] = cv2.threshold(enhanced, 0, 1,
+                                                  cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        
+        values = enhanced.astype(np.float32)
+        window = (self.SAUVOLA_WINDOW, self.SAUVOLA_WINDOW)
+        mean = cv2.boxFilter(values, -1, window, borderType=cv2.BORDER_REFLECT)
+        sq_mean = cv2.boxFilter(values * values, -1, window, borderType=cv2.BORDER_REFLECT)
+        std = np.sqrt(np.maximum(sq_mean - mean * mean, 0))
+        sauvola = mean * (1 + self.SAUVOLA_K * (std / 128.0 - 1))
+        np.greater(values, sauvola, out=stack[-1].view(bool))
+        
+        stack *= 255
+        return stack
+    
+    @staticmethod
+    def to_grayscale(img: np.ndarray) -> np.ndarray:
+        """Convert a BGR image to grayscale; grayscale input is returned as is."""
+        if img.ndim == 2:
+            return img
+        return cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    
+    @staticmethod
+    def scaled_ksize(ksize: int, scale: float) -> int:
+        """Scale a median blur kernel size, keeping it odd and within OpenCV limits."""
+        scaled = int(round(ksize * scale))
+        scaled = max(3, min(scaled, 255))
+        return scaled if scaled % 2 == 1 else scaled + 1
+    
+    def preprocess_array(self, img: np.ndarray) -> np.ndarray:
+        """
+        Preprocessing pipeline for a decoded image: crop, remove shadows, and resize.
+        
+        In PREPROCESS_FAST mode the crop is converted to grayscale and resized
+        to the target size first, so the median blur, division and CLAHE run on
+        ~0.3 MP instead of the full photo. The blur kernel is scaled by the same
+        factor so the illumination estimate covers the same physical area.
+        
+        With detect_document the crop comes from rectify_crop when the card is
+        found confidently, and from the fixed crop_image otherwise.
+        
+        Args:
+            img: Decoded BGR image
+            
+        Returns:
+            Preprocessed image ready for OCR
+        """
+        return self.preprocess_variants(img)[0]
+    
+    def preprocess_variants(self, img: np.ndarray,
+                            keep_enhanced: bool = False) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """
+        Like preprocess_array, optionally also returning the illumination-
+        normalized image (before thresholding) at the target size, from which
+        weak fields are re-binarized.
+        
+        Args:
+            img: Decoded BGR image
+            keep_enhanced: Also return the normalized grayscale image
+            
+        Returns:
+            Tuple (binarized image, normalized image or None)
+        """
+        size = (self.TARGET_WIDTH, self.TARGET_HEIGHT)
+        
+        if self.detect_document:
+            with self.timer.stage("locate"):
+                rectified, scale = self.rectify_crop(img)
+            if rectified is not None:
+                # Already at the target size; filter there like the fast mode
+                return self._binarize_variants(
+                    rectified, self.scaled_ksize(self.SHADOW_KSIZE, scale), keep_enhanced
+                )
+        
+        with self.timer.stage("crop"):
+            cropped = self.crop_image(img)
+        
+        if self.preprocess_mode == self.PREPROCESS_FAST:
+            h, w = cropped.shape[:2]
+            scale = ((self.TARGET_WIDTH / w) * (self.TARGET_HEIGHT / h)) ** 0.5
+            interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR
+            with self.timer.stage("resize"):
+                small = cv2.resize(self.to_grayscale(cropped), size, interpolation=interpolation)
+            return self._binarize_variants(
+                small, self.scaled_ksize(self.SHADOW_KSIZE, scale), keep_enhanced
+            )
+        
+        with self.timer.stage("normalize"):
+            enhanced = self.normalize_illumination(cropped)
+        with self.timer.stage("binarize"):
+            _, processed = cv2.threshold(enhanced, self.BINARY_THRESHOLD, 255, cv2.THRESH_BINARY)
+        with self.timer.stage("resize"):
+            resized = cv2.resize(processed, size)
+            if keep_enhanced:
+                enhanced = cv2.resize(enhanced, size, interpolation=cv2.INTER_AREA)
+        return resized, enhanced if keep_enhanced else None
+    
+    def _binarize_variants(self, img: np.ndarray, ksize: int,
+                           keep_enhanced: bool) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        with self.timer.stage("normalize"):
+            enhanced = self.normalize_illumination(img, ksize)
+        with self.timer.stage("binarize"):
+            _, binary = cv2.threshold(enhanced, self.BINARY_THRESHOLD, 255, cv2.THRESH_BINARY)
+        return binary, enhanced if keep_enhanced else None
     
     def preprocess_image(self, image_path: str) -> np.ndarray:
         """
@@ -242,11 +978,74 @@ class IDCardProcessor:
         Returns:
             Preprocessed image ready for OCR
         """
-        img = self.load_image(image_path)
-        cropped = self.crop_image(img)
-        processed = self.remove_shadows_and_binarize(cropped)
-        resized = cv2.resize(processed, (self.TARGET_WIDTH, self.TARGET_HEIGHT))
-        return resized
+        return self.preprocess_array(self.load_image(image_path))
+    
+    def field_boxes(self) -> Dict[str, Tuple[int, int, int, int]]:
+        """
+        Crop boxes of the fields that are actually recognized.
+        
+        With MRZ validation the serie_nr and cnp boxes are replaced by one box
+        covering the whole second MRZ line.
+        """
+        if not self.validate_mrz:
+            return self.crop_boxes
+        boxes = {name: box for name, box in self.crop_boxes.items()
+                 if name not in self.MRZ_REPLACED_FIELDS}
+        boxes[self.MRZ_LINE2_FIELD] = self.MRZ_LINE2_BOX
+        return boxes
+    
+    @staticmethod
+    def clean_text(text: str) -> str:
+        return text.strip().replace("\n", " ")
+    
+    def extract_field_result(self, image: np.ndarray, field_name: str,
+                             use_template: bool = True) -> Dict[str, Any]:
+        """
+        Extract text from a specific field using OCR, with its confidence.
+        
+        Args:
+            image: Preprocessed image
+            field_name: Name of the field to extract
+            use_template: Allow the template matching fast path
+            
+        Returns:
+            {"text": cleaned text, "confidence": 0-100, "attempts": 1,
+             "recognizer": "engine" or "template"}
+        """
+        boxes = self.field_boxes()
+        if field_name not in boxes:
+            raise ValueError(f"Unknown field: {field_name}")
+        
+        x1, y1, x2, y2 = boxes[field_name]
+        roi = image[y1:y2, x1:x2]
+        
+        with self.timer.field(field_name):
+            if use_template:
+                matched = self.match_template(roi, field_name)
+                if matched is not None:
+                    return matched
+            
+            config = self.tess_config.get(field_name, "--psm 7")
+            text, confidence = self.engine.recognize_with_confidence(roi, config)
+        
+        return {"text": self.clean_text(text), "confidence": confidence, "attempts": 1,
+                "recognizer": "engine"}
+    
+    def match_template(self, roi: np.ndarray, field_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Template matching fast path for MRZ-font fields.
+        
+        Returns:
+            Field result, or None if template matching is disabled, does not
+            apply to the field or is not confident enough
+        """
+        if not self.template_match or field_name not in self.TEMPLATE_FIELDS:
+            return None
+        matched = self.template_recognizer.recognize(roi, self._field_whitelist(field_name))
+        if matched is None:
+            return None
+        return {"text": matched["text"], "confidence": matched["confidence"], "attempts": 1,
+                "recognizer": "template"}
     
     def extract_field_text(self, image: np.ndarray, field_name: str) -> str:
         """
@@ -259,16 +1058,177 @@ class IDCardProcessor:
         Returns:
             Extracted and cleaned text
         """
-        if field_name not in self.crop_boxes:
-            raise ValueError(f"Unknown field: {field_name}")
+        return self.extract_field_result(image, field_name)["text"]
+    
+    def extract_field_results(self, processed_image: np.ndarray) -> Dict[str, Dict[str, Any]]:
+        """
+        Extract all configured fields with their confidence.
         
-        x1, y1, x2, y2 = self.crop_boxes[field_name]
-        roi = image[y1:y2, x1:x2]
+        Args:
+            processed_image: Output of preprocess_array / preprocess_image
+            
+        Returns:
+            {field_name: {"text", "confidence", "attempts"}}
+        """
+        if self.ocr_mode == self.OCR_MODE_SINGLE_PASS:
+            results = self.extract_field_results_single_pass(processed_image)
+        else:
+            results = {field_name: self.extract_field_result(processed_image, field_name)
+                       for field_name in self.field_boxes()}
+        if self.template_match:
+            self.check_template_reads(processed_image, results)
+        return results
+    
+    def check_template_reads(self, processed_image: np.ndarray,
+                             fields: Dict[str, Dict[str, Any]]):
+        """
+        Keep template reads only if the MRZ line 2 they belong to validates.
         
-        config = self.tess_config.get(field_name, "--psm 7")
-        text = pytesseract.image_to_string(roi, config=config, lang='ron')
+        Line 2 is the mrz_line2 field or, without MRZ validation, rebuilt from
+        serie_nr (document number) and cnp (birth date to composite check);
+        the skipped document check digit is computed, so the composite check
+        still covers the document number. Unless line 2 passes every TD2
+        check digit without corrections, the fields read by template matching
+        are read again by the engine (updated in place), so a glyph matched
+        to the wrong character is never returned at template confidence.
+        """
+        templated = [field_name for field_name in self.TEMPLATE_FIELDS
+                     if fields.get(field_name, {}).get("recognizer") == "template"]
+        if not templated:
+            return
+        if self.MRZ_LINE2_FIELD in fields:
+            line2 = fields[self.MRZ_LINE2_FIELD]["text"]
+        else:
+            document = "".join(fields.get("serie_nr", {}).get("text", "").split()) + "<"
+            # No check digit covers the nationality
+            line2 = (document + MRZParser.check_digit(document) + "ROU" +
+                     "".join(fields.get("cnp", {}).get("text", "").split()))
+        mrz = self.mrz_parser.parse("", line2)
+        if mrz["valid"] and mrz["corrections"] == 0 and len(mrz["line2"]) == MRZParser.LINE_LENGTH:
+            return
+        for field_name in templated:
+            fields[field_name] = self.extract_field_result(processed_image, field_name,
+                                                          use_template=False)
+            fields[field_name]["attempts"] += 1
+    
+    def extract_fields(self, processed_image: np.ndarray) -> List[Tuple[str, str]]:
+        """
+        Extract all configured fields from an already preprocessed image.
         
-        return text.strip().replace("\n", " ")
+        Args:
+            processed_image: Output of preprocess_array / preprocess_image
+            
+        Returns:
+            List of tuples (field_name, extracted_text)
+        """
+        results = self.extract_field_results(processed_image)
+        return [(field_name, field["text"]) for field_name, field in results.items()]
+    
+    def build_composite(self, image: np.ndarray,
+                        boxes: Optional[Dict[str, Tuple[int, int, int, int]]] = None
+                        ) -> Tuple[np.ndarray, Dict[str, Tuple[int, int]]]:
+        """
+        Stack field ROIs vertically into one white-padded image.
+        
+        Args:
+            image: Preprocessed image
+            boxes: Fields to include (default: all of field_boxes())
+            
+        Returns:
+            Tuple (composite image, {field_name: (row_top, row_bottom)})
+        """
+        pad = self.COMPOSITE_PADDING
+        boxes = boxes if boxes is not None else self.field_boxes()
+        widths = [x2 - x1 for x1, _, x2, _ in boxes.values()]
+        heights = [y2 - y1 for _, y1, _, y2 in boxes.values()]
+        
+        composite = np.full((sum(heights) + pad * (len(heights) + 1), max(widths) + 2 * pad),
+                            255, dtype=image.dtype)
+        rows = {}
+        y = pad
+        for field_name, (x1, y1, x2, y2) in boxes.items():
+            roi = image[y1:y2, x1:x2]
+            composite[y:y + roi.shape[0], pad:pad + roi.shape[1]] = roi
+            rows[field_name] = (y, y + roi.shape[0])
+            y += (y2 - y1) + pad
+        
+        return composite, rows
+    
+    def _field_whitelist(self, field_name: str) -> Optional[str]:
+        """The field's tessedit_char_whitelist, if it has one."""
+        _, variables = parse_tess_config(self.tess_config.get(field_name, ""))
+        return dict(variables).get("tessedit_char_whitelist") or None
+    
+    def _apply_whitelist(self, field_name: str, text: str) -> str:
+        """Drop characters the field's tessedit_char_whitelist does not allow."""
+        whitelist = self._field_whitelist(field_name)
+        if not whitelist:
+            return text
+        allowed = set(whitelist) | {" "}
+        return "".join(ch for ch in text if ch in allowed)
+    
+    def extract_fields_single_pass(self, processed_image: np.ndarray) -> List[Tuple[str, str]]:
+        """
+        Extract all fields with a single recognizer call.
+        
+        Args:
+            processed_image: Preprocessed image
+            
+        Returns:
+            List of tuples (field_name, extracted_text)
+        """
+        results = self.extract_field_results_single_pass(processed_image)
+        return [(field_name, field["text"]) for field_name, field in results.items()]
+    
+    def extract_field_results_single_pass(self, processed_image: np.ndarray) -> Dict[str, Dict[str, Any]]:
+        """
+        Extract all fields, with confidences, from a single recognizer call.
+        
+        The ROIs are stacked into one composite image, recognized once, and
+        words are mapped back to fields by the vertical position of their box.
+        Per-field whitelists are applied afterwards; a field's confidence is
+        the mean of its words. Fields read by template matching are left out
+        of the composite.
+        
+        Args:
+            processed_image: Preprocessed image
+            
+        Returns:
+            {field_name: {"text", "confidence", "attempts", "recognizer"}}
+        """
+        boxes = self.field_boxes()
+        matched = {}
+        for field_name, (x1, y1, x2, y2) in boxes.items():
+            with self.timer.field(field_name):
+                result = self.match_template(processed_image[y1:y2, x1:x2], field_name)
+            if result is not None:
+                matched[field_name] = result
+        
+        remaining = {name: box for name, box in boxes.items() if name not in matched}
+        if not remaining:
+            return matched
+        composite, rows = self.build_composite(processed_image, remaining)
+        with self.timer.stage("recognize_composite"):
+            words = self.engine.recognize_words(composite, self.SINGLE_PASS_CONFIG)
+        
+        field_words = {field_name: [] for field_name in rows}
+        for word in words:
+            center_y = word["top"] + word["height"] / 2
+            for field_name, (top, bottom) in rows.items():
+                if top - self.COMPOSITE_PADDING / 2 <= center_y < bottom + self.COMPOSITE_PADDING / 2:
+                    field_words[field_name].append(word)
+                    break
+        
+        results = {}
+        for field_name, words_in_field in field_words.items():
+            words_in_field.sort(key=lambda w: w["left"])
+            text = " ".join(w["text"].strip() for w in words_in_field)
+            results[field_name] = {"text": self._apply_whitelist(field_name, text).strip(),
+                                   "confidence": mean_confidence(words_in_field),
+                                   "attempts": 1,
+                                   "recognizer": "engine"}
+        
+        return {name: matched.get(name) or results[name] for name in boxes}
     
     def extract_all_fields(self, image_path: str) -> List[Tuple[str, str]]:
         """
@@ -280,14 +1240,7 @@ class IDCardProcessor:
         Returns:
             List of tuples (field_name, extracted_text)
         """
-        processed_image = self.preprocess_image(image_path)
-        
-        results = []
-        for field_name in self.crop_boxes.keys():
-            text = self.extract_field_text(processed_image, field_name)
-            results.append((field_name, text))
-        
-        return results
+        return self.extract_fields(self.preprocess_image(image_path))
     
     def _process_full_name(self, text: str) -> Dict[str, str]:
         """Process the full name field to extract first and last names."""
@@ -349,18 +1302,29 @@ class IDCardProcessor:
             "expiration_date": remaining_part[-6:] if remaining_part else ""
         }
     
-    def convert_to_json(self, extracted_fields: List[Tuple[str, str]]) -> Dict[str, str]:
+    def convert_to_json(self, extracted_fields: List[Tuple[str, str]],
+                        mrz: Optional[Dict[str, Any]] = None) -> Dict[str, str]:
         """
         Convert extracted OCR fields to a structured JSON format.
         
         Args:
             extracted_fields: List of tuples (field_name, extracted_text)
+            mrz: Optional valid MRZ report; its decoded values replace the
+                 ad-hoc parsing of the name, series and CNP fields
             
         Returns:
             Dictionary with processed field values
         """
         json_result = {}
         
+        if mrz is not None and mrz["valid"]:
+            data = mrz["data"]
+            json_result.update({key: data[key] for key in
+                                ("first_name", "last_name", "serie", "nr", "cnp", "expiration_date")})
+            extracted_fields = [(name, text) for name, text in extracted_fields
+                                if name not in (self.MRZ_LINE1_FIELD, self.MRZ_LINE2_FIELD)
+                                and name not in self.MRZ_REPLACED_FIELDS]
+        
         for field_name, text in extracted_fields:
             if field_name == "nume_full":
                 json_result.update(self._process_full_name(text))
@@ -378,6 +1342,7 @@ class IDCardProcessor:
         
         return json_result
     
+    @instrumented
     def process_id_card(self, image_path: str) -> Dict[str, str]:
         """
         Complete processing pipeline: extract fields and convert to JSON.
@@ -388,8 +1353,9 @@ class IDCardProcessor:
         Returns:
             Dictionary with all processed field values
         """
-        extracted_fields = self.extract_all_fields(image_path)
-        return self.convert_to_json(extracted_fields)
+        with self.timer.stage("load"):
+            img = self.load_image(image_path)
+        return self.process_id_card_from_array(img)
     
     def draw_crop_grid(self, image_path: str, output_path: str = "id_card_grid.jpg",
                       color: Tuple[int, int, int] = (0, 255, 0), thickness: int = 2):
@@ -408,7 +1374,7 @@ class IDCardProcessor:
         color_image = cv2.cvtColor(processed_image, cv2.COLOR_GRAY2BGR)
         
         # Draw each crop box
-        for label, (x1, y1, x2, y2) in self.crop_boxes.items():
+        for label, (x1, y1, x2, y2) in self.field_boxes().items():
             cv2.rectangle(color_image, (x1, y1), (x2, y2), color, thickness)
             cv2.putText(color_image, label, (x1, y1 - 8),
                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2, cv2.LINE_AA)
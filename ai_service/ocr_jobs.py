@@ -0,0 +1,179 @@
+import asyncio
+import os
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from ocr_timing import Histogram
+from ttl_cache import TTLCache
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class OCRQueueFull(Exception):
+    """Raised when max_queued jobs are already waiting."""
+
+
+class OCRJob:
+    """One submitted image and, once finished, its result or error."""
+
+    __slots__ = ("id", "payload", "status", "result", "error",
+                 "submitted_at", "started_at", "finished_at", "done")
+
+    def __init__(self, payload: Any):
+        self.id = uuid.uuid4().hex
+        self.payload = payload
+        self.status = QUEUED
+        self.result = None
+        self.error: Optional[Dict[str, Any]] = None
+        self.submitted_at = time.monotonic()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.done = asyncio.Event()
+
+    def to_dict(self) -> Dict[str, Any]:
+        info = {"job_id": self.id, "status": self.status}
+        if self.started_at is not None:
+            info["wait_ms"] = round(1000 * (self.started_at - self.submitted_at), 1)
+        if self.finished_at is not None:
+            info["run_ms"] = round(1000 * (self.finished_at - self.started_at), 1)
+        if self.status == DONE:
+            info["result"] = self.result
+        elif self.status == FAILED:
+            info["error"] = self.error
+        return info
+
+
+class OCRJobQueue:
+    """
+    Fire-and-poll OCR: submit() returns a job ID at once, a fixed number of
+    consumer tasks feed the jobs to handler, and finished jobs are kept for
+    result_ttl seconds so clients can fetch them by polling or long-polling.
+
+    Payloads are dropped as soon as a job starts, so a queued image is held
+    once and a finished job only keeps its (small) result.
+    """
+
+    def __init__(self,
+                 handler: Callable[[Any], Awaitable[Any]],
+                 consumers: int = 1,
+                 max_queued: int = 64,
+                 result_ttl: float = 600,
+                 max_results: int = 1024):
+        """
+        Args:
+            handler: Coroutine function run for every payload
+            consumers: Jobs processed at once
+            max_queued: Jobs waiting to start before submit() rejects
+            result_ttl: Seconds a finished job stays retrievable
+            max_results: Finished jobs kept at most (oldest dropped first)
+        """
+        self.handler = handler
+        self.consumers = consumers
+        self.queue: "asyncio.Queue[OCRJob]" = asyncio.Queue(maxsize=max_queued)
+        self.active: Dict[str, OCRJob] = {}
+        self.finished = TTLCache(max_entries=max_results, ttl=result_ttl)
+        self.wait_ms = Histogram()
+        self.run_ms = Histogram()
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self._tasks: List[asyncio.Task] = []
+
+    @classmethod
+    def from_env(cls, handler: Callable[[Any], Awaitable[Any]],
+                 consumers: int) -> "OCRJobQueue":
+        """Build a queue from OCR_JOB_MAX_QUEUED, OCR_JOB_RESULT_TTL and OCR_JOB_MAX_RESULTS."""
+        return cls(
+            handler,
+            consumers=consumers,
+            max_queued=int(os.getenv("OCR_JOB_MAX_QUEUED", "64")),
+            result_ttl=float(os.getenv("OCR_JOB_RESULT_TTL", "600")),
+            max_results=int(os.getenv("OCR_JOB_MAX_RESULTS", "1024")),
+        )
+
+    def start(self):
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._consume()) for _ in range(self.consumers)]
+
+    async def shutdown(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, payload: Any) -> OCRJob:
+        """
+        Queue a payload.
+
+        Raises:
+            OCRQueueFull: If max_queued jobs are already waiting
+        """
+        job = OCRJob(payload)
+        try:
+            self.queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise OCRQueueFull(f"{self.queue.qsize()} OCR jobs already queued") from None
+        self.active[job.id] = job
+        self.submitted += 1
+        return job
+
+    def get(self, job_id: str) -> Optional[OCRJob]:
+        return self.active.get(job_id) or self.finished.get(job_id)
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[OCRJob]:
+        """The job once finished, or as it is after timeout seconds (long polling)."""
+        job = self.get(job_id)
+        if job is not None and timeout > 0 and not job.done.is_set():
+            try:
+                await asyncio.wait_for(job.done.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return job
+
+    async def _consume(self):
+        while True:
+            job = await self.queue.get()
+            job.status = RUNNING
+            job.started_at = time.monotonic()
+            self.wait_ms.observe(1000 * (job.started_at - job.submitted_at))
+            payload, job.payload = job.payload, None
+            try:
+                job.result = await self.handler(payload)
+                job.status = DONE
+                self.completed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                job.status = FAILED
+                job.error = {"status_code": getattr(e, "status_code", 500),
+                             "detail": getattr(e, "detail", f"{type(e).__name__}: {e}")}
+                self.failed += 1
+            finally:
+                job.finished_at = time.monotonic()
+                self.run_ms.observe(1000 * (job.finished_at - job.started_at))
+                self.finished.set(job.id, job)
+                self.active.pop(job.id, None)
+                job.done.set()
+                self.queue.task_done()
+
+    def stats(self) -> Dict[str, Any]:
+        running = sum(1 for job in self.active.values() if job.status == RUNNING)
+        return {
+            "queue_depth": self.queue.qsize(),
+            "max_queued": self.queue.maxsize,
+            "running": running,
+            "consumers": self.consumers,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "wait_ms": self.wait_ms.snapshot(),
+            "run_ms": self.run_ms.snapshot(),
+            "results": self.finished.stats(),
+        }
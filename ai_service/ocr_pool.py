@@ -0,0 +1,442 @@
+import asyncio
+import os
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import resource_tracker
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from image_quality import ImageQualityError
+from ocr_identitycard import IDCardProcessor
+from ocr_shm import SharedImage, SharedSegmentPool, shared_view
+from ocr_timing import OCRInstrumentation
+
+# Per-process processor, created once by the pool initializer
+_processor: Optional[IDCardProcessor] = None
+
+
+def _init_worker(processor_kwargs: Dict):
+    """
+    Pool initializer: build this worker's processor and run a synthetic card
+    through it, so the worker is warm before it takes its first request.
+    """
+    global _processor
+    _processor = IDCardProcessor(**processor_kwargs)
+    try:
+        _processor.warm_up()
+    except Exception as e:
+        print(f"Warning: OCR warm-up failed in worker {os.getpid()}: {e}")
+
+
+def _worker_pid(hold: float) -> int:
+    # Stay busy a moment so the other tasks of a round go to other workers
+    time.sleep(hold)
+    return os.getpid()
+
+
+def _portable_errors(fn, *args):
+    """
+    Call fn and make sure any exception survives pickling back to the parent.
+
+    Some third-party exceptions (e.g. pytesseract's) cannot be unpickled,
+    which would otherwise mark the whole pool as broken.
+    """
+    try:
+        return fn(*args)
+    except ImageQualityError:
+        # Picklable, and callers need its reason codes
+        raise
+    except ValueError as e:
+        raise ValueError(str(e)) from None
+    except Exception as e:
+        raise RuntimeError(f"{type(e).__name__}: {e}") from None
+
+
+def _process_base64(base64_string: str) -> Dict[str, str]:
+    return _portable_errors(_processor.process_id_card_from_base64, base64_string)
+
+
+def _process_bytes(image_data: bytes) -> Dict[str, str]:
+    # The decoder reads the received buffer in place
+    return _portable_errors(_processor.process_id_card_from_bytes, memoryview(image_data))
+
+
+def _process_array(img: np.ndarray) -> Dict[str, str]:
+    return _portable_errors(_processor.process_id_card_from_array, img)
+
+
+def _read_shared(image: SharedImage) -> Dict[str, str]:
+    view = shared_view(image)
+    try:
+        if image.shape is None:
+            return _processor.process_id_card_from_bytes(view)
+        return _processor.process_id_card_from_array(view)
+    finally:
+        # Drop the view so the worker's attachment can be closed later
+        del view
+
+
+def _process_shared(image: SharedImage) -> Dict[str, str]:
+    """Process an image the API process placed in shared memory, reading it in place."""
+    return _portable_errors(_read_shared, image)
+
+
+class OCRPoolBusy(Exception):
+    """Raised when the pool already has max_in_flight requests."""
+
+
+class OCRPoolUnavailable(Exception):
+    """Raised when the pool is not running (not started, or a worker died)."""
+
+
+class OCRWorkerPool:
+    """
+    Runs IDCardProcessor in a ProcessPoolExecutor so OCR never blocks the event loop.
+
+    Each worker process owns its own processor and warm OCR engine. The number
+    of requests admitted at once is bounded; callers beyond that get OCRPoolBusy
+    straight away instead of queueing behind slow scans.
+    """
+
+    def __init__(self,
+                 workers: Optional[int] = None,
+                 max_in_flight: Optional[int] = None,
+                 processor_kwargs: Optional[Dict] = None,
+                 shared_memory: Optional[SharedSegmentPool] = None):
+        """
+        Args:
+            workers: Number of worker processes (default: CPU count)
+            max_in_flight: Requests admitted at once, running or queued
+                           (default: 2 per worker)
+            processor_kwargs: Keyword arguments for each worker's IDCardProcessor
+            shared_memory: Hand images to workers through these recycled
+                           shared memory segments instead of pickling them
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.max_in_flight = max_in_flight or 2 * self.workers
+        self.processor_kwargs = processor_kwargs or {}
+        self.in_flight = 0
+        # Submitters waiting for a slot, first come first served; release()
+        # hands freed slots straight to them
+        self._slot_waiters: Deque[asyncio.Future] = deque()
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.shared_memory = shared_memory
+
+    @classmethod
+    def from_env(cls) -> "OCRWorkerPool":
+        """
+        Build a pool from OCR_WORKERS, OCR_MAX_IN_FLIGHT and the processor
+        settings OCR_MODE, OCR_PREPROCESS, OCR_MAX_PIXELS, OCR_DETECT_DOCUMENT,
+        OCR_VALIDATE_MRZ, OCR_MIN_CONFIDENCE, OCR_RETRY_BUDGET, OCR_BINARIZATION
+        OCR_TEMPLATE_MATCH and OCR_QUALITY_CHECK. With OCR_TIMING set, workers
+        attach per-stage timings to their results. OCR_SHARED_MEMORY=1 hands
+        images over in shared memory (OCR_SHM_CACHE_MB of idle segments kept).
+        """
+        processor_kwargs = {}
+        if os.getenv("OCR_MODE"):
+            processor_kwargs["ocr_mode"] = os.getenv("OCR_MODE")
+        if os.getenv("OCR_PREPROCESS"):
+            processor_kwargs["preprocess_mode"] = os.getenv("OCR_PREPROCESS")
+        if os.getenv("OCR_MAX_PIXELS"):
+            processor_kwargs["max_pixels"] = int(os.getenv("OCR_MAX_PIXELS"))
+        if os.getenv("OCR_DETECT_DOCUMENT"):
+            processor_kwargs["detect_document"] = os.getenv("OCR_DETECT_DOCUMENT") == "1"
+        if os.getenv("OCR_VALIDATE_MRZ"):
+            processor_kwargs["validate_mrz"] = os.getenv("OCR_VALIDATE_MRZ") == "1"
+        if os.getenv("OCR_MIN_CONFIDENCE"):
+            processor_kwargs["min_confidence"] = float(os.getenv("OCR_MIN_CONFIDENCE"))
+        if os.getenv("OCR_RETRY_BUDGET"):
+            processor_kwargs["retry_budget"] = float(os.getenv("OCR_RETRY_BUDGET"))
+        if os.getenv("OCR_BINARIZATION"):
+            processor_kwargs["binarization"] = os.getenv("OCR_BINARIZATION")
+        if os.getenv("OCR_TEMPLATE_MATCH"):
+            processor_kwargs["template_match"] = os.getenv("OCR_TEMPLATE_MATCH") == "1"
+        if os.getenv("OCR_QUALITY_CHECK"):
+            processor_kwargs["quality_check"] = os.getenv("OCR_QUALITY_CHECK") == "1"
+        if os.getenv("OCR_TIMING", "0") != "0":
+            processor_kwargs["instrumentation"] = OCRInstrumentation()
+        return cls(
+            workers=int(os.getenv("OCR_WORKERS", "0")) or None,
+            max_in_flight=int(os.getenv("OCR_MAX_IN_FLIGHT", "0")) or None,
+            processor_kwargs=processor_kwargs,
+            shared_memory=SharedSegmentPool(
+                max_cached_bytes=int(os.getenv("OCR_SHM_CACHE_MB", "256")) * 1024 * 1024
+            ) if os.getenv("OCR_SHARED_MEMORY") == "1" else None,
+        )
+
+    def start(self):
+        if self.executor is None:
+            if self.shared_memory is not None:
+                # Workers must inherit this process's resource tracker; one
+                # they start themselves unlinks their segments when they die
+                resource_tracker.ensure_running()
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(self.processor_kwargs,),
+            )
+
+    def shutdown(self, wait: bool = True, close_shared_memory: bool = True):
+        if self.executor is not None:
+            self.executor.shutdown(wait=wait, cancel_futures=True)
+            self.executor = None
+        if close_shared_memory and self.shared_memory is not None:
+            self.shared_memory.close()
+
+    async def _wait_for_slot(self):
+        """Wait for release() to hand over a slot, in arrival order; the slot is then held."""
+        waiter = asyncio.get_running_loop().create_future()
+        self._slot_waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Handed a slot just as the wait was cancelled: pass it on
+                self.release(1)
+            else:
+                self._slot_waiters.remove(waiter)
+            raise
+
+    async def submit(self, fn, *args, on_done: Optional[Callable[[Future], None]] = None,
+                     wait: bool = False):
+        """
+        Run fn(*args) in a worker process.
+
+        Args:
+            on_done: Called once the work item is finished in any way:
+                     result, error, cancellation or a crashed worker
+            wait: If max_in_flight requests are already admitted, wait for a
+                  slot (behind earlier waiters) instead of raising OCRPoolBusy
+
+        Raises:
+            OCRPoolBusy: If max_in_flight requests are already admitted
+            OCRPoolUnavailable: If the pool is not running or a worker crashed
+        """
+        held = False
+        if wait and self.executor is not None and self.in_flight >= self.max_in_flight:
+            try:
+                await self._wait_for_slot()
+            except BaseException:
+                if on_done is not None:
+                    on_done(None)
+                raise
+            held = True
+        if self.executor is None or (not held and self.in_flight >= self.max_in_flight):
+            if held:
+                self.release(1)
+            if on_done is not None:
+                on_done(None)
+            if self.executor is None:
+                raise OCRPoolUnavailable("OCR pool is not running")
+            raise OCRPoolBusy(f"{self.in_flight} OCR requests already in flight")
+
+        loop = asyncio.get_running_loop()
+        executor = self.executor
+        if not held:
+            self.in_flight += 1
+        try:
+            future = executor.submit(fn, *args)
+        except BaseException as e:
+            self.release(1)
+            if on_done is not None:
+                on_done(None)
+            if isinstance(e, BrokenProcessPool):
+                self._replace_broken(executor)
+                raise OCRPoolUnavailable(f"OCR worker crashed: {e}")
+            raise
+        # The slot is held until the work item is finished, not until the
+        # await unwinds: a cancelled request whose item already runs keeps
+        # its worker busy, and must keep counting against max_in_flight
+        future.add_done_callback(lambda _: self._release_soon(loop, 1))
+        if on_done is not None:
+            future.add_done_callback(on_done)
+        try:
+            # Cancelling the await cancels the work item if it has not started;
+            # a running one finishes and only then triggers the callbacks
+            return await asyncio.wrap_future(future)
+        except BrokenProcessPool as e:
+            self._replace_broken(executor)
+            raise OCRPoolUnavailable(f"OCR worker crashed: {e}")
+
+    async def warm_up(self, timeout: float = 120, hold: float = 0.25) -> int:
+        """
+        Start every worker process now instead of on its first request.
+
+        Workers are spawned on demand and warm up in their initializer before
+        taking any task, so once every worker has answered a task all of them
+        are warm. Rounds of one task per worker are submitted until that is
+        the case or timeout seconds have passed. The tasks go straight to the
+        executor, outside the in-flight accounting, so requests arriving
+        meanwhile are admitted as usual (they only queue behind a short task).
+
+        Returns:
+            Number of distinct workers that answered
+
+        Raises:
+            OCRPoolUnavailable: If the pool is not running or a worker crashed
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        pids = set()
+        while len(pids) < self.workers and loop.time() < deadline:
+            executor = self.executor
+            if executor is None:
+                raise OCRPoolUnavailable("OCR pool is not running")
+            try:
+                pids.update(await asyncio.gather(*(
+                    asyncio.wrap_future(executor.submit(_worker_pid, hold))
+                    for _ in range(self.workers))))
+            except BrokenProcessPool as e:
+                self._replace_broken(executor)
+                raise OCRPoolUnavailable(f"OCR worker crashed: {e}")
+        return len(pids)
+
+    def _replace_broken(self, executor: ProcessPoolExecutor):
+        """A worker died (e.g. OOM); replace the pool for the next requests."""
+        if self.executor is executor:
+            self.shutdown(wait=False, close_shared_memory=False)
+            if self.shared_memory is not None:
+                self.shared_memory.drop_missing()
+            self.start()
+
+    def reserve(self, count: int) -> int:
+        """
+        Reserve up to count in-flight slots (at most one per worker) for a batch.
+
+        Returns:
+            Number of slots reserved; release them with release()
+
+        Raises:
+            OCRPoolBusy: If no slot is free
+            OCRPoolUnavailable: If the pool is not running
+        """
+        if self.executor is None:
+            raise OCRPoolUnavailable("OCR pool is not running")
+        slots = min(count, self.workers, self.max_in_flight - self.in_flight)
+        if slots <= 0:
+            raise OCRPoolBusy(f"{self.in_flight} OCR requests already in flight")
+        self.in_flight += slots
+        return slots
+
+    def release(self, slots: int):
+        self.in_flight -= slots
+        while self._slot_waiters and self.in_flight < self.max_in_flight:
+            waiter = self._slot_waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def _release_soon(self, loop: asyncio.AbstractEventLoop, slots: int):
+        """Release slots from a done callback, which runs on an executor thread."""
+        try:
+            loop.call_soon_threadsafe(self.release, slots)
+        except RuntimeError:
+            # The loop is closed (shutdown); nothing is admitted any more
+            pass
+
+    async def process_base64(self, base64_string: str) -> Dict[str, str]:
+        return await self.submit(_process_base64, base64_string)
+
+    async def process_bytes(self, image_data: bytes, wait: bool = False) -> Dict[str, str]:
+        if self.shared_memory is not None and len(image_data) >= self.shared_memory.min_bytes:
+            return await self.process_shared(image_data, wait=wait)
+        return await self.submit(_process_bytes, image_data, wait=wait)
+
+    async def process_array(self, img: np.ndarray) -> Dict[str, str]:
+        """Process an already decoded image (through shared memory when enabled)."""
+        if self.shared_memory is not None:
+            return await self.process_shared(img)
+        return await self.submit(_process_array, img)
+
+    async def process_shared(self, data, wait: bool = False) -> Dict[str, str]:
+        """
+        Copy data (encoded bytes or a decoded ndarray) into a pooled shared
+        memory segment and let a worker read it in place. The segment goes
+        back to the pool when the work item is finished, whatever the outcome.
+        """
+        segment, image = self.shared_memory.put(data)
+        release = self.shared_memory.release
+
+        def done(future: Optional[Future]):
+            # After a crash the segment may be gone; check before reusing it
+            crashed = (future is not None and not future.cancelled()
+                       and isinstance(future.exception(), BrokenProcessPool))
+            release(segment, check=crashed)
+
+        return await self.submit(_process_shared, image, on_done=done, wait=wait)
+
+    def process_base64_batch(self, base64_strings: List[str]) -> "OCRBatch":
+        """Reserve slots now and return an async iterator over the batch results."""
+        return OCRBatch(self, _process_base64, base64_strings)
+
+
+class OCRBatch:
+    """
+    Runs one function over many items on the pool, using slots reserved up front.
+
+    Iterating yields (index, result, error) in completion order; a failing
+    item only reports its own error. When iteration ends, is closed, or the
+    batch is dropped without being iterated, idle slots are released at once
+    and the slot of each item still running on a worker once it finishes.
+    """
+
+    def __init__(self, pool: OCRWorkerPool, fn, items: List[Any]):
+        self.pool = pool
+        self.fn = fn
+        self.items = items
+        self._released = True
+        self._running = set()
+        self.slots = pool.reserve(len(items))
+        self._released = False
+
+    def close(self):
+        if not self._released:
+            self._released = True
+            self.pool.release(self.slots - len(self._running))
+
+    def __del__(self):
+        self.close()
+
+    def _finished(self, future: Future):
+        self._running.discard(future)
+        if self._released:
+            self.pool.release(1)
+
+    def __aiter__(self) -> AsyncIterator[Tuple[int, Any, Optional[Exception]]]:
+        return self._run()
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        executor = self.pool.executor
+        semaphore = asyncio.Semaphore(self.slots)
+
+        def finished(future: Future):
+            try:
+                loop.call_soon_threadsafe(self._finished, future)
+            except RuntimeError:
+                pass
+
+        async def run_one(index: int, item: Any):
+            async with semaphore:
+                try:
+                    future = executor.submit(self.fn, item)
+                    self._running.add(future)
+                    future.add_done_callback(finished)
+                    return index, await asyncio.wrap_future(future), None
+                except BrokenProcessPool as e:
+                    self.pool._replace_broken(executor)
+                    return index, None, OCRPoolUnavailable(f"OCR worker crashed: {e}")
+                except Exception as e:
+                    return index, None, e
+
+        tasks = [asyncio.ensure_future(run_one(i, item)) for i, item in enumerate(self.items)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+            self.close()
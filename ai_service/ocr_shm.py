@@ -0,0 +1,219 @@
+import threading
+from collections import OrderedDict
+from multiprocessing import shared_memory
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+
+class SharedImage(NamedTuple):
+    """What a worker needs to find an image in shared memory (picklable, tiny)."""
+
+    name: str
+    nbytes: int
+    shape: Optional[Tuple[int, ...]]   # None: encoded upload bytes
+    dtype: str = "uint8"
+
+
+class SharedSegmentPool:
+    """
+    Recycled multiprocessing.shared_memory segments for handing images to
+    OCR workers without pickling them.
+
+    Segment sizes are rounded up to a power of two (at least min_segment),
+    so a returned segment fits the next image of a similar size. Idle
+    segments are kept up to max_cached_bytes and unlinked beyond that.
+    The pool is owned by the API process; workers only attach to segments.
+    release() is thread-safe, so it can run from a future's done callback.
+    """
+
+    def __init__(self,
+                 max_cached_bytes: int = 256 * 1024 * 1024,
+                 min_segment: int = 1024 * 1024,
+                 min_bytes: int = 64 * 1024):
+        """
+        Args:
+            max_cached_bytes: Idle segment bytes kept for reuse
+            min_segment: Smallest segment size
+            min_bytes: Payloads smaller than this are cheaper to pickle
+        """
+        self.max_cached_bytes = max_cached_bytes
+        self.min_segment = min_segment
+        self.min_bytes = min_bytes
+        self._free: Dict[int, List[shared_memory.SharedMemory]] = {}
+        self._cached_bytes = 0
+        self._leased = 0
+        self._closed = False
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+        self.unlinked = 0
+        self.lost = 0
+
+    def segment_size(self, nbytes: int) -> int:
+        size = self.min_segment
+        while size < nbytes:
+            size *= 2
+        return size
+
+    def acquire(self, nbytes: int) -> shared_memory.SharedMemory:
+        size = self.segment_size(nbytes)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("shared segment pool is closed")
+            free = self._free.get(size)
+            if free:
+                self._cached_bytes -= size
+                self._leased += 1
+                self.reused += 1
+                return free.pop()
+            self._leased += 1
+            self.created += 1
+        return shared_memory.SharedMemory(create=True, size=size)
+
+    def release(self, segment: shared_memory.SharedMemory, check: bool = False):
+        """
+        Return a segment; unlinked instead if the cache is full or the pool closed.
+
+        Args:
+            check: Make sure the segment still exists first (after a worker
+                   crash) and drop it if it does not
+        """
+        if check and not self._exists(segment):
+            with self._lock:
+                self._leased -= 1
+                self.lost += 1
+            segment.close()
+            return
+        size = self.segment_size(segment.size)
+        with self._lock:
+            self._leased -= 1
+            keep = not self._closed and self._cached_bytes + size <= self.max_cached_bytes
+            if keep:
+                self._free.setdefault(size, []).append(segment)
+                self._cached_bytes += size
+                return
+            self.unlinked += 1
+        self._destroy(segment)
+
+    @staticmethod
+    def _exists(segment: shared_memory.SharedMemory) -> bool:
+        try:
+            try:
+                probe = shared_memory.SharedMemory(name=segment.name, track=False)
+            except TypeError:
+                # Before Python 3.13; the name is already registered by create
+                probe = shared_memory.SharedMemory(name=segment.name)
+        except FileNotFoundError:
+            return False
+        probe.close()
+        return True
+
+    def drop_missing(self) -> int:
+        """Forget idle segments that no longer exist (e.g. unlinked when a worker died)."""
+        with self._lock:
+            free = [(size, segment) for size, segments in self._free.items() for segment in segments]
+        missing = [(size, segment) for size, segment in free if not self._exists(segment)]
+        with self._lock:
+            for size, segment in missing:
+                if segment in self._free.get(size, []):
+                    self._free[size].remove(segment)
+                    self._cached_bytes -= size
+                    self.lost += 1
+        for _, segment in missing:
+            segment.close()
+        return len(missing)
+
+    @staticmethod
+    def _destroy(segment: shared_memory.SharedMemory):
+        segment.close()
+        try:
+            segment.unlink()
+        except FileNotFoundError:
+            pass
+
+    def put(self, data, shape: Optional[Tuple[int, ...]] = None,
+            dtype: str = "uint8") -> Tuple[shared_memory.SharedMemory, SharedImage]:
+        """
+        Copy data (an encoded buffer, or a decoded ndarray with its shape and
+        dtype) into a leased segment. The caller must release() the segment.
+        """
+        if isinstance(data, np.ndarray):
+            shape, dtype = data.shape, data.dtype.str
+            source = np.ascontiguousarray(data).reshape(-1).view(np.uint8)
+        else:
+            source = np.frombuffer(data, np.uint8)
+        segment = self.acquire(source.nbytes)
+        try:
+            np.frombuffer(segment.buf, np.uint8, source.nbytes)[:] = source
+        except BaseException:
+            self.release(segment)
+            raise
+        return segment, SharedImage(segment.name, source.nbytes, shape, dtype)
+
+    def close(self):
+        """Unlink idle segments; leased ones are unlinked when released."""
+        with self._lock:
+            self._closed = True
+            segments = [segment for free in self._free.values() for segment in free]
+            self._free.clear()
+            self._cached_bytes = 0
+        for segment in segments:
+            self._destroy(segment)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "leased": self._leased,
+                "cached_segments": sum(len(free) for free in self._free.values()),
+                "cached_bytes": self._cached_bytes,
+                "created": self.created,
+                "reused": self.reused,
+                "unlinked": self.unlinked,
+                "lost": self.lost,
+            }
+
+
+# Worker side: attachments are kept open because segment names recur as
+# the API process recycles them
+_ATTACHED_MAX = 8
+_attached: "OrderedDict[str, shared_memory.SharedMemory]" = OrderedDict()
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    segment = _attached.get(name)
+    if segment is not None:
+        _attached.move_to_end(name)
+        return segment
+    try:
+        # The API process owns and unlinks the segment
+        segment = shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before Python 3.13 attaching registers the name with the resource
+        # tracker, which unlinks it when the tracker's last user exits.
+        # OCRWorkerPool starts the tracker in the API process before any
+        # worker exists, so workers share it and a dying worker unlinks nothing
+        segment = shared_memory.SharedMemory(name=name)
+    _attached[name] = segment
+    while len(_attached) > _ATTACHED_MAX:
+        _, oldest = _attached.popitem(last=False)
+        try:
+            oldest.close()
+        except BufferError:
+            # A view is still alive somewhere; the mapping goes with it
+            pass
+    return segment
+
+
+def shared_view(image: SharedImage) -> np.ndarray:
+    """
+    Read-only ndarray over the shared segment, without copying: the
+    encoded bytes as a 1-D uint8 array, or the decoded image.
+    """
+    segment = _attach(image.name)
+    if image.shape is None:
+        view = np.frombuffer(segment.buf, np.uint8, image.nbytes)
+    else:
+        view = np.ndarray(image.shape, np.dtype(image.dtype), buffer=segment.buf)
+    view.flags.writeable = False
+    return view
@@ -0,0 +1,283 @@
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Iterable, List, Optional
+
+# Kinds of timed sections: pipeline stages and individual fields
+STAGES = "stages"
+FIELDS = "fields"
+
+
+class Timer:
+    """
+    Collects wall and CPU time per stage and per field for one card.
+
+    A name that is timed several times (e.g. a field that is re-read)
+    accumulates. CPU time is the calling thread's, so concurrent requests
+    in other threads do not inflate it.
+    """
+
+    __slots__ = ("sections",)
+
+    def __init__(self):
+        self.sections: Dict[str, Dict[str, List[float]]] = {STAGES: {}, FIELDS: {}}
+
+    @contextmanager
+    def _measure(self, kind: str, name: str):
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            entry = self.sections[kind].setdefault(name, [0.0, 0.0])
+            entry[0] += time.perf_counter() - wall
+            entry[1] += time.thread_time() - cpu
+
+    def stage(self, name: str):
+        return self._measure(STAGES, name)
+
+    def field(self, name: str):
+        return self._measure(FIELDS, name)
+
+    def merge(self, timings: Dict):
+        """Add timings produced elsewhere (e.g. by a worker process)."""
+        for kind in (STAGES, FIELDS):
+            for name, values in timings.get(kind, {}).items():
+                entry = self.sections[kind].setdefault(name, [0.0, 0.0])
+                entry[0] += values["wall_ms"] / 1000
+                entry[1] += values["cpu_ms"] / 1000
+
+    def as_dict(self) -> Dict:
+        return {kind: {name: {"wall_ms": round(1000 * wall, 3), "cpu_ms": round(1000 * cpu, 3)}
+                       for name, (wall, cpu) in entries.items()}
+                for kind, entries in self.sections.items()}
+
+
+class _NullTimer:
+    """Stand-in used when instrumentation is disabled; every call is a no-op."""
+
+    _context = nullcontext()
+
+    def stage(self, name: str):
+        return self._context
+
+    def field(self, name: str):
+        return self._context
+
+    def merge(self, timings: Dict):
+        pass
+
+    def as_dict(self) -> Dict:
+        return {}
+
+
+NULL_TIMER = _NullTimer()
+
+
+class Histogram:
+    """Fixed-bucket latency histogram in milliseconds (Prometheus style)."""
+
+    BOUNDS_MS = (0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS_MS) + 1)
+        self.count = 0
+        self.sum_ms = 0.0
+
+    def observe(self, value_ms: float):
+        self.counts[bisect_left(self.BOUNDS_MS, value_ms)] += 1
+        self.count += 1
+        self.sum_ms += value_ms
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile (None if empty)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.BOUNDS_MS + (float("inf"),), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def snapshot(self) -> Dict:
+        return {
+            "count": self.count,
+            "sum_ms": round(self.sum_ms, 3),
+            "mean_ms": round(self.sum_ms / self.count, 3) if self.count else None,
+            "p50_ms": self.quantile(0.5),
+            "p99_ms": self.quantile(0.99),
+            "buckets": {f"le_{bound}": count for bound, count in
+                        zip(self.BOUNDS_MS + ("inf",), self.counts)},
+        }
+
+
+class TimingSink:
+    """Receives the timings of every instrumented card."""
+
+    def record(self, timings: Dict):
+        raise NotImplementedError
+
+
+class LoggingSink(TimingSink):
+    """Logs each card's timings as one JSON line."""
+
+    def __init__(self, logger: str = "ocr.timing", level: int = logging.INFO):
+        self.logger = logging.getLogger(logger)
+        self.level = level
+
+    def record(self, timings: Dict):
+        if self.logger.isEnabledFor(self.level):
+            self.logger.log(self.level, "OCR timings %s", json.dumps(timings))
+
+
+class RingBufferSink(TimingSink):
+    """Keeps the timings of the most recent cards in memory."""
+
+    def __init__(self, size: int = 256):
+        self.buffer = deque(maxlen=size)
+
+    def record(self, timings: Dict):
+        self.buffer.append(timings)
+
+    def recent(self, limit: Optional[int] = None) -> List[Dict]:
+        items = list(self.buffer)
+        return items if limit is None else items[-limit:]
+
+
+class PrometheusSink(TimingSink):
+    """
+    Exports wall and CPU seconds per stage and field as a Prometheus histogram.
+
+    Requires the optional prometheus_client package.
+    """
+
+    _metric = None
+
+    def __init__(self):
+        if PrometheusSink._metric is None:
+            try:
+                from prometheus_client import Histogram as PromHistogram
+            except ImportError as e:
+                raise ImportError("PrometheusSink needs prometheus_client "
+                                  "(pip install prometheus-client)") from e
+            PrometheusSink._metric = PromHistogram(
+                "ocr_section_seconds", "Time spent per OCR stage and field",
+                ["kind", "name", "clock"],
+                buckets=[bound / 1000 for bound in Histogram.BOUNDS_MS],
+            )
+
+    def record(self, timings: Dict):
+        for kind in (STAGES, FIELDS):
+            for name, values in timings.get(kind, {}).items():
+                self._metric.labels(kind, name, "wall").observe(values["wall_ms"] / 1000)
+                self._metric.labels(kind, name, "cpu").observe(values["cpu_ms"] / 1000)
+
+
+SINKS = {
+    "log": LoggingSink,
+    "ring": RingBufferSink,
+    "prometheus": PrometheusSink,
+}
+
+
+class OCRInstrumentation:
+    """
+    Opt-in timing of the OCR pipeline.
+
+    Hands out a Timer per card, aggregates every recorded card into
+    per-stage and per-field wall time histograms, and forwards the raw
+    timings to the configured sinks.
+    """
+
+    def __init__(self, sinks: Iterable[TimingSink] = ()):
+        self.sinks = list(sinks)
+        self.histograms: Dict[str, Dict[str, Histogram]] = {STAGES: {}, FIELDS: {}}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> Optional["OCRInstrumentation"]:
+        """
+        Build from OCR_TIMING: unset or empty disables timing, "1" keeps
+        histograms only, otherwise a comma separated list of sinks
+        (log, ring, prometheus).
+        """
+        setting = os.getenv("OCR_TIMING", "").strip()
+        if not setting or setting == "0":
+            return None
+        names = [name.strip() for name in setting.split(",") if name.strip() not in ("", "1")]
+        unknown = [name for name in names if name not in SINKS]
+        if unknown:
+            raise ValueError(f"Unknown OCR_TIMING sink(s): {', '.join(unknown)}")
+        return cls(sinks=[SINKS[name]() for name in names])
+
+    def __getstate__(self):
+        # Shipped to worker processes: sinks and histograms stay behind
+        return {"sinks": None}
+
+    def __setstate__(self, state):
+        self.__init__()
+
+    def timer(self) -> Timer:
+        return Timer()
+
+    def record(self, timings: Dict):
+        with self._lock:
+            for kind in (STAGES, FIELDS):
+                histograms = self.histograms[kind]
+                for name, values in timings.get(kind, {}).items():
+                    if name not in histograms:
+                        histograms[name] = Histogram()
+                    histograms[name].observe(values["wall_ms"])
+        for sink in self.sinks:
+            sink.record(timings)
+
+    def sink(self, sink_type: type) -> Optional[TimingSink]:
+        """The first configured sink of the given type, if any."""
+        return next((sink for sink in self.sinks if isinstance(sink, sink_type)), None)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {kind: {name: histogram.snapshot() for name, histogram in histograms.items()}
+                    for kind, histograms in self.histograms.items()}
+
+
+def instrumented(method):
+    """
+    Decorator for IDCardProcessor entry points.
+
+    The outermost instrumented call on a thread starts a Timer, times the
+    whole call as the "total" stage, records the timings and attaches them
+    to the returned dict under "timings". Nested entry points reuse the
+    running Timer. Without instrumentation the method is called directly.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.instrumentation is None or self._timing.timer is not NULL_TIMER:
+            return method(self, *args, **kwargs)
+
+        timer = self.instrumentation.timer()
+        self._timing.timer = timer
+        try:
+            with timer.stage("total"):
+                result = method(self, *args, **kwargs)
+        finally:
+            self._timing.timer = NULL_TIMER
+            timings = timer.as_dict()
+            self.instrumentation.record(timings)
+        result["timings"] = timings
+        return result
+
+    return wrapper
+
+
+class TimerSlot(threading.local):
+    """Per-thread slot holding the Timer of the card being processed."""
+
+    timer = NULL_TIMER
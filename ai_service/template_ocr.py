@@ -0,0 +1,298 @@
+import hashlib
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+# Glyph bank of the service, rendered from an OCR-B font (see build_bank_from_font
+# below); without it template matching reads nothing and the engine reads every field
+DEFAULT_BANK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ocrb_glyphs.npz")
+
+# Every character the MRZ can hold
+MRZ_CHARSET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ<"
+
+
+class TemplateRecognizer:
+    """
+    Reader for single lines of the fixed-pitch MRZ font (OCR-B).
+
+    The line band is found from the row projection, glyphs are cut at empty
+    columns of the column projection (see segment), and every glyph is scored against the
+    whole bank with one matrix product (normalized cross-correlation). A
+    read is accepted only if the bank holds every character the line may
+    contain and every glyph matches well and clearly better than its
+    runner-up; otherwise the caller should use a general engine.
+    """
+
+    # Glyphs are normalized to this (width, height) and blurred before
+    # matching, which makes the correlation tolerant of stroke width and
+    # one-pixel misalignment
+    GLYPH_SIZE = (12, 16)
+    GLYPH_BLUR = 1.0
+    # Width of the canvas a glyph is centered in, relative to its height,
+    # so narrow glyphs ('1', 'I') keep their shape
+    GLYPH_ASPECT = 0.75
+    # Widest glyph of the font, relative to the line height
+    MAX_GLYPH_WIDTH = 0.8
+    # Templates kept per character when building a bank
+    MAX_TEMPLATES_PER_CHAR = 3
+
+    def __init__(self,
+                 bank_path: Optional[str] = DEFAULT_BANK_PATH,
+                 min_score: float = 0.6,
+                 min_margin: float = 0.12):
+        """
+        Args:
+            bank_path: .npz glyph bank written by save_bank (None = empty bank)
+            min_score: Lowest correlation accepted for any glyph
+            min_margin: Lowest gap between the best and second best glyph
+        """
+        self.min_score = min_score
+        self.min_margin = min_margin
+        self.chars: List[str] = []
+        self.templates = np.zeros((0, self.GLYPH_SIZE[0] * self.GLYPH_SIZE[1]), np.float32)
+        if bank_path and os.path.exists(bank_path):
+            self.load_bank(bank_path)
+
+    def load_bank(self, path: str):
+        with np.load(path) as bank:
+            self.chars = [str(ch) for ch in bank["chars"]]
+            self.templates = bank["templates"].astype(np.float32)
+
+    def version(self) -> str:
+        """Digest of the glyph bank and match thresholds (for cache keys)."""
+        digest = hashlib.blake2b(digest_size=8)
+        digest.update("".join(self.chars).encode())
+        digest.update(np.ascontiguousarray(self.templates).data)
+        digest.update(f"{self.min_score}:{self.min_margin}".encode())
+        return digest.hexdigest()
+
+    def missing(self, charset: str) -> str:
+        """Characters of charset that have no template in the bank."""
+        known = set(self.chars)
+        return "".join(ch for ch in dict.fromkeys(charset) if ch not in known and not ch.isspace())
+
+    def save_bank(self, path: str):
+        np.savez_compressed(path, chars=np.array(self.chars), templates=self.templates)
+
+    @staticmethod
+    def _runs(mask: np.ndarray) -> List[Tuple[int, int]]:
+        """(start, end) of every run of True values."""
+        padded = np.concatenate(([False], mask, [False]))
+        edges = np.flatnonzero(padded[1:] != padded[:-1])
+        return list(zip(edges[::2], edges[1::2]))
+
+    def segment(self, binary: np.ndarray) -> List[np.ndarray]:
+        """
+        Cut a binarized line (dark text on white) into glyph images.
+
+        Glyphs are cut at empty columns. Thin strokes lost in binarization
+        split some glyphs ('0' into two arcs), so adjacent pieces are merged
+        narrowest pair first, as long as the result is no wider than a
+        glyph can be (MAX_GLYPH_WIDTH of the line height).
+
+        Args:
+            binary: Binarized ROI containing one text line
+
+        Returns:
+            Glyph crops, left to right
+        """
+        ink = binary < 128
+        if not ink.any():
+            return []
+
+        # Keep the band of rows with the most ink (neighbouring lines that
+        # leak into the ROI are dropped)
+        row_runs = self._runs(ink.sum(axis=1) > 0)
+        top, bottom = max(row_runs, key=lambda run: ink[run[0]:run[1]].sum())
+        band = ink[top:bottom]
+        line_height = bottom - top
+
+        pieces = self._runs(band.any(axis=0))
+        max_width = self.MAX_GLYPH_WIDTH * line_height
+        while len(pieces) > 1:
+            extents = [pieces[i + 1][1] - pieces[i][0] for i in range(len(pieces) - 1)]
+            i = int(np.argmin(extents))
+            if extents[i] > max_width:
+                break
+            pieces[i:i + 2] = [(pieces[i][0], pieces[i + 1][1])]
+
+        glyphs = []
+        for start, end in pieces:
+            # Glyphs cut by the ROI border cannot match a whole template
+            if start == 0 or end == band.shape[1]:
+                continue
+            cell = band[:, start:end]
+            rows = np.flatnonzero(cell.any(axis=1))
+            # Specks much smaller than a character
+            if rows[-1] - rows[0] + 1 < 0.3 * line_height or cell.sum() < 4:
+                continue
+            glyphs.append(cell[rows[0]:rows[-1] + 1])
+        return glyphs
+
+    def normalize(self, glyphs: List[np.ndarray]) -> np.ndarray:
+        """
+        Center each glyph in a fixed-aspect canvas, resize and blur it, then
+        make every row zero-mean and unit-norm.
+
+        Returns:
+            float32 array of shape (len(glyphs), GLYPH_SIZE pixels)
+        """
+        vectors = np.empty((len(glyphs), self.GLYPH_SIZE[0] * self.GLYPH_SIZE[1]), np.float32)
+        for i, glyph in enumerate(glyphs):
+            h, w = glyph.shape
+            canvas_w = max(w, int(round(h * self.GLYPH_ASPECT)))
+            canvas = np.zeros((h, canvas_w), np.float32)
+            offset = (canvas_w - w) // 2
+            canvas[:, offset:offset + w] = glyph
+            small = cv2.resize(canvas, self.GLYPH_SIZE, interpolation=cv2.INTER_AREA)
+            vectors[i] = cv2.GaussianBlur(small, (0, 0), self.GLYPH_BLUR).ravel()
+        vectors -= vectors.mean(axis=1, keepdims=True)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-6)
+
+    def recognize(self, binary: np.ndarray, whitelist: Optional[str] = None) -> Optional[Dict]:
+        """
+        Read a line by template matching.
+
+        Args:
+            binary: Binarized ROI (dark text on white)
+            whitelist: Characters allowed in the result (None = whole bank)
+
+        Returns:
+            {"text", "confidence" (0-100, weakest glyph), "margin"} if the
+            bank covers the whitelist and every glyph passed min_score and
+            min_margin, otherwise None
+        """
+        # A glyph of a character the bank lacks would be matched to some
+        # other character, possibly with a good score
+        if whitelist is not None and self.missing(whitelist):
+            return None
+        allowed = [i for i, ch in enumerate(self.chars) if whitelist is None or ch in whitelist]
+        if len(allowed) < 2:
+            return None
+
+        glyphs = self.segment(binary)
+        if not glyphs:
+            return None
+
+        scores = self.normalize(glyphs) @ self.templates[allowed].T
+
+        # Several templates may exist per character; compare the best match
+        # against the best match of any other character
+        chars = np.array([self.chars[i] for i in allowed])
+        order = np.argsort(-scores, axis=1)
+        best = order[:, 0]
+        best_scores = scores[np.arange(len(glyphs)), best]
+        other = np.where(chars[None, :] == chars[best][:, None], -1.0, scores)
+        margins = best_scores - other.max(axis=1)
+
+        score, margin = float(best_scores.min()), float(margins.min())
+        if score < self.min_score or margin < self.min_margin:
+            return None
+        return {"text": "".join(chars[best]), "confidence": 100.0 * score, "margin": margin}
+
+    def add_samples(self, binary: np.ndarray, text: str):
+        """
+        Add the glyphs of a binarized line with known text to the bank,
+        keeping at most MAX_TEMPLATES_PER_CHAR templates per character.
+
+        Raises:
+            ValueError: If the glyph count does not match the text
+        """
+        text = "".join(text.split())
+        glyphs = self.segment(binary)
+        if len(glyphs) != len(text):
+            raise ValueError(f"Found {len(glyphs)} glyphs for {len(text)} characters")
+
+        counts: Dict[str, int] = {}
+        for ch in self.chars:
+            counts[ch] = counts.get(ch, 0) + 1
+        new_glyphs = []
+        for ch, glyph in zip(text, glyphs):
+            if counts.get(ch, 0) >= self.MAX_TEMPLATES_PER_CHAR:
+                continue
+            counts[ch] = counts.get(ch, 0) + 1
+            self.chars.append(ch)
+            new_glyphs.append(glyph)
+        if new_glyphs:
+            self.templates = np.vstack([self.templates, self.normalize(new_glyphs)])
+
+
+def build_bank(samples: Sequence[Tuple[np.ndarray, str]], path: str = DEFAULT_BANK_PATH) -> TemplateRecognizer:
+    """
+    Build and save a glyph bank from binarized MRZ lines with known text.
+
+    Args:
+        samples: (binarized line ROI, ground-truth text) pairs
+        path: Output .npz file
+    """
+    recognizer = TemplateRecognizer(bank_path=None)
+    for binary, text in samples:
+        recognizer.add_samples(binary, text)
+    recognizer.save_bank(path)
+    return recognizer
+
+
+def render_line(font_path: str, text: str, size: int, spacing: float = 0.35,
+                thicken: int = 0) -> np.ndarray:
+    """
+    Render text in a TrueType/OpenType font as a binarized line (dark on white).
+
+    Args:
+        font_path: Font file
+        text: Characters to draw, spaced apart so every glyph is cut alone
+        size: Font size in pixels
+        spacing: Gap between glyphs, relative to size
+        thicken: Pixels to grow the strokes by (imitates ink spread and blur)
+    """
+    from PIL import Image, ImageDraw, ImageFont
+
+    font = ImageFont.truetype(font_path, size)
+    gap = int(round(spacing * size))
+    margin = size
+    widths = [font.getlength(ch) for ch in text]
+    image = Image.new("L", (int(sum(widths)) + gap * len(text) + 2 * margin, 3 * size), 255)
+    draw = ImageDraw.Draw(image)
+    x = margin
+    for ch, width in zip(text, widths):
+        draw.text((x, size), ch, font=font, fill=0)
+        x += width + gap
+    line = np.array(image)
+    if thicken:
+        line = cv2.erode(line, np.ones((thicken + 1, thicken + 1), np.uint8))
+    _, binary = cv2.threshold(line, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    return binary
+
+
+def build_bank_from_font(font_path: str, path: str = DEFAULT_BANK_PATH,
+                         sizes: Sequence[int] = (32, 48, 64)) -> TemplateRecognizer:
+    """
+    Build and save the glyph bank by rendering every MRZ character in an
+    OCR-B font, one template per size (at most MAX_TEMPLATES_PER_CHAR).
+
+    Args:
+        font_path: OCR-B font file (e.g. OCRB.otf)
+        path: Output .npz file
+        sizes: Font sizes in pixels; larger ones are drawn with bolder strokes
+
+    Raises:
+        ValueError: If the font does not render every MRZ character as one glyph
+    """
+    samples = [(render_line(font_path, MRZ_CHARSET, size, thicken=i), MRZ_CHARSET)
+               for i, size in enumerate(sizes)]
+    return build_bank(samples, path)
+
+
+# Rebuild the bundled bank from an OCR-B font (0-9, A-Z and '<'):
+#     python template_ocr.py path/to/OCRB.otf [output.npz]
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 2:
+        sys.exit("usage: python template_ocr.py FONT [OUTPUT]")
+    output = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_BANK_PATH
+    bank = build_bank_from_font(sys.argv[1], output)
+    print(f"[✔] Glyph bank with {len(bank.chars)} templates "
+          f"({''.join(sorted(set(bank.chars)))}) saved to {output}")
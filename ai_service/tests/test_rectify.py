@@ -0,0 +1,125 @@
+"""
+Rectified path: a card located in a photo is warped so that its field rows
+land in the same crop boxes the fixed crop uses.
+
+The card is an ID-1 card drawn with the two MRZ lines where the card crop
+region puts the nume_full and MRZ line 2 boxes, then turned to portrait and
+pasted into a photo under a perspective warp.
+
+Run from ai_service/:
+    python -m pytest tests
+"""
+import os
+import sys
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from document_locator import DocumentLocator
+from mrz import build_line2
+from ocr_identitycard import IDCardProcessor
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+CARD_WIDTH = 1586
+CARD_HEIGHT = int(round(CARD_WIDTH / DocumentLocator.CARD_ASPECT))
+# Glyph height in crop pixels, and the slack allowed for corner errors
+GLYPH_HEIGHT = 28
+TOLERANCE = 8
+
+LINE1 = "IDROUPOPESCU<<ION<<<<<<<<<<<<<<<<<<"
+LINE2 = build_line2("XC822403", "ROU", "900101", "M", "300101", "1012345")
+LINES = {"nume_full": LINE1, "mrz_line2": LINE2}
+
+
+def crop_to_card(x: float, y: float):
+    """Crop pixel (x, y) in card pixels, through the default card crop region."""
+    region = IDCardProcessor.DEFAULT_CARD_CROP_REGION
+    return (int(round((region['x1'] + x / IDCardProcessor.TARGET_WIDTH
+                       * (region['x2'] - region['x1'])) * CARD_WIDTH)),
+            int(round((region['y1'] + y / IDCardProcessor.TARGET_HEIGHT
+                       * (region['y2'] - region['y1'])) * CARD_HEIGHT)))
+
+
+def box(field_name: str):
+    if field_name == IDCardProcessor.MRZ_LINE2_FIELD:
+        return IDCardProcessor.MRZ_LINE2_BOX
+    return IDCardProcessor.DEFAULT_CROP_BOXES[field_name]
+
+
+def render_card() -> np.ndarray:
+    """Light ID-1 card with each MRZ line centred in its crop box."""
+    card = np.full((CARD_HEIGHT, CARD_WIDTH), 225, np.uint8)
+    (_, cap_height), _ = cv2.getTextSize("H", FONT, 1.0, 2)
+    for field_name, text in LINES.items():
+        x1, y1, x2, y2 = box(field_name)
+        left, top = crop_to_card(x1 + 10, (y1 + y2 - GLYPH_HEIGHT) / 2)
+        right, bottom = crop_to_card(x2 - 10, (y1 + y2 + GLYPH_HEIGHT) / 2)
+        pitch = (right - left) / len(text)
+        scale = (bottom - top) / cap_height
+        for i, ch in enumerate(text):
+            (width, _), _ = cv2.getTextSize(ch, FONT, scale, 3)
+            cv2.putText(card, ch, (int(left + i * pitch + (pitch - width) / 2), bottom),
+                        FONT, scale, 20, 3, cv2.LINE_AA)
+    return card
+
+
+def make_photo(skew: float = 0.05, size=(2400, 3000)) -> np.ndarray:
+    """Portrait photo of the card, foreshortened at the far end and turned 3 degrees."""
+    card = cv2.rotate(render_card(), cv2.ROTATE_90_CLOCKWISE)
+    card_h, card_w = card.shape[:2]
+    photo_w, photo_h = size
+
+    short_side, long_side = 1300, 1300 * DocumentLocator.CARD_ASPECT * (1.0 - skew)
+    inset = skew * short_side / 2
+    quad = np.array([[-short_side / 2 + inset, -long_side / 2],
+                     [short_side / 2 - inset, -long_side / 2],
+                     [short_side / 2, long_side / 2],
+                     [-short_side / 2, long_side / 2]], dtype=np.float32)
+    angle = np.deg2rad(3.0)
+    turn = np.array([[np.cos(angle), -np.sin(angle)], [np.sin(angle), np.cos(angle)]], np.float32)
+    quad = quad @ turn.T + np.array([photo_w / 2, photo_h / 2], np.float32)
+
+    source = np.array([[0, 0], [card_w, 0], [card_w, card_h], [0, card_h]], dtype=np.float32)
+    homography = cv2.getPerspectiveTransform(source, quad)
+    photo = np.full((photo_h, photo_w), 80, np.uint8)
+    warped = cv2.warpPerspective(card, homography, size)
+    mask = cv2.warpPerspective(np.full((card_h, card_w), 255, np.uint8), homography, size)
+    photo[mask > 0] = warped[mask > 0]
+    return cv2.cvtColor(photo, cv2.COLOR_GRAY2BGR)
+
+
+def ink_extent(ink: np.ndarray, rows: slice):
+    """(x1, y1, x2, y2) of the ink within the given crop rows."""
+    ys, xs = np.nonzero(ink[rows])
+    return xs.min(), ys.min() + rows.start, xs.max(), ys.max() + rows.start
+
+
+def test_rectified_lines_land_in_their_boxes():
+    processor = IDCardProcessor(engine=object(), detect_document=True)
+    crop, scale = processor.rectify_crop(make_photo())
+
+    assert crop is not None
+    assert crop.shape == (IDCardProcessor.TARGET_HEIGHT, IDCardProcessor.TARGET_WIDTH)
+    assert scale > 0
+
+    ink = crop < 128
+    # The two lines are split between the rows of the nume_full and MRZ
+    # line 2 boxes, which overlap by a few rows
+    split = (box("nume_full")[3] + box("mrz_line2")[1]) // 2
+    extents = {"nume_full": ink_extent(ink, slice(0, split)),
+               "mrz_line2": ink_extent(ink, slice(split, ink.shape[0]))}
+    for field_name, (x1, y1, x2, y2) in extents.items():
+        bx1, by1, bx2, by2 = box(field_name)
+        assert bx1 - TOLERANCE <= x1 and x2 <= bx2 + TOLERANCE, field_name
+        assert by1 - TOLERANCE <= y1 and y2 <= by2 + TOLERANCE, field_name
+        # Centred, as drawn, not merely inside a box that is larger than the line
+        assert abs((y1 + y2) / 2 - (by1 + by2) / 2) <= TOLERANCE, field_name
+
+
+def test_canonical_card_keeps_id1_proportions():
+    region = IDCardProcessor.DEFAULT_CARD_CROP_REGION
+    card_w = IDCardProcessor.TARGET_WIDTH / (region['x2'] - region['x1'])
+    card_h = IDCardProcessor.TARGET_HEIGHT / (region['y2'] - region['y1'])
+    assert abs(card_w / card_h - DocumentLocator.CARD_ASPECT) < 0.01
@@ -0,0 +1,129 @@
+"""
+Template matching fast path: reads are only kept when the bank covers the
+field's characters and the MRZ line 2 they form passes its check digits.
+
+Lines are drawn in OpenCV's Hershey font, and banks are built from the
+same font, so the tests do not depend on an OCR-B font or Tesseract.
+
+Run from ai_service/:
+    python -m pytest tests
+"""
+import os
+import sys
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mrz import build_line2
+from ocr_engines import OCREngine
+from ocr_identitycard import IDCardProcessor
+from template_ocr import MRZ_CHARSET, TemplateRecognizer
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+GLYPH_HEIGHT = 20
+PITCH = 25
+
+SERIE_NR = "XC822403"
+LINE2 = build_line2(SERIE_NR, "ROU", "900101", "M", "300101", "1012345")
+# The cnp box holds line 2 from the birth date on
+CNP_TEXT = LINE2[13:]
+
+
+def draw_line(image: np.ndarray, text: str, x: int, baseline: int):
+    """Fixed-pitch dark text, as on the MRZ."""
+    (_, cap_height), _ = cv2.getTextSize("H", FONT, 1.0, 2)
+    scale = GLYPH_HEIGHT / cap_height
+    for i, ch in enumerate(text):
+        (width, _), _ = cv2.getTextSize(ch, FONT, scale, 2)
+        cv2.putText(image, ch, (x + i * PITCH + (PITCH - width) // 2, baseline),
+                    FONT, scale, 0, 2, cv2.LINE_AA)
+
+
+def binarize(image: np.ndarray) -> np.ndarray:
+    return np.where(image < 128, 0, 255).astype(np.uint8)
+
+
+def make_bank(chars: str = MRZ_CHARSET, labels: str = None) -> TemplateRecognizer:
+    """Bank with one template per character of chars, stored under labels."""
+    line = np.full((3 * GLYPH_HEIGHT, PITCH * (len(chars) + 2)), 255, np.uint8)
+    draw_line(line, chars, PITCH, 2 * GLYPH_HEIGHT)
+    # Hershey's 0/O and 8/B are closer than OCR-B's, hence the lower margin
+    recognizer = TemplateRecognizer(bank_path=None, min_margin=0.05)
+    recognizer.add_samples(binarize(line), labels or chars)
+    return recognizer
+
+
+def processed_card() -> np.ndarray:
+    """Preprocessed card with serie_nr and cnp drawn inside their crop boxes."""
+    card = np.full((IDCardProcessor.TARGET_HEIGHT, IDCardProcessor.TARGET_WIDTH), 255, np.uint8)
+    for field_name, text in (("serie_nr", SERIE_NR), ("cnp", CNP_TEXT)):
+        x1, y1, x2, y2 = IDCardProcessor.DEFAULT_CROP_BOXES[field_name]
+        draw_line(card, text, x1 + 5, (y1 + y2) // 2 + GLYPH_HEIGHT // 2)
+    return binarize(card)
+
+
+class ScriptedEngine(OCREngine):
+    """Answers serie_nr and cnp with the true text and counts the calls per field."""
+
+    name = "scripted"
+
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    def recognize_with_confidence(self, image, config):
+        for field_name, text in (("serie_nr", SERIE_NR), ("cnp", CNP_TEXT)):
+            if config == IDCardProcessor.DEFAULT_TESS_CONFIG[field_name]:
+                self.calls.append(field_name)
+                return text, 90.0
+        return "", 0.0
+
+    def recognize(self, image, config):
+        return self.recognize_with_confidence(image, config)[0]
+
+
+def extract(bank: TemplateRecognizer):
+    engine = ScriptedEngine()
+    processor = IDCardProcessor(engine=engine, template_match=True, template_recognizer=bank)
+    return processor.extract_field_results(processed_card()), engine.calls
+
+
+def test_bank_reads_line_it_covers():
+    line = np.full((3 * GLYPH_HEIGHT, PITCH * (len(SERIE_NR) + 2)), 255, np.uint8)
+    draw_line(line, SERIE_NR, PITCH, 2 * GLYPH_HEIGHT)
+    assert make_bank().recognize(binarize(line), MRZ_CHARSET)["text"] == SERIE_NR
+
+
+def test_whitelist_characters_missing_from_bank_are_rejected():
+    line = np.full((3 * GLYPH_HEIGHT, PITCH * (len(SERIE_NR) + 2)), 255, np.uint8)
+    draw_line(line, SERIE_NR, PITCH, 2 * GLYPH_HEIGHT)
+    bank = make_bank(MRZ_CHARSET.replace("C", "").replace("7", ""))
+    assert bank.missing(MRZ_CHARSET) == "7C"
+    assert bank.recognize(binarize(line), MRZ_CHARSET) is None
+
+
+def test_valid_template_reads_skip_the_engine():
+    fields, calls = extract(make_bank())
+    assert fields["serie_nr"] == {"text": SERIE_NR, "confidence": fields["serie_nr"]["confidence"],
+                                  "attempts": 1, "recognizer": "template"}
+    assert fields["cnp"]["text"] == CNP_TEXT and fields["cnp"]["recognizer"] == "template"
+    assert calls == []
+
+
+def test_card_with_characters_missing_from_bank_is_read_by_engine():
+    fields, calls = extract(make_bank(MRZ_CHARSET.replace("C", "")))
+    assert fields["serie_nr"]["text"] == SERIE_NR
+    assert fields["serie_nr"]["recognizer"] == "engine"
+    assert "serie_nr" in calls
+
+
+def test_template_read_failing_check_digits_is_read_by_engine():
+    # 'C' and 'O' swapped: the series is matched confidently as "XO..."
+    swapped = MRZ_CHARSET.replace("C", "#").replace("O", "C").replace("#", "O")
+    fields, calls = extract(make_bank(MRZ_CHARSET, labels=swapped))
+    assert fields["serie_nr"]["text"] == SERIE_NR
+    assert fields["serie_nr"]["recognizer"] == "engine"
+    assert fields["serie_nr"]["attempts"] == 2
+    assert sorted(calls) == ["cnp", "serie_nr"]
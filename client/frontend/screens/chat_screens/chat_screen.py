@@ -10,7 +10,6 @@ from kivy.clock import Clock
 from kivy.metrics import dp
 from kivy.properties import StringProperty, BooleanProperty
 import threading
-import time
 
 
 class LoadingBubble(MDCard):
@@ -98,7 +97,7 @@ class MessageBubble(MDCard):
         self.add_widget(sender_label)
         
         # Message label
-        message_label = MDLabel(
+        self.message_label = message_label = MDLabel(
             text=self.message_text,
             size_hint_y=None,
             theme_text_color="Custom",
@@ -114,6 +113,11 @@ class MessageBubble(MDCard):
         
         message_label.bind(texture_size=calculate_height)
         Clock.schedule_once(calculate_height, 0.1)
+    
+    def append_text(self, text):
+        """Append a streamed piece of the message (main thread only)"""
+        self.message_text += text
+        self.message_label.text = self.message_text
 
 
 class ChatScreen(MDScreen):
@@ -126,6 +130,7 @@ class ChatScreen(MDScreen):
         self.scroll_scheduled = None
         self.loading_container = None  # Reference to loading message
         self.is_loading = False  # Track loading state
+        self.streaming_bubble = None  # Assistant bubble being streamed into
         self.setup_chat_screen()
     
     def on_pre_enter(self, *args):
@@ -273,6 +278,7 @@ class ChatScreen(MDScreen):
         
         self.chat_layout.add_widget(message_container)
         Clock.schedule_once(self.scroll_to_bottom, 0.1)
+        return bubble
     
     def add_loading_indicator(self):
         """Add loading indicator to chat"""
@@ -330,24 +336,25 @@ class ChatScreen(MDScreen):
         self.scroll.scroll_y = 0
     
     def send_message_async(self, message_text):
-        """Send message in background thread"""
+        """Send message in background thread, showing the answer as it streams in"""
+        def on_chunk(text):
+            Clock.schedule_once(lambda dt: self.append_chunk(text), 0)
+        
         def background_task():
             try:
-                # Simulate some delay to show loading (remove this in production)
-                time.sleep(0.5)
-                
-                # Get response from server
-                response = self.server.sent_chatbot_msg(message_text)
+                # Stream the response from server
+                response = self.server.stream_chatbot_msg(message_text, on_chunk)
                 
-                # Schedule UI update on main thread
+                # Schedule UI update on main thread (after the queued chunks)
                 Clock.schedule_once(
-                    lambda dt: self.handle_response(response),
+                    lambda dt: self.handle_stream_end(response),
                     0
                 )
             except Exception as e:
-                # Handle errors
+                # Handle errors (e is unbound once the except block ends)
+                error = str(e)
                 Clock.schedule_once(
-                    lambda dt: self.handle_response(None, str(e)),
+                    lambda dt: self.handle_stream_end(None, error),
                     0
                 )
         
@@ -356,6 +363,31 @@ class ChatScreen(MDScreen):
         thread.daemon = True
         thread.start()
     
+    def append_chunk(self, text):
+        """Show a streamed piece of the answer (called on main thread)"""
+        if self.streaming_bubble is None:
+            # First piece: the answer bubble replaces the loading indicator
+            self.remove_loading_indicator()
+            self.streaming_bubble = self.add_message("Assistant", "", is_user=False)
+        self.streaming_bubble.append_text(text)
+        Clock.schedule_once(self.scroll_to_bottom, 0.1)
+    
+    def handle_stream_end(self, response, error=None):
+        """Finish a streamed answer (called on main thread)"""
+        bubble, self.streaming_bubble = self.streaming_bubble, None
+        if bubble is None:
+            if not error and response is not None and response.get('success', False):
+                # The stream ended cleanly without a single chunk: an empty answer
+                self.set_loading_state(False)
+                self.add_message("Assistant", "Nu am primit niciun răspuns. Încearcă din nou.", is_user=False)
+                return
+            # Nothing was streamed: show the error like a one-piece response
+            self.handle_response(response, error)
+            return
+        self.set_loading_state(False)
+        if error or not response.get('success', False):
+            bubble.append_text("\n❌ Raspuns întrerupt.")
+    
     def handle_response(self, response, error=None):
         """Handle the response from server (called on main thread)"""
         # Remove loading state
@@ -249,13 +249,17 @@ class SaveScreen(Screen):
             Logger.info(f"SaveScreen: Processing OCR for image: {image_path_to_use}")
             print(f"🔄 [SaveScreen] Processing OCR for: {image_path_to_use}", flush=True)
             
-            # Convert image to base64 and send to server
-            img = image_to_base64(image_path_to_use)
-            data = self.server.sent_OCR_image(img)
+            # Submit the image as an OCR job and long-poll for its result
+            image_bytes = Path(image_path_to_use).read_bytes()
+            data = self.server.run_OCR_job(image_bytes)
             print(data)
             
             # Schedule UI update on main thread
-            if data and data.get('success') and 'data' in data:
+            if data and data.get('success') and data.get('data', {}).get('status') == 'failed':
+                error = data['data'].get('error') or {}
+                err_msg = str(error.get('detail', 'OCR failed'))
+                Clock.schedule_once(lambda dt: self.on_ocr_error(err_msg), 0)
+            elif data and data.get('success') and 'data' in data:
                 result_str = data['data'].get('result', '{}')
                 # Parse the string representation of dict
                 result_dict = ast.literal_eval(result_str)
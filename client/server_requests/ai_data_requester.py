@@ -3,7 +3,9 @@
 # "health" => AiRequests::call_python_health().await,
 
 import base64
+import json
 import os
+import time
 from pathlib import Path
 from kivy.logger import Logger
 
@@ -36,6 +38,133 @@ class AI_DataRequester:
         except Exception as e:
             print(f"❌ Eroare: {str(e)}")
             return None
+    def stream_chatbot_msg(self, request, on_chunk):
+        # Streaming chat: on_chunk(text) is called for every piece of the answer
+        # as it arrives (from this thread); returns {"success": ...} at the end
+        try:
+            payload = {
+                "message_type": "ChatBot",
+                "user_id": self.user_id, 
+                "content": request,
+                "token": self.token
+            }
+            
+            with self.session.post(
+                f"{self.server_url}/api/AI/chat/stream", 
+                json=payload, 
+                stream=True,
+                timeout=(10, 120),
+            ) as response:
+                if response.status_code != 200:
+                    print(f"❌ Eroare: {response.status_code}")
+                    return {"success": False, "error": f"Eroare: {response.status_code}"}
+                # chunk_size=None: every chunk is handed over as soon as it lands
+                for line in response.iter_lines(chunk_size=None):
+                    if not line:
+                        continue
+                    event = json.loads(line)
+                    if event["type"] == "chunk":
+                        on_chunk(event["text"])
+                    elif event["type"] == "error":
+                        print(f"❌ Eroare: {event['detail']}")
+                        return {"success": False, "error": event["detail"]}
+                    elif event["type"] == "done":
+                        return {"success": True}
+            return {"success": False, "error": "Raspuns incomplet"}
+        except Exception as e:
+            print(f"❌ Eroare: {str(e)}")
+            return {"success": False, "error": str(e)}
+    def sent_OCR_image_bytes(self, image_bytes, content_type="application/octet-stream"):
+        # Raw upload: no base64 (+33%) and no JSON copy of the photo
+        try:
+            response = self.session.post(
+                f"{self.server_url}/api/AI/ocr", 
+                data=image_bytes, 
+                headers={"Content-Type": content_type},
+                timeout=120,
+            )
+            
+            if response.status_code == 200:
+                data = response.json()
+                print(f"✅ {data['success']}")
+                return data
+            else:
+                print(f"❌ Eroare: {response.status_code}")
+                return None
+        except Exception as e:
+            print(f"❌ Eroare: {str(e)}")
+            return None
+    def submit_OCR_job(self, image_bytes):
+        # Returns the job ID at once; fetch the result with get_OCR_job
+        try:
+            response = self.session.post(
+                f"{self.server_url}/api/AI/ocr/jobs", 
+                data=image_bytes, 
+                headers={"Content-Type": "application/octet-stream"},
+                timeout=30,
+            )
+            
+            if response.status_code == 200:
+                data = response.json()
+                print(f"✅ {data['success']}")
+                return data
+            else:
+                print(f"❌ Eroare: {response.status_code}")
+                return None
+        except Exception as e:
+            print(f"❌ Eroare: {str(e)}")
+            return None
+    def get_OCR_job(self, job_id, wait=20):
+        # Long polling: the server answers as soon as the job finishes, or after `wait` seconds
+        try:
+            response = self.session.get(
+                f"{self.server_url}/api/AI/ocr/jobs/{job_id}", 
+                params={"wait": wait},
+                timeout=wait + 10,
+            )
+            
+            if response.status_code == 200:
+                return response.json()
+            else:
+                print(f"❌ Eroare: {response.status_code}")
+                return None
+        except Exception as e:
+            print(f"❌ Eroare: {str(e)}")
+            return None
+    def run_OCR_job(self, image_bytes, timeout=120, wait=20):
+        submitted = self.submit_OCR_job(image_bytes)
+        if not submitted or not submitted.get("success"):
+            return submitted
+        job_id = submitted["data"]["job_id"]
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            data = self.get_OCR_job(job_id, wait=min(wait, max(1, int(deadline - time.monotonic()))))
+            if data is None or not data.get("success"):
+                return data
+            if data["data"].get("status") in ("done", "failed"):
+                return data
+        return None
+    def precheck_OCR_image(self, preview_bytes, width=None, height=None):
+        # Quality gate on a small preview before uploading the full photo;
+        # width/height are the full photo's size
+        try:
+            params = {"width": width, "height": height} if width and height else None
+            response = self.session.post(
+                f"{self.server_url}/api/AI/ocr/precheck", 
+                data=preview_bytes, 
+                params=params,
+                headers={"Content-Type": "application/octet-stream"},
+                timeout=10,
+            )
+            
+            if response.status_code == 200:
+                return response.json()
+            else:
+                print(f"❌ Eroare: {response.status_code}")
+                return None
+        except Exception as e:
+            print(f"❌ Eroare: {str(e)}")
+            return None
     def sent_OCR_image(self, img_base64):
         try:
             payload = {
@@ -1,6 +1,14 @@
 use crate::handle_requests::response_handler::ResponseHandler;
 use crate::others::common::{MessageRequest, MessageResponse};
-use axum::{extract::Json as ExtractJson, response::Json};
+use axum::{
+    body::{Bytes, StreamBody},
+    extract::{Json as ExtractJson, Path, RawQuery},
+    http::{
+        header::{ACCEPT, CACHE_CONTROL, CONTENT_TYPE},
+        HeaderMap, HeaderValue, StatusCode,
+    },
+    response::{IntoResponse, Json, Response},
+};
 use chrono::Utc;
 use reqwest::Client;
 use serde_json::json;
@@ -26,6 +34,145 @@ impl AiRequests {
         })
     }
 
+    // Streaming chat: the NDJSON / SSE stream of the AI service is passed on
+    // chunk by chunk, so the client sees the first tokens while the rest is
+    // still being generated
+    pub async fn handle_chat_stream(
+        headers: HeaderMap,
+        ExtractJson(request): ExtractJson<MessageRequest>,
+    ) -> Response {
+        println!("📨 AI chat stream primit: {:?}", request);
+        let client = Client::new();
+        let mut upstream = client.post("http://localhost:8001/chat/stream").json(&request);
+        if let Some(accept) = headers.get(ACCEPT) {
+            upstream = upstream.header(ACCEPT, accept.clone());
+        }
+
+        let response = match upstream.send().await {
+            Ok(response) if response.status().is_success() => response,
+            Ok(response) => {
+                let (_, data) = ResponseHandler::standard_error(format!("chat {}", response.status()));
+                return (StatusCode::BAD_GATEWAY, Json(data)).into_response();
+            }
+            Err(e) => {
+                let (_, data) = ResponseHandler::standard_error(e.to_string());
+                return (StatusCode::BAD_GATEWAY, Json(data)).into_response();
+            }
+        };
+
+        let content_type = response
+            .headers()
+            .get(CONTENT_TYPE)
+            .cloned()
+            .unwrap_or_else(|| HeaderValue::from_static("application/x-ndjson"));
+        (
+            [
+                (CONTENT_TYPE, content_type),
+                (CACHE_CONTROL, HeaderValue::from_static("no-cache")),
+            ],
+            StreamBody::new(response.bytes_stream()),
+        )
+            .into_response()
+    }
+
+    // Binary OCR upload: the image bytes are forwarded as they arrived,
+    // without the base64/JSON round trip of /api/AI
+    pub async fn handle_ocr_upload(headers: HeaderMap, body: Bytes) -> Json<MessageResponse> {
+        println!("📨 AI OCR upload primit: {} bytes", body.len());
+        let (success, data) = AiRequests::call_python_ocr_upload(
+            "http://localhost:8001/ocr/upload".to_string(),
+            body,
+            AiRequests::content_type(&headers),
+        )
+        .await;
+
+        Json(MessageResponse {
+            success,
+            message_type: String::from("OCR"),
+            data,
+            timestamp: Utc::now().to_rfc3339(),
+        })
+    }
+
+    // Quality pre-check of a camera preview; width/height of the full photo
+    // are passed through in the query string
+    pub async fn handle_ocr_precheck(
+        RawQuery(query): RawQuery,
+        headers: HeaderMap,
+        body: Bytes,
+    ) -> Json<MessageResponse> {
+        let url = match query {
+            Some(query) => format!("http://localhost:8001/ocr/precheck?{}", query),
+            None => "http://localhost:8001/ocr/precheck".to_string(),
+        };
+        let (success, data) =
+            AiRequests::call_python_ocr_upload(url, body, AiRequests::content_type(&headers)).await;
+
+        Json(MessageResponse {
+            success,
+            message_type: String::from("OCRPrecheck"),
+            data,
+            timestamp: Utc::now().to_rfc3339(),
+        })
+    }
+
+    // Job mode: submit returns a job ID at once, the result is fetched with
+    // (long) polling instead of holding the connection for the whole scan
+    pub async fn handle_ocr_job_submit(headers: HeaderMap, body: Bytes) -> Json<MessageResponse> {
+        let (success, data) = AiRequests::call_python_ocr_upload(
+            "http://localhost:8001/ocr/jobs".to_string(),
+            body,
+            AiRequests::content_type(&headers),
+        )
+        .await;
+
+        Json(MessageResponse {
+            success,
+            message_type: String::from("OCRJob"),
+            data,
+            timestamp: Utc::now().to_rfc3339(),
+        })
+    }
+
+    pub async fn handle_ocr_job_status(
+        Path(job_id): Path<String>,
+        RawQuery(query): RawQuery,
+    ) -> Json<MessageResponse> {
+        let url = match query {
+            Some(query) => format!("http://localhost:8001/ocr/jobs/{}?{}", job_id, query),
+            None => format!("http://localhost:8001/ocr/jobs/{}", job_id),
+        };
+        let client = Client::new();
+        let (success, data) = match client.get(url).send().await {
+            Ok(response) => {
+                let status = response.status();
+                match response.json::<Value>().await {
+                    Ok(value) if status.is_success() => (true, value),
+                    Ok(value) => {
+                        ResponseHandler::standard_error(format!("OCR job {}: {}", status, value))
+                    }
+                    Err(e) => ResponseHandler::standard_error(e.to_string()),
+                }
+            }
+            Err(e) => ResponseHandler::standard_error(e.to_string()),
+        };
+
+        Json(MessageResponse {
+            success,
+            message_type: String::from("OCRJob"),
+            data,
+            timestamp: Utc::now().to_rfc3339(),
+        })
+    }
+
+    fn content_type(headers: &HeaderMap) -> String {
+        headers
+            .get(CONTENT_TYPE)
+            .and_then(|value| value.to_str().ok())
+            .unwrap_or("application/octet-stream")
+            .to_string()
+    }
+
     pub async fn call_python_chat(request: &MessageRequest) -> (bool, Value) {
         let client = Client::new();
 
@@ -65,6 +212,34 @@ impl AiRequests {
 
         (true, chat_response)
     }
+    pub async fn call_python_ocr_upload(
+        url: String,
+        body: Bytes,
+        content_type: String,
+    ) -> (bool, Value) {
+        let client = Client::new();
+        let response = match client
+            .post(url)
+            .header(CONTENT_TYPE, content_type)
+            .body(body)
+            .send()
+            .await
+        {
+            Ok(re) => re,
+            Err(e) => return ResponseHandler::standard_error(e.to_string()),
+        };
+
+        let status = response.status();
+        let ocr_response: Value = match response.json().await {
+            Ok(value) => value,
+            Err(e) => return ResponseHandler::standard_error(e.to_string()),
+        };
+        if !status.is_success() {
+            return ResponseHandler::standard_error(format!("OCR {}: {}", status, ocr_response));
+        }
+
+        (true, ocr_response)
+    }
     pub async fn call_python_health() -> (bool, Value) {
         let client = Client::new();
 
@@ -73,6 +248,10 @@ impl AiRequests {
             Err(e) => return ResponseHandler::standard_error(e.to_string()),
         };
 
+        if !response.status().is_success() {
+            // The AI service answers 503 until its startup warm-up is done
+            return ResponseHandler::standard_error(format!("AI service not ready: {}", response.status()));
+        }
         let health_response: String = match response.json().await{
             Ok(e)=>e,
             Err(_)=>return ResponseHandler::standard_error(String::from("unknown request")),
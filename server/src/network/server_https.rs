@@ -1,4 +1,5 @@
 use axum::{
+    extract::DefaultBodyLimit,
     middleware,
     response::Json,
     routing::{get, post},
@@ -68,6 +69,20 @@ impl HTTPServer {
             .route("/api/data", get(Self::get_data))
             .route("/api/message", post(DataRequestHandler::handle_message))
             .route("/api/AI", post(AiRequests::handle_ai_reqsuest))
+            .route("/api/AI/chat/stream", post(AiRequests::handle_chat_stream))
+            .route(
+                "/api/AI/ocr",
+                post(AiRequests::handle_ocr_upload).layer(DefaultBodyLimit::max(20 * 1024 * 1024)),
+            )
+            .route(
+                "/api/AI/ocr/jobs",
+                post(AiRequests::handle_ocr_job_submit).layer(DefaultBodyLimit::max(20 * 1024 * 1024)),
+            )
+            .route("/api/AI/ocr/jobs/:job_id", get(AiRequests::handle_ocr_job_status))
+            .route(
+                "/api/AI/ocr/precheck",
+                post(AiRequests::handle_ocr_precheck).layer(DefaultBodyLimit::max(20 * 1024 * 1024)),
+            )
             .route("/api/exit", post(DataRequestHandler::handle_message))
             .layer(middleware::from_fn_with_state(
                 app_state.clone(),